@@ -0,0 +1,187 @@
+"""Occupancy and revenue summaries for the admin dashboard.
+
+Three summary tables hold the totals of confirmed bookings:
+
+    show_stats          one row per show, with the theatre capacity for occupancy
+    movie_day_stats     per movie and show date
+    theatre_day_stats   per theatre and show date
+
+They are kept up to date by record_booking(), which the booking code calls
+inside the transaction that confirms or cancels a booking, so the summaries
+commit or roll back together with it. The dashboard reads only these tables.
+Pending holds are not counted until they are paid for.
+
+Usage: python analytics.py rebuild    recomputes the summaries from the booking tables
+"""
+import argparse
+import sys
+
+from storage import backend
+
+COUNTERS = ("bookings", "tickets_sold", "revenue")
+
+_SHOW_UPSERT = backend.upsert_sql("show_stats", ("show_id",), ("movie_id", "theatre_id", "show_date", "capacity"), COUNTERS)
+_MOVIE_DAY_UPSERT = backend.upsert_sql("movie_day_stats", ("movie_id", "show_date"), (), COUNTERS)
+_THEATRE_DAY_UPSERT = backend.upsert_sql("theatre_day_stats", ("theatre_id", "show_date"), (), COUNTERS)
+
+
+def record_booking(cursor, show_id, bookings, tickets, revenue):
+    """Adds confirmed bookings of a show to the summaries; negative numbers take them away.
+
+    Runs on the caller's cursor, i.e. in the booking transaction.
+    """
+    cursor.execute("""
+        SELECT s.movie_id, s.theatre_id, DATE(s.show_datetime), COALESCE(t.capacity, 0)
+        FROM showtime s
+        LEFT JOIN theatre t ON t.theatre_id = s.theatre_id
+        WHERE s.show_id = %s
+    """, (show_id,))
+    row = cursor.fetchone()
+    if row is None:
+        return
+    movie_id, theatre_id, show_date, capacity = row
+    counters = (bookings, tickets, revenue or 0)
+    cursor.execute(_SHOW_UPSERT, (show_id, movie_id, theatre_id, show_date, capacity) + counters)
+    if movie_id is not None:
+        cursor.execute(_MOVIE_DAY_UPSERT, (movie_id, show_date) + counters)
+    if theatre_id is not None:
+        cursor.execute(_THEATRE_DAY_UPSERT, (theatre_id, show_date) + counters)
+
+
+def register_shows(cursor, after_show_id):
+    """Adds empty show_stats rows for the shows with ids above after_show_id, so they count as seats on offer.
+
+    Called in the transaction that inserted the shows.
+    """
+    cursor.execute("""
+        INSERT INTO show_stats (show_id, movie_id, theatre_id, show_date, capacity)
+        SELECT s.show_id, s.movie_id, s.theatre_id, DATE(s.show_datetime), COALESCE(t.capacity, 0)
+        FROM showtime s
+        LEFT JOIN theatre t ON t.theatre_id = s.theatre_id
+        WHERE s.show_id > %s AND s.show_datetime IS NOT NULL
+          AND NOT EXISTS (SELECT 1 FROM show_stats ss WHERE ss.show_id = s.show_id)
+    """, (after_show_id,))
+
+
+def rebuild(pool):
+    """Recomputes every summary from showtime and booking in one transaction; returns the row counts.
+
+    Every show gets a show_stats row, including shows nobody has booked,
+    so occupancy is measured against all seats on offer. Bookings moved
+    to booking_archive (archive.py) still count.
+    """
+    from booking import run_in_transaction  # booking imports this module
+
+    def work(cursor):
+        for table in ("movie_day_stats", "theatre_day_stats", "show_stats"):
+            cursor.execute(f"DELETE FROM {table}")
+        cursor.execute("""
+            INSERT INTO show_stats (show_id, movie_id, theatre_id, show_date, capacity, bookings, tickets_sold, revenue)
+            SELECT s.show_id, s.movie_id, s.theatre_id, DATE(s.show_datetime), COALESCE(t.capacity, 0),
+                   COALESCE(b.bookings, 0), COALESCE(b.tickets, 0), COALESCE(b.revenue, 0)
+            FROM showtime s
+            LEFT JOIN theatre t ON t.theatre_id = s.theatre_id
+            LEFT JOIN (
+                SELECT show_id, COUNT(*) AS bookings, SUM(ticket_count) AS tickets, SUM(total_price) AS revenue
+                FROM (
+                    SELECT show_id, ticket_count, total_price FROM booking WHERE b_status = 'confirmed'
+                    UNION ALL
+                    SELECT show_id, ticket_count, total_price FROM booking_archive WHERE b_status = 'confirmed'
+                ) confirmed
+                GROUP BY show_id
+            ) b ON b.show_id = s.show_id
+            WHERE s.show_datetime IS NOT NULL
+        """)
+        counts = {"show_stats": cursor.rowcount}
+        for table, key in (("movie_day_stats", "movie_id"), ("theatre_day_stats", "theatre_id")):
+            cursor.execute(f"""
+                INSERT INTO {table} ({key}, show_date, bookings, tickets_sold, revenue)
+                SELECT {key}, show_date, SUM(bookings), SUM(tickets_sold), SUM(revenue)
+                FROM show_stats
+                WHERE {key} IS NOT NULL
+                GROUP BY {key}, show_date
+            """)
+            counts[table] = cursor.rowcount
+        return counts
+
+    return run_in_transaction(pool, work)
+
+
+def fetch_dashboard(pool, since, limit=200):
+    """Summary rows for shows on or after `since`, newest first, as a dict of lists:
+
+    shows:    (show_id, title, theatre_name, show_date, tickets_sold, capacity, bookings, revenue)
+    movies:   (show_date, title, bookings, tickets_sold, revenue)
+    theatres: (show_date, theatre_name, shows, tickets_sold, capacity, revenue)
+    totals:   (bookings, tickets_sold, capacity, revenue) over the period
+    """
+    with pool.connection() as con:
+        cursor = con.cursor()
+        cursor.execute("""
+            SELECT ss.show_id, m.title, t.theatre_name, ss.show_date, ss.tickets_sold, ss.capacity, ss.bookings, ss.revenue
+            FROM show_stats ss
+            LEFT JOIN movies m ON m.movie_id = ss.movie_id
+            LEFT JOIN theatre t ON t.theatre_id = ss.theatre_id
+            WHERE ss.show_date >= %s
+            ORDER BY ss.show_date DESC, ss.show_id DESC
+            LIMIT %s
+        """, (since, limit))
+        shows = cursor.fetchall()
+        cursor.execute("""
+            SELECT md.show_date, m.title, md.bookings, md.tickets_sold, md.revenue
+            FROM movie_day_stats md
+            LEFT JOIN movies m ON m.movie_id = md.movie_id
+            WHERE md.show_date >= %s
+            ORDER BY md.show_date DESC, md.revenue DESC
+            LIMIT %s
+        """, (since, limit))
+        movies = cursor.fetchall()
+        # Seats on offer come from show_stats; the per-day table carries the sales
+        cursor.execute("""
+            SELECT c.show_date, t.theatre_name, c.shows, COALESCE(td.tickets_sold, 0), c.capacity, COALESCE(td.revenue, 0)
+            FROM (
+                SELECT theatre_id, show_date, COUNT(*) AS shows, SUM(capacity) AS capacity
+                FROM show_stats
+                WHERE show_date >= %s AND theatre_id IS NOT NULL
+                GROUP BY theatre_id, show_date
+            ) c
+            LEFT JOIN theatre_day_stats td ON td.theatre_id = c.theatre_id AND td.show_date = c.show_date
+            LEFT JOIN theatre t ON t.theatre_id = c.theatre_id
+            ORDER BY c.show_date DESC, t.theatre_name
+            LIMIT %s
+        """, (since, limit))
+        theatres = cursor.fetchall()
+        cursor.execute("""
+            SELECT COALESCE(SUM(bookings), 0), COALESCE(SUM(tickets_sold), 0),
+                   COALESCE(SUM(capacity), 0), COALESCE(SUM(revenue), 0)
+            FROM show_stats
+            WHERE show_date >= %s
+        """, (since,))
+        totals = cursor.fetchone()
+    return {"shows": shows, "movies": movies, "theatres": theatres, "totals": totals}
+
+
+def occupancy(tickets, capacity):
+    return tickets / capacity if capacity else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Booking summary tables")
+    parser.add_argument("command", choices=("rebuild",))
+    parser.parse_args()
+
+    from booking_service import db_pool, shards
+
+    try:
+        # Each cinema keeps the summaries of its own shows
+        for shard in shards:
+            counts = rebuild(shard.pool)
+            print(f"{shard.name}: " + ", ".join(f"{rows} {table}" for table, rows in counts.items()))
+    finally:
+        shards.close()
+        db_pool.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,401 @@
+"""HTTP/JSON API over booking_service.
+
+Usage: python api_server.py --port 8080 --workers 4
+
+Endpoints (JSON in, JSON out; user endpoints need "Authorization: Bearer <token>"):
+    POST   /login                    {"username", "password"} -> {"user_id", "token"}
+    GET    /movies                   ?q=<prefix>&genre=<genre>&min_rating=<n>&limit=<n> searches the catalog
+    GET    /movies/<title>
+    GET    /movies/<title>/schedule
+    POST   /holds                    {"show_id", "ticket_count"} -> hold
+    DELETE /holds/<booking_id>
+    POST   /bookings                 {"booking_id", "payment_method"?, "transaction_id"?} -> pays for a hold,
+                                     returns the ticket numbers
+    POST   /checkout                 {"show_id", "ticket_count", "payment_method"?, "transaction_id"?} -> books and
+                                     pays at once, without a hold
+    GET    /bookings
+    POST   /bookings/<id>/cancel
+    GET    /bookings/<id>/tickets
+    GET    /tickets/<ticket_number>  door check: the ticket and whether it is valid
+    GET    /metrics                  Prometheus text format
+
+After a booking, payment, release or cancellation, user endpoints answer
+with an "X-Read-Pin" header for as long as the user's reads must come from
+the primary. Clients send the last one they received back with their next
+requests, so that whichever worker serves them reads the user's own writes.
+"""
+import argparse
+import asyncio
+import hashlib
+import hmac
+import json
+import multiprocessing
+import os
+import re
+import socket
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from functools import partial
+from urllib.parse import parse_qsl, unquote
+
+import booking_service as service
+from booking import SeatsUnavailable
+from seat_holds import HoldExpired
+from storage import DatabaseError
+
+MAX_BODY = 64 * 1024
+PIN_HEADER = "X-Read-Pin"
+REASONS = {200: "OK", 201: "Created", 204: "No Content", 400: "Bad Request", 401: "Unauthorized",
+           404: "Not Found", 405: "Method Not Allowed", 409: "Conflict", 410: "Gone",
+           413: "Payload Too Large", 500: "Internal Server Error", 503: "Service Unavailable"}
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _secret():
+    secret = os.getenv("API_SECRET")
+    if not secret:
+        raise SystemExit("API_SECRET must be set so that every worker signs the same tokens.")
+    return secret.encode()
+
+
+def make_token(user_id):
+    signature = hmac.new(_secret(), str(user_id).encode(), hashlib.sha256).hexdigest()
+    return f"{user_id}.{signature}"
+
+
+def make_pin(user_id, until):
+    value = f"{until:.3f}"
+    signature = hmac.new(_secret(), f"{user_id}:{value}".encode(), hashlib.sha256).hexdigest()
+    return f"{value}.{signature}"
+
+
+def pin_from_headers(headers, user_id):
+    """The pin end time sent back by the client; None when it is missing or not signed by us."""
+    value, _, signature = headers.get(PIN_HEADER.lower(), "").rpartition(".")
+    try:
+        until = float(value)
+    except ValueError:
+        return None
+    if not hmac.compare_digest(make_pin(user_id, until), f"{value}.{signature}"):
+        return None
+    return until
+
+
+def user_from_headers(headers):
+    scheme, _, token = headers.get("authorization", "").partition(" ")
+    user_id, _, signature = token.partition(".")
+    if scheme.lower() != "bearer" or not user_id.isdigit():
+        raise HTTPError(401, "Missing or malformed token.")
+    if not hmac.compare_digest(make_token(user_id), token):
+        raise HTTPError(401, "Invalid token.")
+    return int(user_id)
+
+
+def to_json(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, timedelta):
+        return str(value)
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Cannot serialise {type(value).__name__}")
+
+
+def _field(body, name, kind=str):
+    try:
+        return kind(body[name])
+    except (KeyError, TypeError, ValueError):
+        raise HTTPError(400, f"'{name}' is required.")
+
+
+def _flag(body, name):
+    return body.get(name) not in (None, "", "0", "false")
+
+
+def hold_json(hold):
+    return {
+        "booking_id": hold.booking_id,
+        "show_id": hold.show_id,
+        "ticket_count": hold.ticket_count,
+        "total_price": hold.total_price,
+        "seat_numbers": hold.seat_numbers,
+        "expires_in": round(hold.seconds_left()),
+    }
+
+
+# Handlers run on the default thread pool; each returns (status, payload)
+
+def login(body, user_id):
+    found = service.find_user(_field(body, "username"), _field(body, "password"))
+    if not found:
+        raise HTTPError(401, "Invalid username or password.")
+    return 200, {"user_id": found, "token": make_token(found)}
+
+
+MOVIE_COLUMNS = ("title", "duration", "genre", "release_date")
+
+
+def list_movies(body, user_id):
+    if _flag(body, "with_availability"):
+        # Upcoming shows and free seats summed over every cinema
+        return 200, [dict(zip(MOVIE_COLUMNS + ("upcoming_shows", "available_seats", "next_show"), movie))
+                     for movie in service.fetch_movies_with_availability()]
+    if any(name in body for name in ("q", "genre", "min_rating", "limit")):
+        try:
+            min_rating = float(body["min_rating"]) if body.get("min_rating") else None
+            limit = min(int(body.get("limit") or 50), 500)
+        except ValueError:
+            raise HTTPError(400, "'min_rating' and 'limit' must be numbers.")
+        movies = service.search_movies(body.get("q", ""), body.get("genre") or None, min_rating, limit)
+    else:
+        movies = service.fetch_movies()
+    return 200, [dict(zip(MOVIE_COLUMNS, movie)) for movie in movies]
+
+
+def movie_details(body, user_id, title):
+    details = service.fetch_movie_details(title)
+    if not details:
+        raise HTTPError(404, "Movie not found.")
+    return 200, dict(zip(("title", "genre", "duration", "director", "actors", "rating", "release_date"), details))
+
+
+def movie_schedule(body, user_id, title):
+    return 200, service.fetch_schedule_for_movie(title)
+
+
+def create_hold(body, user_id):
+    ticket_count = _field(body, "ticket_count", int)
+    if ticket_count <= 0:
+        raise HTTPError(400, "'ticket_count' must be positive.")
+    hold = service.place_hold(user_id, _field(body, "show_id", int), ticket_count)
+    return 201, hold_json(hold)
+
+
+def delete_hold(body, user_id, booking_id):
+    service.release_hold(user_id, int(booking_id))
+    return 204, None
+
+
+def pay_hold(body, user_id):
+    booking_id = _field(body, "booking_id", int)
+    tickets = service.confirm_hold(user_id, booking_id, body.get("payment_method") or "credit_card",
+                                   body.get("transaction_id"))
+    return 200, {"booking_id": booking_id, "status": "confirmed", "tickets": tickets}
+
+
+def checkout(body, user_id):
+    ticket_count = _field(body, "ticket_count", int)
+    if ticket_count <= 0:
+        raise HTTPError(400, "'ticket_count' must be positive.")
+    result = service.checkout(user_id, _field(body, "show_id", int), ticket_count,
+                              body.get("payment_method") or "credit_card", body.get("transaction_id"))
+    return 201, {"booking_id": result["booking_id"], "status": "confirmed", "total_price": result["total_price"],
+                 "seat_numbers": result["seat_numbers"], "tickets": result["ticket_numbers"]}
+
+
+def my_bookings(body, user_id):
+    columns = ("booking_id", "title", "theatre_name", "show_datetime", "total_price", "status")
+    # ?archived=1 adds bookings of shows moved to the archive
+    return 200, [dict(zip(columns, row)) for row in service.fetch_reservations(user_id, _flag(body, "archived"))]
+
+
+def cancel(body, user_id, booking_id):
+    service.cancel_reservation(user_id, int(booking_id))
+    return 200, {"booking_id": int(booking_id), "status": "cancelled"}
+
+
+TICKET_COLUMNS = ("ticket_number", "title", "theatre_name", "show_datetime", "seat_number", "status")
+
+
+def booking_tickets(body, user_id, booking_id):
+    tickets = service.fetch_tickets(user_id, int(booking_id), _flag(body, "archived"))
+    return 200, [dict(zip(TICKET_COLUMNS, row)) for row in tickets]
+
+
+def scan_ticket(body, user_id, number):
+    ticket = service.lookup_ticket(number)
+    if ticket is None:
+        raise HTTPError(404, "Unknown ticket.")
+    return 200, dict(zip(TICKET_COLUMNS, ticket), valid=ticket[5] == "confirmed")
+
+
+def metrics(body, user_id):
+    return 200, service.metrics_text()
+
+
+ROUTES = [
+    ("POST", re.compile(r"^/login$"), login, False),
+    ("GET", re.compile(r"^/movies$"), list_movies, False),
+    ("GET", re.compile(r"^/movies/([^/]+)$"), movie_details, False),
+    ("GET", re.compile(r"^/movies/([^/]+)/schedule$"), movie_schedule, False),
+    ("POST", re.compile(r"^/holds$"), create_hold, True),
+    ("DELETE", re.compile(r"^/holds/(\d+)$"), delete_hold, True),
+    ("POST", re.compile(r"^/bookings$"), pay_hold, True),
+    ("POST", re.compile(r"^/checkout$"), checkout, True),
+    ("GET", re.compile(r"^/bookings$"), my_bookings, True),
+    ("POST", re.compile(r"^/bookings/(\d+)/cancel$"), cancel, True),
+    ("GET", re.compile(r"^/bookings/(\d+)/tickets$"), booking_tickets, True),
+    ("GET", re.compile(r"^/tickets/([^/]+)$"), scan_ticket, False),
+    ("GET", re.compile(r"^/metrics$"), metrics, False),
+]
+
+
+def dispatch(method, path, headers, body):
+    """Runs the handler of a request; returns (status, payload, extra response headers)."""
+    path_matched = False
+    for route_method, pattern, handler, needs_user in ROUTES:
+        match = pattern.match(path)
+        if not match:
+            continue
+        path_matched = True
+        if route_method != method:
+            continue
+        user_id = user_from_headers(headers) if needs_user else None
+        try:
+            if user_id is None:
+                return handler(body, user_id, *(unquote(group) for group in match.groups())) + ({},)
+            # The write that pinned this user may have been served by another worker
+            until = pin_from_headers(headers, user_id)
+            if until is not None:
+                service.restore_read_pin(user_id, until)
+            status, payload = handler(body, user_id, *(unquote(group) for group in match.groups()))
+            until = service.read_pin(user_id)
+            return status, payload, {PIN_HEADER: make_pin(user_id, until)} if until is not None else {}
+        except SeatsUnavailable as err:
+            raise HTTPError(409, str(err))
+        except HoldExpired as err:
+            raise HTTPError(410, str(err))
+        except service.BookingError as err:
+            raise HTTPError(409, str(err))
+        except DatabaseError as err:
+            print(f"Database error: {err}")
+            raise HTTPError(503, "Database unavailable.")
+    raise HTTPError(405 if path_matched else 404, "No such endpoint.")
+
+
+async def handle_connection(reader, writer):
+    loop = asyncio.get_running_loop()
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line:
+                break
+            try:
+                method, target, version = request_line.decode("latin-1").split()
+            except ValueError:
+                break
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+
+            keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+            try:
+                length = int(headers.get("content-length", "0"))
+                if length > MAX_BODY:
+                    raise HTTPError(413, "Request body too large.")
+                raw = await reader.readexactly(length) if length else b""
+                try:
+                    body = json.loads(raw) if raw else {}
+                except ValueError:
+                    raise HTTPError(400, "Body must be JSON.")
+                path, _, query = target.partition("?")
+                if method == "GET" and query:
+                    body = dict(parse_qsl(query))
+                status, payload, extra = await loop.run_in_executor(
+                    None, partial(dispatch, method, path, headers, body))
+            except HTTPError as err:
+                status, payload, extra = err.status, {"error": str(err)}, {}
+            except Exception as err:
+                print(f"Unhandled error: {err!r}")
+                status, payload, extra = 500, {"error": "Internal server error."}, {}
+
+            if isinstance(payload, str):
+                data, content_type = payload.encode(), "text/plain; version=0.0.4"
+            else:
+                data = b"" if payload is None else json.dumps(payload, default=to_json).encode()
+                content_type = "application/json"
+            head = (f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+                    f"Content-Type: {content_type}\r\nContent-Length: {len(data)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+                    + "".join(f"{name}: {value}\r\n" for name, value in extra.items()) + "\r\n")
+            writer.write(head.encode() + data)
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(sock):
+    server = await asyncio.start_server(handle_connection, sock=sock)
+    async with server:
+        await server.serve_forever()
+
+
+def run_worker(sock, recover):
+    _secret()
+    if recover:
+        try:
+            service.recover_holds()
+        except DatabaseError as err:
+            print(f"Database error: {err}")
+    service.start_holds()
+    if recover:
+        # One archiver per server, in the first worker
+        service.start_archiving()
+    service.start_metrics_export()
+    try:
+        asyncio.run(serve(sock))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.stop_holds()
+        service.shards.close()
+        service.db_pool.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cinema booking HTTP API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--workers", type=int, default=1, help="worker processes sharing the listening socket")
+    args = parser.parse_args()
+    _secret()
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((args.host, args.port))
+    sock.listen(1024)
+    sock.setblocking(False)
+    print(f"Listening on http://{args.host}:{args.port} with {args.workers} worker(s)")
+
+    if args.workers <= 1:
+        run_worker(sock, recover=True)
+        return
+
+    # Children inherit the bound socket; each one has its own connection pool and event loop
+    context = multiprocessing.get_context("fork")
+    workers = [context.Process(target=run_worker, args=(sock, index == 0)) for index in range(args.workers)]
+    for worker in workers:
+        worker.start()
+    try:
+        for worker in workers:
+            worker.join()
+    except KeyboardInterrupt:
+        for worker in workers:
+            worker.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""Moves the bookings of past shows out of the live tables.
+
+booking, booking_seats, payments and tickets only ever grow, and every
+reservation list, show summary and admin query reads them. Once a show is
+more than ARCHIVE_AFTER_DAYS old its bookings can no longer change, so
+archive_shows() moves them, with their seats, payments and tickets, into
+the *_archive tables (same columns, no foreign keys). It works one show at
+a time and at most batch_size bookings per transaction, pausing between
+batches, so live bookings never wait long for its locks. Holds still
+pending are left for the expiry timer.
+
+On MySQL booking_archive is range-partitioned by booking_date, one
+partition per year (migrations/007_booking_archive.sql); add_partitions()
+keeps a partition ready for the coming years.
+
+History queries read the archive only when asked (include_archived in
+booking_service). Showtimes stay where they are: archived bookings still
+join them for the title, theatre and time.
+
+    python archive.py run [--days 90] [--batch-size 500]
+    python archive.py partitions
+"""
+import time
+from datetime import date, datetime, timedelta
+
+from booking import run_in_transaction
+from storage import backend
+
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_PAUSE = 0.05
+
+# Live tables and the columns copied to their archive, parents first
+ARCHIVE_TABLES = {
+    "booking": ("booking_id", "user_id", "seat_id", "show_id", "booking_date", "total_price", "extra_price",
+                "b_status", "ticket_count"),
+    "booking_seats": ("booking_seat_id", "booking_id", "seat_id"),
+    "payments": ("payment_id", "payment_date", "amount", "payment_method", "transaction_id", "booking_id", "p_status"),
+    "tickets": ("ticket_id", "booking_id", "seat_id", "ticket_number", "theatre_name", "seat_number", "title",
+                "show_id", "show_datetime"),
+}
+
+
+def archive_batch(cursor, show_id, batch_size=DEFAULT_BATCH_SIZE):
+    """Moves up to batch_size finished bookings of a show on the caller's cursor; returns rows moved per table."""
+    cursor.execute("""
+        SELECT booking_id FROM booking
+        WHERE show_id = %s AND b_status <> 'pending'
+        ORDER BY booking_id
+        LIMIT %s
+        FOR UPDATE
+    """, (show_id, batch_size))
+    booking_ids = [row[0] for row in cursor.fetchall()]
+    moved = dict.fromkeys(ARCHIVE_TABLES, 0)
+    if not booking_ids:
+        return moved
+    placeholders = ", ".join(["%s"] * len(booking_ids))
+    for table, columns in ARCHIVE_TABLES.items():
+        names = ", ".join(columns)
+        cursor.execute(f"INSERT INTO {table}_archive ({names}) SELECT {names} FROM {table} WHERE booking_id IN ({placeholders})",
+                       booking_ids)
+        moved[table] = cursor.rowcount
+    # Rows that refer to a booking go before the booking itself
+    for table in reversed(ARCHIVE_TABLES):
+        cursor.execute(f"DELETE FROM {table} WHERE booking_id IN ({placeholders})", booking_ids)
+    return moved
+
+
+def archive_shows(pool, before, batch_size=DEFAULT_BATCH_SIZE, pause=DEFAULT_PAUSE, stop=None):
+    """Archives the finished bookings of every show that started before `before`; returns rows moved per table.
+
+    Each batch is its own transaction. `stop` (a threading.Event) ends the
+    run after the current batch.
+    """
+    with pool.connection() as con:
+        cursor = con.cursor()
+        cursor.execute("""
+            SELECT DISTINCT b.show_id
+            FROM booking b
+            JOIN showtime s ON s.show_id = b.show_id
+            WHERE s.show_datetime < %s AND b.b_status <> 'pending'
+        """, (before,))
+        show_ids = sorted(row[0] for row in cursor.fetchall())
+
+    totals = dict.fromkeys(ARCHIVE_TABLES, 0)
+    for show_id in show_ids:
+        while stop is None or not stop.is_set():
+            moved = run_in_transaction(pool, lambda cursor, show_id=show_id: archive_batch(cursor, show_id, batch_size))
+            for table, count in moved.items():
+                totals[table] += count
+            if moved["booking"] < batch_size:
+                break
+            if pause:
+                time.sleep(pause)
+        if stop is not None and stop.is_set():
+            break
+    return totals
+
+
+def add_partitions(pool, years_ahead=1):
+    """Splits booking_archive's catch-all partition up to `years_ahead` years from now; returns the partitions added.
+
+    MySQL only: the SQLite archive is a plain table. The catch-all holds
+    rows booked after the last yearly partition, which archived bookings
+    of past shows normally are not, so the split moves no data.
+    """
+    if backend.name != "mysql":
+        return []
+    with pool.connection() as con:
+        cursor = con.cursor()
+        cursor.execute("""
+            SELECT partition_name FROM information_schema.partitions
+            WHERE table_schema = DATABASE() AND table_name = 'booking_archive' AND partition_name IS NOT NULL
+        """)
+        existing = {row[0] for row in cursor.fetchall()}
+        if "pmax" not in existing:
+            return []
+        added = []
+        for year in range(date.today().year, date.today().year + years_ahead + 1):
+            name = f"p{year}"
+            if name in existing:
+                continue
+            cursor.execute(f"""
+                ALTER TABLE booking_archive REORGANIZE PARTITION pmax INTO (
+                    PARTITION {name} VALUES LESS THAN ('{year + 1}-01-01'),
+                    PARTITION pmax VALUES LESS THAN (MAXVALUE)
+                )
+            """)
+            added.append(name)
+        return added
+
+
+def main():
+    import argparse
+    import os
+
+    parser = argparse.ArgumentParser(description="Archive the bookings of past shows")
+    parser.add_argument("command", choices=("run", "partitions"))
+    parser.add_argument("--days", type=int, default=int(os.getenv("ARCHIVE_AFTER_DAYS") or 90),
+                        help="archive shows that started more than this many days ago")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="bookings per transaction")
+    args = parser.parse_args()
+
+    from booking_service import db_pool, shards
+    try:
+        for shard in shards:
+            if args.command == "partitions":
+                added = add_partitions(shard.pool)
+                print(f"{shard.name}: " + (", ".join(added) if added else "no partitions added"))
+            else:
+                before = datetime.now() - timedelta(days=args.days)
+                moved = archive_shows(shard.pool, before, max(1, args.batch_size))
+                print(f"{shard.name}: " + ", ".join(f"{count} {table}" for table, count in moved.items()))
+    finally:
+        shards.close()
+        db_pool.close()
+
+
+if __name__ == "__main__":
+    main()
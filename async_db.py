@@ -0,0 +1,147 @@
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor
+from tkinter import CENTER, Label, TclError
+
+
+class QueryTimeout(Exception):
+    pass
+
+
+class Request:
+    __slots__ = ("future", "on_success", "on_error", "deadline", "indicator", "owner", "done")
+
+    def __init__(self, on_success, on_error, deadline, indicator):
+        self.future = None
+        self.on_success = on_success
+        self.on_error = on_error
+        self.deadline = deadline
+        self.indicator = indicator
+        self.owner = None
+        self.done = False
+
+    def cancel(self):
+        if self.done:
+            return
+        self.done = True
+        if self.future is not None:
+            self.future.cancel()
+        _hide(self.indicator)
+
+
+def _hide(indicator):
+    if indicator is not None:
+        try:
+            indicator.destroy()
+        except TclError:
+            pass
+
+
+class DBWorker:
+    """Runs blocking database calls on a bounded thread pool.
+
+    Results are handed back to the Tk main loop through a queue that is
+    drained with root.after, so callbacks may safely touch widgets. Requests
+    tied to a window are dropped when that window is destroyed, and a
+    request that runs past its timeout gets QueryTimeout instead of its
+    (late) result.
+
+    The timeout only stops the wait: the call itself keeps running on its
+    worker and connection. Writes are therefore submitted with timeout=0,
+    so the UI never reports a failure for a write that then commits.
+    """
+
+    def __init__(self, root, max_workers=4, timeout=10.0, poll_interval=50):
+        self.root = root
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="db-worker")
+        self._results = queue.Queue()
+        self._pending = set()
+        self._owned = {}  # owner widget -> its unfinished requests
+        self._polling = False
+
+    def submit(self, fn, *args, on_success, on_error=None, owner=None, timeout=None):
+        """Calls fn(*args) in the background; on_success(result) or on_error(exc) run on the Tk thread.
+
+        When `owner` is a widget, a loading label is shown on it until the
+        result arrives and the request is cancelled if the widget is destroyed.
+        timeout=0 waits for as long as the call takes.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        request = Request(on_success, on_error, time.monotonic() + timeout if timeout else None, None)
+        if owner is not None:
+            request.indicator = Label(owner, text="Loading...", font=("Times New Roman", 12, "italic"), fg="white", bg="gray25")
+            request.indicator.place(relx=0.5, rely=0.5, anchor=CENTER)
+            request.owner = owner
+            owned = self._owned.get(owner)
+            if owned is None:
+                # One binding per owner; Toplevel bindings also fire for their children, hence the widget check
+                owned = self._owned[owner] = set()
+                owner.bind("<Destroy>", lambda e: self._owner_destroyed(owner) if e.widget is owner else None, add="+")
+            owned.add(request)
+
+        request.future = self._executor.submit(fn, *args)
+        request.future.add_done_callback(lambda future: self._results.put(request))
+        self._pending.add(request)
+        self._schedule_poll()
+        return request
+
+    def _owner_destroyed(self, owner):
+        for request in self._owned.pop(owner, ()):
+            request.cancel()
+
+    def _forget(self, request):
+        self._pending.discard(request)
+        if request.owner is not None:
+            self._owned.get(request.owner, set()).discard(request)
+
+    def _schedule_poll(self):
+        if not self._polling:
+            self._polling = True
+            self.root.after(self.poll_interval, self._poll)
+
+    def _poll(self):
+        self._polling = False
+        while True:
+            try:
+                request = self._results.get_nowait()
+            except queue.Empty:
+                break
+            self._deliver(request)
+
+        now = time.monotonic()
+        for request in list(self._pending):
+            if request.done:
+                self._forget(request)
+            elif request.deadline is not None and now > request.deadline:
+                self._finish(request, error=QueryTimeout("The database did not respond in time. Please try again."))
+
+        if self._pending:
+            self._schedule_poll()
+
+    def _deliver(self, request):
+        if request.done or request.future.cancelled():
+            self._forget(request)
+            return
+        error = request.future.exception()
+        if error is not None:
+            self._finish(request, error=error)
+        else:
+            self._finish(request, result=request.future.result())
+
+    def _finish(self, request, result=None, error=None):
+        request.done = True
+        self._forget(request)
+        _hide(request.indicator)
+        if error is None:
+            request.on_success(result)
+        elif request.on_error is not None:
+            request.on_error(error)
+        else:
+            print(f"Database error: {error}")
+
+    def shutdown(self):
+        for request in list(self._pending):
+            request.cancel()
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,346 @@
+# Load test for the booking path: generates a synthetic dataset, drives
+# concurrent simulated customers through booking_service (browse, schedule,
+# hold, pay, ticket scan, my reservations, cancel) and checks the data stayed consistent.
+#
+# Point DB_NAME at a scratch database (the schema is created if it is empty);
+# --generate wipes it. Results are written as JSON so runs can be compared:
+#   DB_NAME=cinema_bench python benchmarks/bench_booking.py --generate --bookings 1000000
+#   DB_NAME=cinema_bench python benchmarks/bench_booking.py --users 32 --duration 60 --output new.json --compare old.json
+# or against an SQLite file:
+#   DB_BACKEND=sqlite SQLITE_PATH=/tmp/bench.db python benchmarks/bench_booking.py --generate --bookings 100000
+# An in-memory SQLite database has a single connection, so it only runs one
+# customer (--users 1): a quick check of the booking path and its consistency,
+# not a concurrent measurement.
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+OPERATIONS = ("browse", "schedule", "hold", "pay", "scan", "release", "reservations", "cancel")
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+def insert_batches(cursor, con, query, rows, batch_size):
+    for start in range(0, len(rows), batch_size):
+        cursor.executemany(query, rows[start:start + batch_size])
+        con.commit()
+
+
+def generate(service, args, rng):
+    from analytics import rebuild
+    from storage import bootstrap
+
+    started = time.perf_counter()
+    with service.db_pool.connection() as con:
+        cursor = con.cursor()
+        backend = service.backend
+        if not backend.has_schema(con):
+            bootstrap(backend, con)
+        tables = ("show_stats", "movie_day_stats", "theatre_day_stats",
+                  "tickets_archive", "payments_archive", "booking_seats_archive", "booking_archive",
+                  "tickets", "payments", "booking_seats", "booking", "seats", "showtime", "theatre", "movies", "users")
+        if backend.name == "mysql":
+            cursor.execute("SET FOREIGN_KEY_CHECKS = 0")
+            for table in tables:
+                cursor.execute(f"TRUNCATE TABLE {table}")
+            cursor.execute("SET FOREIGN_KEY_CHECKS = 1")
+        else:
+            for table in tables:
+                cursor.execute(f"DELETE FROM {table}")
+        con.commit()
+
+        genres = ["Action", "Drama", "Comedy", "Horror", "Animation", "Musical", "Sci-Fi"]
+        movies = [(i, f"Bench Movie {i:05d}", rng.choice(genres), rng.randint(80, 180), "2025-01-01",
+                   round(rng.uniform(3, 9), 1), f"Director {i}", "Actor A, Actor B")
+                  for i in range(1, args.movies + 1)]
+        insert_batches(cursor, con, "INSERT INTO movies (movie_id, title, genre, duration, release_date, rating, director, actors)"
+                       " VALUES (%s, %s, %s, %s, %s, %s, %s, %s)", movies, args.batch_size)
+
+        theatres = [(i, f"Salon {i}", args.capacity, "VIP" if i % 5 == 0 else "STANDARD", 15.0 if i % 5 == 0 else 0.0)
+                    for i in range(1, args.theatres + 1)]
+        insert_batches(cursor, con, "INSERT INTO theatre (theatre_id, theatre_name, capacity, type, extra_price)"
+                       " VALUES (%s, %s, %s, %s, %s)", theatres, args.batch_size)
+
+        seats = [(t * args.capacity + n + 1, str(n + 1), t + 1)
+                 for t in range(args.theatres) for n in range(args.capacity)]
+        insert_batches(cursor, con, "INSERT INTO seats (seat_id, seat_number, theatre_id) VALUES (%s, %s, %s)",
+                       seats, args.batch_size)
+
+        users = [(i, f"bench_user_{i}", f"bench_user_{i}@example.com", "bench") for i in range(1, args.user_rows + 1)]
+        insert_batches(cursor, con, "INSERT INTO users (user_id, user_name, email, password) VALUES (%s, %s, %s, %s)",
+                       users, args.batch_size)
+
+        # Shows run from `--days` days ago to `--days` days ahead, a few per theatre per day
+        first_day = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=args.days)
+        shows = []
+        for day in range(args.days * 2):
+            for theatre_id in range(1, args.theatres + 1):
+                for slot in (12, 15, 18, 21):
+                    shows.append([len(shows) + 1, rng.randint(1, args.movies), theatre_id,
+                                  first_day + timedelta(days=day, hours=slot), 20.0, args.capacity])
+
+        # Historical bookings never take a show below a quarter of its capacity
+        bookings = []
+        for booking_id in range(1, args.bookings + 1):
+            show = shows[rng.randrange(len(shows))]
+            count = rng.randint(1, 4)
+            if show[5] - count < args.capacity // 4:
+                continue
+            show[5] -= count
+            status = "cancelled" if rng.random() < 0.05 else "confirmed"
+            if status == "cancelled":
+                show[5] += count
+            bookings.append((booking_id, rng.randint(1, args.user_rows), show[0], show[3] - timedelta(days=1),
+                             count * 20.0, 0.0, count, status))
+        insert_batches(cursor, con, "INSERT INTO showtime (show_id, movie_id, theatre_id, show_datetime, base_price, available_seats)"
+                       " VALUES (%s, %s, %s, %s, %s, %s)", [tuple(show) for show in shows], args.batch_size)
+        insert_batches(cursor, con, "INSERT INTO booking (booking_id, user_id, show_id, booking_date, total_price, extra_price,"
+                       " ticket_count, b_status) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)", bookings, args.batch_size)
+
+    # The bookings above bypass the booking code, so the summaries are computed once from them
+    rebuild(service.db_pool)
+
+    elapsed = time.perf_counter() - started
+    print(f"generated {len(movies)} movies, {len(shows)} shows, {len(users)} users, "
+          f"{len(bookings)} bookings in {elapsed:.1f}s")
+
+
+class Customer(threading.Thread):
+    def __init__(self, service, args, user_id, titles, stop_at, seed):
+        super().__init__(daemon=True)
+        self.service = service
+        self.args = args
+        self.user_id = user_id
+        self.titles = titles
+        self.stop_at = stop_at
+        self.rng = random.Random(seed)
+        self.latencies = {operation: [] for operation in OPERATIONS}
+        self.errors = {operation: 0 for operation in OPERATIONS}
+        self.sold_out = 0
+        self.bookings = 0
+
+    def timed(self, operation, fn, *args):
+        started = time.perf_counter()
+        try:
+            return fn(*args)
+        except Exception as err:
+            if type(err).__name__ == "SeatsUnavailable":
+                self.sold_out += 1
+                return None
+            self.errors[operation] += 1
+            return None
+        finally:
+            self.latencies[operation].append(time.perf_counter() - started)
+
+    def run(self):
+        service, rng = self.service, self.rng
+        while time.monotonic() < self.stop_at:
+            self.timed("browse", service.fetch_movies)
+            schedule = self.timed("schedule", service.fetch_schedule_for_movie, rng.choice(self.titles))
+            shows = [show for times in (schedule or {}).values() for theatres in times.values() for show in theatres.values()]
+            if not shows:
+                continue
+            show = rng.choice(shows)
+            hold = self.timed("hold", service.place_hold, self.user_id, show["show_id"], rng.randint(1, 4))
+            if hold is None:
+                continue
+            if rng.random() < self.args.abandon_rate:
+                self.timed("release", service.release_hold, self.user_id, hold.booking_id)
+                continue
+            ticket_numbers = self.timed("pay", service.confirm_hold, self.user_id, hold.booking_id)
+            self.bookings += 1
+            if ticket_numbers:
+                self.timed("scan", service.lookup_ticket, rng.choice(ticket_numbers))
+            self.timed("reservations", service.fetch_reservations_page, self.user_id)
+            if rng.random() < self.args.cancel_rate:
+                self.timed("cancel", service.cancel_reservation, self.user_id, hold.booking_id)
+
+
+def consistency_checks(service, capacity):
+    with service.db_pool.connection() as con:
+        cursor = con.cursor()
+        cursor.execute("SELECT COUNT(*) FROM showtime WHERE available_seats < 0")
+        negative = cursor.fetchone()[0]
+        # Every seat not counted as available must belong to a live booking
+        cursor.execute("""
+            SELECT COUNT(*) FROM showtime s
+            JOIN theatre t ON t.theatre_id = s.theatre_id
+            LEFT JOIN (SELECT show_id, SUM(ticket_count) AS sold FROM booking
+                       WHERE b_status <> 'cancelled' GROUP BY show_id) b ON b.show_id = s.show_id
+            WHERE s.available_seats + COALESCE(b.sold, 0) <> t.capacity
+        """)
+        mismatched = cursor.fetchone()[0]
+        cursor.execute("""
+            SELECT COUNT(*) FROM (
+                SELECT b.show_id, bs.seat_id FROM booking_seats bs
+                JOIN booking b ON b.booking_id = bs.booking_id
+                WHERE b.b_status <> 'cancelled'
+                GROUP BY b.show_id, bs.seat_id HAVING COUNT(*) > 1
+            ) doubled
+        """)
+        double_booked = cursor.fetchone()[0]
+        # The incrementally maintained summaries must agree with the confirmed bookings
+        cursor.execute("""
+            SELECT COUNT(*) FROM show_stats ss
+            LEFT JOIN (SELECT show_id, COUNT(*) AS bookings, SUM(ticket_count) AS tickets FROM booking
+                       WHERE b_status = 'confirmed' GROUP BY show_id) b ON b.show_id = ss.show_id
+            WHERE ss.bookings <> COALESCE(b.bookings, 0) OR ss.tickets_sold <> COALESCE(b.tickets, 0)
+        """)
+        summary_mismatches = cursor.fetchone()[0]
+        # Bookings confirmed through the booking code carry one ticket per seat (generated ones have none)
+        cursor.execute("""
+            SELECT COUNT(*) FROM booking b
+            JOIN (SELECT booking_id, COUNT(*) AS issued FROM tickets GROUP BY booking_id) t ON t.booking_id = b.booking_id
+            WHERE t.issued <> b.ticket_count
+        """)
+        ticket_mismatches = cursor.fetchone()[0]
+        # ... and one paid payment while confirmed, none once cancelled (it is refunded)
+        cursor.execute("""
+            SELECT COUNT(*) FROM booking b
+            JOIN (SELECT DISTINCT booking_id FROM tickets) t ON t.booking_id = b.booking_id
+            LEFT JOIN (SELECT booking_id, COUNT(*) AS paid FROM payments
+                       WHERE p_status = 'paid' GROUP BY booking_id) p ON p.booking_id = b.booking_id
+            WHERE COALESCE(p.paid, 0) <> CASE WHEN b.b_status = 'confirmed' THEN 1 ELSE 0 END
+        """)
+        payment_mismatches = cursor.fetchone()[0]
+    return {"negative_seat_counts": negative, "seat_count_mismatches": mismatched, "double_booked_seats": double_booked,
+            "summary_mismatches": summary_mismatches, "ticket_count_mismatches": ticket_mismatches,
+            "payment_mismatches": payment_mismatches}
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return None
+
+
+def compare(results, baseline_path):
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    print(f"\ncompared with {baseline_path} ({baseline.get('revision')}):")
+    old, new = baseline["throughput"]["bookings_per_second"], results["throughput"]["bookings_per_second"]
+    print(f"  bookings/s   {old:10.1f} -> {new:10.1f} ({(new - old) / old * 100 if old else 0:+.1f}%)")
+    for operation, stats in results["latency_ms"].items():
+        before = baseline["latency_ms"].get(operation)
+        if before and before["p99"]:
+            print(f"  {operation:<12} p99 {before['p99']:8.2f} -> {stats['p99']:8.2f} ms "
+                  f"({(stats['p99'] - before['p99']) / before['p99'] * 100:+.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Booking path load test")
+    parser.add_argument("--generate", action="store_true", help="wipe DB_NAME and load a synthetic dataset first")
+    parser.add_argument("--force", action="store_true", help="allow --generate on database_project")
+    parser.add_argument("--movies", type=int, default=200)
+    parser.add_argument("--theatres", type=int, default=20)
+    parser.add_argument("--capacity", type=int, default=200)
+    parser.add_argument("--days", type=int, default=14)
+    parser.add_argument("--user-rows", type=int, default=100000)
+    parser.add_argument("--bookings", type=int, default=1000000)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--users", type=int, default=16, help="concurrent simulated customers")
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--abandon-rate", type=float, default=0.1)
+    parser.add_argument("--cancel-rate", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=None)
+    parser.add_argument("--compare", default=None, help="earlier results file to compare against")
+    args = parser.parse_args()
+
+    os.environ.setdefault("DB_POOL_SIZE", str(args.users + 2))
+    import booking_service as service
+
+    if args.users > service.backend.max_connections:
+        parser.error(f"the {service.backend.name} database allows {service.backend.max_connections} connection(s), "
+                     f"so --users {args.users} would not run concurrently; use an SQLite file or MySQL")
+
+    if args.generate:
+        if (service.backend.name == "mysql" and os.getenv("DB_NAME", "database_project") == "database_project"
+                and not args.force):
+            parser.error("--generate wipes the database; set DB_NAME to a scratch database or pass --force")
+        generate(service, args, random.Random(args.seed))
+
+    titles = [movie[0] for movie in service.fetch_movies()]
+    if not titles:
+        parser.error("no movies in the database; run with --generate first")
+
+    stop_at = time.monotonic() + args.duration
+    customers = [Customer(service, args, (i % args.user_rows) + 1, titles, stop_at, args.seed + i)
+                 for i in range(args.users)]
+    service.start_holds()
+    started = time.perf_counter()
+    for customer in customers:
+        customer.start()
+    for customer in customers:
+        customer.join()
+    elapsed = time.perf_counter() - started
+    service.stop_holds()
+
+    latency_ms = {}
+    total_ops = 0
+    for operation in OPERATIONS:
+        values = sorted(v for customer in customers for v in customer.latencies[operation])
+        total_ops += len(values)
+        latency_ms[operation] = {
+            "count": len(values),
+            "errors": sum(customer.errors[operation] for customer in customers),
+            "p50": percentile(values, 0.50) * 1000,
+            "p95": percentile(values, 0.95) * 1000,
+            "p99": percentile(values, 0.99) * 1000,
+            "max": (values[-1] if values else 0.0) * 1000,
+        }
+    bookings = sum(customer.bookings for customer in customers)
+    results = {
+        "revision": git_revision(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+        "throughput": {
+            "seconds": elapsed,
+            "bookings": bookings,
+            "bookings_per_second": bookings / elapsed,
+            "operations_per_second": total_ops / elapsed,
+            "sold_out": sum(customer.sold_out for customer in customers),
+        },
+        "latency_ms": latency_ms,
+        "consistency": consistency_checks(service, args.capacity),
+        "pool": service.db_pool.stats(),
+        "queries": service.query_stats.snapshot(),
+    }
+
+    print(f"{bookings} bookings in {elapsed:.1f}s: {results['throughput']['bookings_per_second']:.1f} bookings/s, "
+          f"{results['throughput']['operations_per_second']:.1f} ops/s")
+    print(f"{'operation':<12} {'count':>8} {'errors':>7} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}  (ms)")
+    for operation, stats in latency_ms.items():
+        print(f"{operation:<12} {stats['count']:>8} {stats['errors']:>7} {stats['p50']:>9.2f} {stats['p95']:>9.2f} "
+              f"{stats['p99']:>9.2f} {stats['max']:>9.2f}")
+    print(f"consistency: {results['consistency']}")
+
+    output = args.output or os.path.join(ROOT, "benchmarks", "results",
+                                         f"booking-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2, default=str)
+    print(f"results written to {output}")
+
+    if args.compare:
+        compare(results, args.compare)
+    service.db_pool.close()
+    return 1 if any(results["consistency"].values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
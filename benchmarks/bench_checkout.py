@@ -0,0 +1,149 @@
+# Compares the two checkout modes: each checkout committed on its own, and
+# concurrent checkouts sharing commits through a GroupCommitter. Threads buy
+# tickets on random upcoming shows (seats, booking, tickets and payment in one
+# transaction), then every booking made is checked against its payment.
+#
+# Runs on a database filled by bench_booking.py --generate, or fills one itself.
+# Commits only cost a log flush on disk, so use MySQL or an SQLite file:
+#   DB_NAME=cinema_bench python benchmarks/bench_checkout.py --threads 32 --duration 20
+#   DB_BACKEND=sqlite SQLITE_PATH=/tmp/bench.db python benchmarks/bench_checkout.py --generate --threads 16
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from bench_booking import generate, percentile  # noqa: E402
+
+MODES = ("direct", "group")
+
+
+def upcoming_shows(service):
+    with service.db_pool.connection() as con:
+        cursor = con.cursor()
+        cursor.execute("SELECT show_id FROM showtime WHERE show_datetime >= NOW() AND available_seats > 0")
+        return [row[0] for row in cursor.fetchall()]
+
+
+def run(service, pool, args, shows, user_ids, seed):
+    from booking import SeatsUnavailable, book_seats
+
+    stop_at = time.monotonic() + args.duration
+    latencies = []
+    booked = []
+    failures = {"sold_out": 0, "errors": 0}
+    lock = threading.Lock()
+    start = threading.Barrier(args.threads)
+    seat_maps = service.seat_maps if args.seats else None
+
+    def buyer(rng):
+        mine, errors, sold_out = [], 0, 0
+        start.wait()
+        while time.monotonic() < stop_at:
+            show_id, count = rng.choice(shows), rng.randint(1, 4)
+
+            def price(cursor, seats_left, show_id=show_id, count=count):
+                return service.price_table.quote(cursor, show_id, count, seats_left)
+
+            started = time.perf_counter()
+            try:
+                booking_id, _, _ = book_seats(pool, rng.choice(user_ids), show_id, count, None, None, seat_maps,
+                                              price=price, payment=("credit_card", None))
+                mine.append(booking_id)
+            except SeatsUnavailable:
+                sold_out += 1
+            except Exception as err:
+                errors += 1
+                if errors == 1:
+                    print(f"error: {err}")
+            latencies.append(time.perf_counter() - started)
+        with lock:
+            booked.extend(mine)
+            failures["sold_out"] += sold_out
+            failures["errors"] += errors
+
+    threads = [threading.Thread(target=buyer, args=(random.Random(seed + i),)) for i in range(args.threads)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    return booked, elapsed, sorted(latencies), failures
+
+
+def payment_mismatches(service, booking_ids):
+    """Bookings among booking_ids without exactly one paid payment of their total."""
+    mismatches = 0
+    with service.db_pool.connection() as con:
+        cursor = con.cursor()
+        for start in range(0, len(booking_ids), 500):
+            chunk = booking_ids[start:start + 500]
+            placeholders = ", ".join(["%s"] * len(chunk))
+            cursor.execute(f"""
+                SELECT COUNT(*) FROM booking b
+                LEFT JOIN (SELECT booking_id, COUNT(*) AS paid, SUM(amount) AS amount FROM payments
+                           WHERE p_status = 'paid' GROUP BY booking_id) p ON p.booking_id = b.booking_id
+                WHERE b.booking_id IN ({placeholders})
+                  AND (b.b_status <> 'confirmed' OR COALESCE(p.paid, 0) <> 1 OR p.amount <> b.total_price)
+            """, chunk)
+            mismatches += cursor.fetchone()[0]
+            cursor.execute(f"SELECT COUNT(*) FROM booking WHERE booking_id IN ({placeholders})", chunk)
+            mismatches += len(chunk) - cursor.fetchone()[0]
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Checkout benchmark: separate commits against group commit")
+    parser.add_argument("--generate", action="store_true", help="wipe the database and load a small synthetic dataset first")
+    parser.add_argument("--force", action="store_true", help="allow --generate on database_project")
+    parser.add_argument("--mode", choices=MODES + ("both",), default="both")
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=15.0, help="seconds per mode")
+    parser.add_argument("--batch", type=int, default=32, help="largest group commit")
+    parser.add_argument("--wait-ms", type=float, default=5.0, help="how long a group commit waits for queued checkouts")
+    parser.add_argument("--seats", action="store_true", help="also assign seats from the seat plan in each checkout")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    os.environ.setdefault("DB_POOL_SIZE", str(args.threads + 2))
+    import booking_service as service
+    from group_commit import GroupCommitter
+
+    if args.generate:
+        if (service.backend.name == "mysql" and os.getenv("DB_NAME", "database_project") == "database_project"
+                and not args.force):
+            parser.error("--generate wipes the database; set DB_NAME to a scratch database or pass --force")
+        generate(service, argparse.Namespace(movies=100, theatres=20, capacity=400, days=14, user_rows=10000,
+                                             bookings=0, batch_size=5000), random.Random(args.seed))
+
+    shows = upcoming_shows(service)
+    if not shows:
+        parser.error("no upcoming shows with free seats; run with --generate first")
+    user_ids = list(range(1, 1001))
+    service.price_table.ensure_loaded(service.db_pool)
+
+    print(f"{args.threads} threads, {args.duration:.0f}s per mode, {len(shows)} shows")
+    print(f"{'mode':<8} {'checkouts':>9} {'per s':>9} {'p50':>8} {'p99':>8} {'commits':>8} {'batch':>6} "
+          f"{'sold out':>8} {'errors':>6} {'unpaid':>6}")
+    failed = False
+    for index, mode in enumerate(MODES if args.mode == "both" else (args.mode,)):
+        committer = GroupCommitter(service.db_pool, args.batch, args.wait_ms / 1000) if mode == "group" else None
+        booked, elapsed, latencies, failures = run(service, committer or service.db_pool, args, shows, user_ids,
+                                                   args.seed + index * args.threads)
+        commits = committer.stats()["commits"] if committer else len(booked)
+        unpaid = payment_mismatches(service, booked)
+        failed = failed or unpaid > 0 or failures["errors"] > 0
+        print(f"{mode:<8} {len(booked):>9} {len(booked) / elapsed:>9.1f} {percentile(latencies, 0.5) * 1000:>6.2f}ms "
+              f"{percentile(latencies, 0.99) * 1000:>6.2f}ms {commits:>8} {len(booked) / commits if commits else 0:>6.1f} "
+              f"{failures['sold_out']:>8} {failures['errors']:>6} {unpaid:>6}")
+
+    service.db_pool.close()
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
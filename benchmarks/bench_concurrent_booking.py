@@ -0,0 +1,97 @@
+# Hammers a single show from many threads through booking.book_seats and
+# checks that no seats were oversold.
+# Usage: python benchmarks/bench_concurrent_booking.py --show-id 1 --user-id 1 --threads 32
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from booking import SeatsUnavailable, book_seats  # noqa: E402
+from booking_service import connect_to_db  # noqa: E402
+from db_pool import ConnectionPool  # noqa: E402
+from seat_map import SeatMapCache  # noqa: E402
+from storage import DatabaseError  # noqa: E402
+
+
+def available_seats(pool, show_id):
+    with pool.connection() as con:
+        cursor = con.cursor()
+        cursor.execute("SELECT available_seats FROM showtime WHERE show_id = %s", (show_id,))
+        return cursor.fetchone()[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent booking stress test")
+    parser.add_argument("--show-id", type=int, required=True)
+    parser.add_argument("--user-id", type=int, required=True)
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--attempts", type=int, default=10, help="booking attempts per thread")
+    parser.add_argument("--tickets", type=int, default=2, help="tickets per booking")
+    parser.add_argument("--keep", action="store_true", help="keep the bookings instead of rolling them back")
+    args = parser.parse_args()
+
+    pool = ConnectionPool(connect_to_db, size=args.threads)
+    seat_maps = SeatMapCache()
+    seats_before = available_seats(pool, args.show_id)
+
+    booked = []
+    rejected = []
+    errors = []
+    lock = threading.Lock()
+    start = threading.Barrier(args.threads)
+
+    def buyer():
+        start.wait()
+        for _ in range(args.attempts):
+            try:
+                booking_id, _, _ = book_seats(pool, args.user_id, args.show_id, args.tickets, 0, 0, seat_maps)
+                with lock:
+                    booked.append(booking_id)
+            except SeatsUnavailable:
+                with lock:
+                    rejected.append(1)
+            except DatabaseError as err:
+                with lock:
+                    errors.append(err)
+
+    threads = [threading.Thread(target=buyer) for _ in range(args.threads)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    seats_after = available_seats(pool, args.show_id)
+    sold = len(booked) * args.tickets
+    oversold = sold > seats_before or seats_after < 0 or seats_before - seats_after != sold
+
+    print(f"seats before/after:  {seats_before} / {seats_after}")
+    print(f"bookings:            {len(booked)} ok, {len(rejected)} sold out, {len(errors)} errors")
+    print(f"tickets sold:        {sold}")
+    print(f"throughput:          {len(booked) / elapsed:.1f} bookings/s ({elapsed:.2f}s)")
+    print(f"pool:                {pool.stats()}")
+    for err in errors[:5]:
+        print(f"error: {err}")
+    print("OVERSOLD" if oversold else "no oversell")
+
+    if not args.keep and booked:
+        with pool.connection() as con:
+            cursor = con.cursor()
+            placeholders = ", ".join(["%s"] * len(booked))
+            cursor.execute(f"DELETE FROM tickets WHERE booking_id IN ({placeholders})", booked)
+            cursor.execute(f"DELETE FROM booking_seats WHERE booking_id IN ({placeholders})", booked)
+            cursor.execute(f"DELETE FROM booking WHERE booking_id IN ({placeholders})", booked)
+            cursor.execute("UPDATE showtime SET available_seats = available_seats + %s WHERE show_id = %s",
+                           (sold, args.show_id))
+            con.commit()
+
+    pool.close()
+    return 1 if oversold else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
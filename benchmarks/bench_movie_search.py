@@ -0,0 +1,135 @@
+# Measures build time, memory and query latency of the movie search index on a
+# synthetic catalog, and checks every query against a brute-force scan; needs no database.
+# Usage: python benchmarks/bench_movie_search.py --movies 100000 --queries 2000
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+from datetime import date
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from movie_search import MovieIndex, _rank_key, tokenize  # noqa: E402
+
+WORDS = ("star", "night", "storm", "king", "queen", "dark", "light", "river", "city", "ghost", "winter", "summer",
+         "last", "first", "lost", "secret", "iron", "golden", "silent", "wild", "broken", "hidden", "red", "blue",
+         "shadow", "fire", "ice", "dream", "empire", "journey", "return", "legend", "ocean", "mountain", "garden",
+         "stranger", "kingdom", "machine", "planet", "heart", "war", "love", "road", "house", "island", "moon")
+GENRES = ("Action", "Drama", "Comedy", "Horror", "Animation", "Musical", "Sci-Fi", "Thriller", "Romance", "Documentary")
+# Names are built from syllables, giving a vocabulary of some thousands of first and last names
+SYLLABLES = ("an", "be", "ca", "da", "el", "fe", "ga", "ha", "in", "jo", "ke", "la", "me", "no", "or",
+             "pa", "ri", "sa", "ta", "ur", "va", "ye", "zo", "mi", "lu", "ro", "si", "te", "mar", "son")
+
+
+def name(rng, syllables):
+    return "".join(rng.choice(SYLLABLES) for _ in range(syllables)).title()
+
+
+def synthetic_movies(count, rng):
+    for movie_id in range(1, count + 1):
+        title = " ".join(rng.sample(WORDS, rng.randint(1, 3))).title() + f" {movie_id}"
+        people = lambda n: ", ".join(f"{name(rng, 2)} {name(rng, 3)}" for _ in range(n))
+        rating = Decimal(rng.randint(10, 95)) / 10 if rng.random() > 0.05 else None
+        yield (movie_id, title, rng.choice(GENRES), rng.randint(80, 180), date(2000 + movie_id % 25, 1, 1),
+               rating, people(1), people(3))
+
+
+def brute_force(rows, text, genre, min_rating, limit):
+    prefixes = tokenize(text)
+    matches = []
+    for row in rows.values():
+        words = tokenize(" ".join(str(value) for value in (row[1], row[2], row[6], row[7]) if value))
+        if not all(any(word.startswith(prefix) for word in words) for prefix in prefixes):
+            continue
+        if genre and (row[2] or "").casefold() != genre.casefold():
+            continue
+        if min_rating is not None and (row[5] or 0) < min_rating:
+            continue
+        matches.append(row)
+    return sorted(matches, key=_rank_key)[:limit]
+
+
+def random_query(rng, rows):
+    kind = rng.choice(("typeahead", "typeahead", "two_words", "person", "genre", "rating", "combined"))
+    text, genre, min_rating = "", None, None
+    if kind in ("typeahead", "two_words", "combined"):
+        word = rng.choice(WORDS)
+        text = word[:rng.randint(1, len(word))]
+        if kind == "two_words":
+            text = f"{rng.choice(WORDS)} {text}"
+    elif kind == "person":
+        person = rng.choice(list(rows.values()))[7].split(", ")[0]
+        text = person[:rng.randint(3, len(person))]
+    if kind in ("genre", "combined"):
+        genre = rng.choice(GENRES)
+    if kind in ("rating", "combined"):
+        min_rating = rng.choice((5, 7, 8, 9))
+    return kind, text, genre, min_rating
+
+
+def percentiles(values):
+    values = sorted(values)
+    return {name: values[min(len(values) - 1, int(len(values) * q))] * 1e6 for name, q in (("p50", 0.5), ("p99", 0.99))}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Movie search index benchmark")
+    parser.add_argument("--movies", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--updates", type=int, default=1000)
+    parser.add_argument("--verify", type=int, default=200, help="queries checked against a brute-force scan")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    movies = list(synthetic_movies(args.movies, rng))
+    tracemalloc.start()
+    started = time.perf_counter()
+    index = MovieIndex()
+    index.load(movies)
+    build_seconds = time.perf_counter() - started
+    index_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(f"catalog:     {len(index)} movies")
+    print(f"build:       {build_seconds:.2f}s, {index_bytes / 2**20:.1f} MiB traced")
+
+    rows = {row[0]: row for row in movies}
+    queries = [random_query(rng, rows) for _ in range(args.queries)]
+    timings = {}
+    for kind, text, genre, min_rating in queries:
+        started = time.perf_counter()
+        index.search(text, genre, min_rating, args.limit)
+        timings.setdefault(kind, []).append(time.perf_counter() - started)
+    everything = [seconds for values in timings.values() for seconds in values]
+    print(f"{'query':<12} {'count':>6} {'p50 us':>9} {'p99 us':>9}")
+    for kind, values in sorted(timings.items()) + [("all", everything)]:
+        stats = percentiles(values)
+        print(f"{kind:<12} {len(values):>6} {stats['p50']:>9.1f} {stats['p99']:>9.1f}")
+
+    update_timings = []
+    for _ in range(args.updates):
+        movie_id = rng.randint(1, args.movies)
+        row = next(synthetic_movies(1, rng))
+        row = (movie_id,) + row[1:]
+        started = time.perf_counter()
+        index.update(row)
+        update_timings.append(time.perf_counter() - started)
+        rows[movie_id] = row
+    stats = percentiles(update_timings)
+    print(f"update:      p50 {stats['p50']:.1f} us, p99 {stats['p99']:.1f} us")
+
+    mismatches = 0
+    for kind, text, genre, min_rating in queries[:args.verify]:
+        if index.search(text, genre, min_rating, args.limit) != brute_force(rows, text, genre, min_rating, args.limit):
+            mismatches += 1
+            print(f"MISMATCH: {kind} {text!r} genre={genre} min_rating={min_rating}")
+    print(f"verified:    {min(args.verify, len(queries))} queries, {mismatches} mismatches")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,96 @@
+# Measures building the ticket price table for a large number of shows and
+# quoting from it, and checks the table against pricing each show on its own.
+# Synthetic shows need no database; --database also times loading the table
+# from the configured database (e.g. one filled by bench_booking.py --generate).
+# Usage: python benchmarks/bench_pricing.py --shows 300000
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from pricing import PriceTable, show_price  # noqa: E402
+
+BASE_PRICES = tuple(Decimal(price) for price in ("0.00", "12.50", "15.00", "18.00", "20.00", "22.50"))
+THEATRE_TYPES = (("STANDARD", Decimal("0.00")), ("VIP", None), ("VIP", Decimal("7.50")), ("IMAX", None), ("3D", None))
+
+
+def synthetic_shows(count, theatres, rng):
+    halls = [(rng.choice(THEATRE_TYPES), rng.choice((80, 120, 200, 350))) for _ in range(theatres)]
+    first = datetime.now().replace(minute=0, second=0, microsecond=0)
+    for show_id in range(1, count + 1):
+        (theatre_type, extra), capacity = halls[show_id % theatres]
+        show_datetime = first + timedelta(days=rng.randint(0, 89), hours=rng.randint(10, 23), minutes=rng.choice((0, 15, 30, 45)))
+        yield show_id, show_datetime, rng.choice(BASE_PRICES), theatre_type, extra, capacity
+
+
+def percentiles(values):
+    values = sorted(values)
+    return {name: values[min(len(values) - 1, int(len(values) * q))] * 1e6 for name, q in (("p50", 0.5), ("p99", 0.99))}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ticket price table benchmark")
+    parser.add_argument("--shows", type=int, default=300000)
+    parser.add_argument("--theatres", type=int, default=200)
+    parser.add_argument("--quotes", type=int, default=100000)
+    parser.add_argument("--verify", type=int, default=20000, help="shows checked against pricing them one by one")
+    parser.add_argument("--database", action="store_true", help="also time loading the table from the database")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+    shows = list(synthetic_shows(args.shows, args.theatres, rng))
+
+    started = time.perf_counter()
+    one_by_one = [show_price(*show[1:5]) for show in shows]
+    naive_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    table = PriceTable()
+    table.load(shows)
+    build_seconds = time.perf_counter() - started
+    # Measured on a second build, as tracing slows allocation down
+    tracemalloc.start()
+    PriceTable().load(shows)
+    table_bytes = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"shows:        {len(table)}")
+    print(f"one by one:   {naive_seconds:.2f}s")
+    print(f"table build:  {build_seconds:.2f}s, {table_bytes / 2**20:.1f} MiB peak")
+
+    timings = []
+    for _ in range(args.quotes):
+        show = shows[rng.randrange(len(shows))]
+        seats_left = rng.randint(0, show[5])
+        started = time.perf_counter()
+        table.quote(None, show[0], rng.randint(1, 6), seats_left)
+        timings.append(time.perf_counter() - started)
+    stats = percentiles(timings)
+    print(f"quote:        p50 {stats['p50']:.1f} us, p99 {stats['p99']:.1f} us")
+
+    mismatches = 0
+    for index in rng.sample(range(len(shows)), min(args.verify, len(shows))):
+        if table.quote(None, shows[index][0], 1, shows[index][5]) != one_by_one[index]:
+            mismatches += 1
+    print(f"verified:     {min(args.verify, len(shows))} shows, {mismatches} mismatches")
+
+    if args.database:
+        from booking_service import db_pool
+
+        try:
+            table = PriceTable()
+            started = time.perf_counter()
+            table.ensure_loaded(db_pool)
+            print(f"database:     {len(table)} upcoming shows loaded in {time.perf_counter() - started:.2f}s")
+        finally:
+            db_pool.close()
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,74 @@
+# Measures seat map memory footprint and best-available latency on synthetic
+# auditoriums; needs no database.
+# Usage: python benchmarks/bench_seat_map.py --shows 5000 --rows 40 --cols 60
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from seat_map import SeatMap, SeatMapCache, TheatreLayout  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Seat map benchmark")
+    parser.add_argument("--shows", type=int, default=5000)
+    parser.add_argument("--theatres", type=int, default=20)
+    parser.add_argument("--rows", type=int, default=40)
+    parser.add_argument("--cols", type=int, default=60)
+    parser.add_argument("--occupancy", type=float, default=0.7)
+    parser.add_argument("--tickets", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    seats_per_theatre = args.rows * args.cols
+    # Occupancy patterns are generated before tracing so only the seat maps themselves are measured
+    patterns = []
+    for _ in range(min(args.shows, 200)):
+        taken = 0
+        for index in rng.sample(range(seats_per_theatre), int(seats_per_theatre * args.occupancy)):
+            taken |= 1 << index
+        patterns.append(taken)
+
+    tracemalloc.start()
+    cache = SeatMapCache(row_width=args.cols)
+    layouts = []
+    for theatre_id in range(args.theatres):
+        first = theatre_id * seats_per_theatre
+        seats = [(first + i + 1, str(i + 1)) for i in range(seats_per_theatre)]
+        layout = TheatreLayout(theatre_id, seats, args.cols)
+        cache._layouts[theatre_id] = layout
+        layouts.append(layout)
+    layouts_bytes = tracemalloc.get_traced_memory()[0]
+
+    for show_id in range(args.shows):
+        # Shift back and forth to get a private copy of the shared pattern
+        taken = (patterns[show_id % len(patterns)] << 1) >> 1
+        cache._maps[show_id] = SeatMap(layouts[show_id % args.theatres], taken)
+    total_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    timings = []
+    for show_id in range(args.shows):
+        seat_map = cache.get(show_id)
+        started = time.perf_counter()
+        seat_map.best_available(args.tickets)
+        timings.append(time.perf_counter() - started)
+    timings.sort()
+
+    print(f"auditorium:          {args.rows} x {args.cols} seats, {args.theatres} theatres")
+    print(f"shows:               {args.shows} at {args.occupancy:.0%} occupancy")
+    print(f"layouts (traced):    {layouts_bytes / 1024:.1f} KiB")
+    print(f"seat maps (traced):  {(total_bytes - layouts_bytes) / 1024:.1f} KiB "
+          f"({(total_bytes - layouts_bytes) / args.shows:.0f} B/show)")
+    print(f"footprint():         {cache.footprint() / 1024:.1f} KiB")
+    print(f"best_available({args.tickets}):   p50 {timings[len(timings) // 2] * 1e6:.1f} us, "
+          f"p99 {timings[int(len(timings) * 0.99)] * 1e6:.1f} us, max {timings[-1] * 1e6:.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+# Measures how long `import demo` takes and how long the app needs to draw its
+# first frame, and fails if either exceeds its budget or if importing demo
+# loads a heavy dependency (database driver, PIL, dotenv).
+# Usage: python benchmarks/bench_startup.py --runs 5 --max-import-ms 150 --max-first-frame-ms 1000
+# The first-frame measurement needs a display and is skipped without one.
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+HEAVY_MODULES = ("mysql.connector", "PIL", "dotenv", "booking_service", "storage")
+
+IMPORT_PROBE = f"""
+import sys, time, json
+started = time.perf_counter()
+import demo
+elapsed = time.perf_counter() - started
+print(json.dumps({{"seconds": elapsed, "heavy": [m for m in {HEAVY_MODULES!r} if m in sys.modules]}}))
+"""
+
+
+def measure_import():
+    output = subprocess.run([sys.executable, "-c", IMPORT_PROBE], cwd=ROOT, capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def measure_first_frame():
+    env = dict(os.environ, STARTUP_T0=repr(time.time()))
+    result = subprocess.run([sys.executable, "demo.py", "--first-frame-probe"], cwd=ROOT, env=env,
+                            capture_output=True, text=True, timeout=60)
+    for line in result.stdout.splitlines():
+        if line.startswith("first_frame "):
+            return float(line.split()[1])
+    raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "no first frame reported")
+
+
+def summary(values):
+    return {"median_ms": statistics.median(values) * 1000, "max_ms": max(values) * 1000}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Startup time benchmark for demo.py")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-import-ms", type=float, default=150.0)
+    parser.add_argument("--max-first-frame-ms", type=float, default=1000.0)
+    parser.add_argument("--output", help="write the results as JSON")
+    args = parser.parse_args()
+
+    failures = []
+    imports = [measure_import() for _ in range(args.runs)]
+    results = {"import": summary([run["seconds"] for run in imports])}
+    heavy = sorted({module for run in imports for module in run["heavy"]})
+    results["import"]["heavy_modules"] = heavy
+    print(f"import demo:  median {results['import']['median_ms']:.1f} ms, max {results['import']['max_ms']:.1f} ms")
+    if heavy:
+        failures.append(f"importing demo loads {', '.join(heavy)}")
+    if results["import"]["median_ms"] > args.max_import_ms:
+        failures.append(f"import takes {results['import']['median_ms']:.1f} ms (budget {args.max_import_ms:.0f} ms)")
+
+    try:
+        frames = [measure_first_frame() for _ in range(args.runs)]
+    except (RuntimeError, subprocess.TimeoutExpired) as err:
+        print(f"first frame:  skipped ({err})")
+        results["first_frame"] = None
+    else:
+        results["first_frame"] = summary(frames)
+        print(f"first frame:  median {results['first_frame']['median_ms']:.1f} ms, max {results['first_frame']['max_ms']:.1f} ms")
+        if results["first_frame"]["median_ms"] > args.max_first_frame_ms:
+            failures.append(f"first frame takes {results['first_frame']['median_ms']:.1f} ms "
+                            f"(budget {args.max_first_frame_ms:.0f} ms)")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
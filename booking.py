@@ -0,0 +1,101 @@
+import random
+import time
+
+from analytics import record_booking
+from payments import record_payment
+from seat_map import allocate_seats, save_booking_seats
+from storage import DatabaseError, backend
+from tickets import issue_tickets
+
+
+class SeatsUnavailable(Exception):
+    pass
+
+
+def run_in_transaction(pool, work, retries=5, backoff=0.05):
+    """Runs work(cursor) in one transaction, retrying on deadlock/lock wait timeout (or a locked SQLite database).
+
+    The transaction is committed if work returns normally and rolled back
+    (by the pool) if it raises.
+    """
+    attempt = 0
+    while True:
+        try:
+            with pool.connection() as con:
+                cursor = con.cursor()
+                result = work(cursor)
+                con.commit()
+                return result
+        except DatabaseError as err:
+            if not backend.is_retryable(err) or attempt >= retries:
+                raise
+            # Exponential backoff with jitter so competing buyers don't collide again
+            time.sleep(backoff * (2 ** attempt) * (0.5 + random.random()))
+            attempt += 1
+
+
+def book_seats(pool, user_id, show_id, ticket_count, total_price, extra_price, seat_maps=None, status="confirmed",
+               price=None, payment=None):
+    """Decrements the show's seats and inserts the booking atomically.
+
+    When a SeatMapCache is given, the best available seats are assigned and
+    stored in booking_seats within the same transaction. A confirmed
+    booking gets its tickets issued in it as well, and is paid in it when
+    `payment` is a (payment_method, transaction_id) pair. When `price` is
+    given, it is called as price(cursor, seats_left) with the seats the
+    show had before this booking and returns the (total_price, extra_price)
+    stored instead of the ones passed in. `pool` may be a GroupCommitter.
+    Returns (booking_id, seat_numbers, ticket_numbers), or raises
+    SeatsUnavailable when the show does not have ticket_count seats left.
+    """
+    def work(cursor):
+        # The row lock taken by this UPDATE serialises concurrent buyers of the same show
+        cursor.execute("""
+            UPDATE showtime
+            SET available_seats = available_seats - %s
+            WHERE show_id = %s AND available_seats >= %s
+        """, (ticket_count, show_id, ticket_count))
+        if cursor.rowcount != 1:
+            cursor.execute("SELECT available_seats FROM showtime WHERE show_id = %s", (show_id,))
+            row = cursor.fetchone()
+            if not row:
+                raise SeatsUnavailable("No matching show found for the selected criteria.")
+            raise SeatsUnavailable(f"Not enough seats available. Only {row[0]} seats left.")
+
+        total, extra = total_price, extra_price
+        seats_left = None
+        if price is not None or seat_maps is not None:
+            # The show row is locked by the UPDATE above, so the count cannot move under the quote or the seat map
+            cursor.execute("SELECT available_seats FROM showtime WHERE show_id = %s", (show_id,))
+            seats_left = cursor.fetchone()[0] + ticket_count
+        if price is not None:
+            total, extra = price(cursor, seats_left)
+
+        seats = []
+        if seat_maps is not None:
+            seats = allocate_seats(cursor, seat_maps, show_id, ticket_count, seats_left)
+            if seats is None:
+                raise SeatsUnavailable("Not enough free seats left in the seat plan.")
+
+        cursor.execute("""
+            INSERT INTO booking (user_id, seat_id, show_id, booking_date, total_price, extra_price, ticket_count, b_status)
+            VALUES (%s, %s, %s, NOW(), %s, %s, %s, %s)
+        """, (user_id, seats[0][0] if seats else None, show_id, total, extra, ticket_count, status))
+        booking_id = cursor.lastrowid
+        if seats:
+            save_booking_seats(cursor, booking_id, seats)
+        ticket_numbers = []
+        if status == "confirmed":
+            record_booking(cursor, show_id, 1, ticket_count, total)
+            ticket_numbers = issue_tickets(cursor, booking_id, show_id, ticket_count, seats)
+            if payment is not None:
+                record_payment(cursor, booking_id, total, *payment)
+        return booking_id, [seat_number for _, seat_number in seats], ticket_numbers
+
+    try:
+        return run_in_transaction(pool, work)
+    except Exception:
+        # Seats may have been marked in the cached map of a rolled back transaction
+        if seat_maps is not None:
+            seat_maps.invalidate(show_id)
+        raise
@@ -0,0 +1,799 @@
+"""Booking core shared by the Tk client and the HTTP API; no GUI dependencies."""
+import heapq
+import itertools
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+from analytics import fetch_dashboard as _fetch_dashboard, occupancy, record_booking
+from archive import DEFAULT_BATCH_SIZE as DEFAULT_ARCHIVE_BATCH, add_partitions, archive_shows
+from booking import SeatsUnavailable, book_seats, run_in_transaction
+from catalog_cache import CATALOG, CatalogCache, bump_version
+from db_pool import ConnectionPool
+from db_router import ReplicaRouter
+from group_commit import GroupCommitter
+from movie_search import LOAD_QUERY as MOVIE_ROW_QUERY, MovieIndex
+from payments import PAYMENT_METHODS, refund_payments
+from pricing import PriceTable
+from query_stats import QueryStats
+from seat_holds import HoldExpired, HoldStore
+from seat_map import SeatMapCache
+from sharding import Shard, ShardSet, copy_rows, delete_rows, parse_shards
+from storage import DatabaseError, backend
+from tickets import ARCHIVED_TICKET_QUERY, TICKET_QUERY, find_ticket
+
+def connect_to_db():
+    return backend.connect()
+
+query_stats = QueryStats(
+    slow_threshold=float(os.getenv("SLOW_QUERY_MS", "500")) / 1000,
+    slow_log_path=os.getenv("SLOW_QUERY_LOG", os.path.join(os.path.dirname(os.path.abspath(__file__)), "slow_queries.log")),
+)
+
+def _pool(connect):
+    # Pooled connections are traced so every statement shows up in query_stats
+    return ConnectionPool(
+        lambda: query_stats.traced(connect()),
+        size=min(int(os.getenv("DB_POOL_SIZE", "5")), backend.max_connections),
+        timeout=float(os.getenv("DB_POOL_TIMEOUT", "10")),
+        idle_timeout=float(os.getenv("DB_POOL_IDLE_TIMEOUT", "300")),
+        on_wait=query_stats.record_wait,
+    )
+
+# All data access goes through this pool instead of opening a connection per call
+db_pool = _pool(connect_to_db)
+
+# Reads that may lag the primary slightly (catalog, schedules, reservations) go through read_router,
+# to the DB_REPLICAS in turn; a user's reads stay on the primary for REPLICA_PIN_SECONDS after they book
+read_router = ReplicaRouter(
+    db_pool,
+    [_pool(lambda address=address: backend.connect_replica(address))
+     for address in (part.strip() for part in os.getenv("DB_REPLICAS", "").split(",")) if address],
+    pin_seconds=float(os.getenv("REPLICA_PIN_SECONDS", "5")),
+)
+
+def _cinema(index, name, address):
+    if not address:
+        return Shard(index, name, address, db_pool, read_router)
+    pool = _pool(lambda: backend.connect_shard(address))
+    return Shard(index, name, address, pool, ReplicaRouter(pool))
+
+# The cinemas of DB_SHARDS (see sharding.py), or the main database as the only one;
+# show- and booking-scoped work goes to shards.for_id(id), reads spanning cinemas to all of them
+shards = ShardSet(_cinema(index, name, address)
+                  for index, (name, address) in enumerate(parse_shards(os.getenv("DB_SHARDS", "")) or [("main", "")]))
+# Catalog reads, pinned to the primary for a while after this process changes the catalog
+catalog_reads = read_router.reader(CATALOG)
+
+movie_index = MovieIndex()
+catalog_cache = CatalogCache(
+    ttl=float(os.getenv("CATALOG_CACHE_TTL", "300")),
+    max_entries=int(os.getenv("CATALOG_CACHE_SIZE", "1024")),
+    check_interval=float(os.getenv("CATALOG_VERSION_CHECK", "2")),
+)
+# A catalog changed by another process makes the search index reload too
+catalog_cache.on_change(movie_index.invalidate)
+price_table = PriceTable(max_age=float(os.getenv("PRICE_TABLE_MAX_AGE", "900")))
+seat_maps = SeatMapCache(row_width=int(os.getenv("SEAT_ROW_WIDTH", "10")))
+# Checkouts (paying for a hold, or booking and paying at once) commit through the shard's checkout pool;
+# GROUP_COMMIT_MS > 0 lets concurrent checkouts share commits, waiting up to that long for each other
+group_commit_wait = float(os.getenv("GROUP_COMMIT_MS", "0")) / 1000
+group_committers = [GroupCommitter(shard.pool, max_batch=int(os.getenv("GROUP_COMMIT_BATCH", "32")),
+                                   max_wait=group_commit_wait) if group_commit_wait > 0 else None
+                    for shard in shards]
+checkout_pools = [committer or shard.pool for committer, shard in zip(group_committers, shards)]
+# One hold store per cinema, indexed like shards
+hold_stores = [HoldStore(shard.pool, seat_maps, ttl=int(os.getenv("SEAT_HOLD_TTL", "600")),
+                         checkout_pool=checkout_pools[shard.index])
+               for shard in shards]
+
+
+class BookingError(Exception):
+    pass
+
+
+def _shard(row_id, what):
+    try:
+        return shards.for_id(row_id)
+    except (KeyError, TypeError, ValueError):
+        raise BookingError(f"{what} not found.")
+
+
+def start_holds():
+    for store in hold_stores:
+        store.start()
+
+def stop_holds():
+    for store in hold_stores:
+        store.stop()
+
+def recover_holds():
+    """Re-arms the timers of pending holds in every cinema; returns how many."""
+    return sum(store.recover() for store in hold_stores)
+
+def _sum_stats(stats):
+    totals = {}
+    for entry in stats:
+        for key, value in entry.items():
+            totals[key] = totals.get(key, 0) + value
+    return totals
+
+def hold_stats():
+    """Seat hold counters summed over the cinemas."""
+    stats = _sum_stats(store.stats() for store in hold_stores)
+    finished = stats["converted"] + stats["expired"] + stats["released"]
+    stats["conversion_rate"] = stats["converted"] / finished if finished else 0.0
+    return stats
+
+def group_commit_stats():
+    """Group commit counters summed over the cinemas, or None when group commit is off."""
+    committers = [committer for committer in group_committers if committer is not None]
+    if not committers:
+        return None
+    stats = _sum_stats(committer.stats() for committer in committers)
+    stats["avg_batch"] = stats["transactions"] / stats["commits"] if stats["commits"] else 0.0
+    stats["largest_batch"] = max(committer.stats()["largest_batch"] for committer in committers)
+    return stats
+
+
+def metrics_text():
+    """Query, pool, seat hold, catalog cache, read routing and group commit metrics in Prometheus text format."""
+    gauges = [(f"cinema_pool_{key}", f"Connection pool {key.replace('_', ' ')}.", value)
+              for key, value in db_pool.stats().items()]
+    gauges += [("cinema_shards", "Cinema databases.", len(shards))]
+    gauges += [(f"cinema_shard_pool_{key}", f"Cinema database pools {key.replace('_', ' ')}, summed.", value)
+               for key, value in _sum_stats(shard.pool.stats() for shard in shards.copies()).items()
+               if key in ("size", "in_use", "idle", "checkouts", "waits", "total_wait_time")]
+    gauges += [(f"cinema_holds_{key}", f"Seat holds {key.replace('_', ' ')}.", value)
+               for key, value in hold_stats().items()]
+    gauges += [(f"cinema_catalog_cache_{key}", f"Catalog cache {key}.", value)
+               for key, value in catalog_cache.stats().items()]
+    gauges += [(f"cinema_reads_{key}", f"Read routing {key.replace('_', ' ')}.", value)
+               for key, value in read_router.stats().items()]
+    committed = group_commit_stats()
+    if committed is not None:
+        gauges += [(f"cinema_group_commit_{key}", f"Group commit {key.replace('_', ' ')}.", value)
+                   for key, value in committed.items()]
+    return query_stats.prometheus(gauges)
+
+
+def write_metrics(path=None):
+    path = path or os.getenv("METRICS_FILE", "metrics.prom")
+    temporary = path + ".tmp"
+    with open(temporary, "w", encoding="utf-8") as f:
+        f.write(metrics_text())
+    os.replace(temporary, path)
+    return path
+
+
+def start_archiving():
+    """Archives the bookings of shows older than ARCHIVE_AFTER_DAYS every ARCHIVE_INTERVAL seconds.
+
+    Does nothing unless ARCHIVE_AFTER_DAYS is set; returns the stop event
+    of the background thread, or None. Run it in one process only.
+    """
+    days = float(os.getenv("ARCHIVE_AFTER_DAYS") or 0)
+    if days <= 0:
+        return None
+    interval = float(os.getenv("ARCHIVE_INTERVAL", "3600"))
+    batch_size = int(os.getenv("ARCHIVE_BATCH", str(DEFAULT_ARCHIVE_BATCH)))
+    stop = threading.Event()
+
+    def run():
+        while True:
+            for shard in shards:
+                try:
+                    add_partitions(shard.pool)
+                    archive_shows(shard.pool, datetime.now() - timedelta(days=days), batch_size, stop=stop)
+                except DatabaseError as err:
+                    print(f"Archive error: {err}")
+            if stop.wait(interval):
+                return
+
+    threading.Thread(target=run, name="booking-archive", daemon=True).start()
+    return stop
+
+
+def start_metrics_export():
+    """Rewrites METRICS_FILE every METRICS_INTERVAL seconds when METRICS_FILE is set."""
+    if not os.getenv("METRICS_FILE"):
+        return None
+    interval = float(os.getenv("METRICS_INTERVAL", "15"))
+    stop = threading.Event()
+
+    def run():
+        while not stop.wait(interval):
+            try:
+                write_metrics()
+            except OSError as err:
+                print(f"Metrics export error: {err}")
+
+    threading.Thread(target=run, name="metrics-export", daemon=True).start()
+    return stop
+
+
+# Catalog reads are served from catalog_cache; the returned lists are shared, callers must not modify them
+def fetch_movies():
+    def load():
+        with catalog_reads.connection() as con:
+            cursor = con.cursor()
+            query = "SELECT title, duration, genre, release_date FROM movies"
+            cursor.execute(query)
+            return cursor.fetchall()
+
+    try:
+        return catalog_cache.get(catalog_reads, ("movies",), load)
+    except DatabaseError as err:
+        print(f"Database error: {err}")
+        return []
+
+def search_movies(text="", genre=None, min_rating=None, limit=50):
+    """Movies matching the typed prefix and filters, best rated first, shaped like fetch_movies rows.
+
+    Served from movie_index, which is loaded from the database on first use
+    and reloaded when another process changes the catalog.
+    """
+    catalog_cache.check(catalog_reads)
+    movie_index.ensure_loaded(catalog_reads)
+    return [(title, duration, movie_genre, release_date)
+            for _, title, movie_genre, duration, release_date, *_ in movie_index.search(text, genre, min_rating, limit)]
+
+def fetch_genres():
+    catalog_cache.check(catalog_reads)
+    movie_index.ensure_loaded(catalog_reads)
+    return movie_index.genres()
+
+def fetch_movie_details(title):
+    def load():
+        with catalog_reads.connection() as con:
+            cursor = con.cursor()
+            query = """
+                SELECT title, genre, duration, director, actors, rating, release_date
+                FROM movies
+                WHERE title = %s
+            """
+            cursor.execute(query, (title,))
+            return cursor.fetchone()
+
+    try:
+        return catalog_cache.get(catalog_reads, ("details", title), load)
+    except DatabaseError as err:
+        print(f"Database error: {err}")
+        return None
+
+def _theatre_label(shard, theatre_name):
+    return shards.label(shard, theatre_name)
+
+def fetch_movies_with_availability():
+    """Every movie with its upcoming shows across the cinemas, soonest next show first.
+
+    Rows are (title, duration, genre, release_date, upcoming_shows,
+    available_seats, next_show); movies without upcoming shows come last,
+    by title, with 0, 0 and None.
+    """
+    def movies():
+        with catalog_reads.connection() as con:
+            cursor = con.cursor()
+            cursor.execute("SELECT movie_id, title, duration, genre, release_date FROM movies")
+            return cursor.fetchall()
+
+    def upcoming(shard):
+        with shard.reads.connection() as con:
+            cursor = con.cursor()
+            cursor.execute("""
+                SELECT movie_id, COUNT(*), COALESCE(SUM(available_seats), 0), MIN(show_datetime)
+                FROM showtime
+                WHERE show_datetime >= NOW()
+                GROUP BY movie_id
+            """)
+            return cursor.fetchall()
+
+    try:
+        catalog = catalog_cache.get(catalog_reads, ("movie_rows",), movies)
+        per_shard = shards.scatter(upcoming)
+    except DatabaseError as err:
+        print(f"Database error: {err}")
+        return []
+
+    availability = {}
+    for rows in per_shard:
+        for movie_id, show_count, seats, next_show in rows:
+            # SQLite hands back MIN() of a DATETIME column as text
+            next_show = datetime.fromisoformat(next_show) if isinstance(next_show, str) else next_show
+            shows, total, soonest = availability.get(movie_id, (0, 0, None))
+            availability[movie_id] = (shows + show_count, total + int(seats),
+                                      next_show if soonest is None or next_show < soonest else soonest)
+    rows = [(title, duration, genre, release_date) + availability.get(movie_id, (0, 0, None))
+            for movie_id, title, duration, genre, release_date in catalog]
+    rows.sort(key=lambda row: (row[6] is None, row[6] or datetime.min, row[0] or ""))
+    return rows
+
+
+# migrations/check_showtime_plans.py checks that this keeps using idx_movie_show_datetime
+SCHEDULE_QUERY = """
+    SELECT s.show_id, s.show_datetime, t.theatre_name, s.available_seats, s.base_price
+    FROM showtime s
+    JOIN movies m ON s.movie_id = m.movie_id
+    JOIN theatre t ON s.theatre_id = t.theatre_id
+    WHERE m.title = %s AND s.show_datetime >= NOW()
+    ORDER BY s.show_datetime, t.theatre_name
+"""
+
+
+# Loads every upcoming show of a movie, one query per cinema, as {date: {time: {theatre_name: show}}};
+# "price" is what one ticket costs right now
+def fetch_schedule_for_movie(title):
+    def upcoming(shard):
+        with shard.reads.connection() as con:
+            cursor = con.cursor()
+            cursor.execute(SCHEDULE_QUERY, (title,))
+            return [(show_id, show_datetime, _theatre_label(shard, theatre_name), available_seats, base_price,
+                     price_table.unit_price(cursor, show_id, available_seats))
+                    for show_id, show_datetime, theatre_name, available_seats, base_price in cursor.fetchall()]
+
+    try:
+        price_table.ensure_loaded(*(shard.reads for shard in shards))
+        shows = shards.gather(upcoming, key=lambda show: (show[1], show[2]))
+    except DatabaseError as err:
+        print(f"Database error: {err}")
+        return {}
+
+    schedule = {}
+    for show_id, show_datetime, theatre_name, available_seats, base_price, price in shows:
+        date = show_datetime.strftime('%Y-%m-%d')
+        time = show_datetime.strftime('%H:%M:%S')
+        schedule.setdefault(date, {}).setdefault(time, {})[theatre_name] = {
+            "show_id": show_id,
+            "show_datetime": show_datetime,
+            "theatre_name": theatre_name,
+            "available_seats": available_seats,
+            "base_price": base_price,
+            "price": price,
+        }
+    return schedule
+
+def find_user(username, password):
+    with db_pool.connection() as con:
+        cursor = con.cursor()
+        query = "SELECT user_id FROM users WHERE user_name = %s AND password = %s"
+        cursor.execute(query, (username, password))
+        result = cursor.fetchone()
+    return result[0] if result else None
+
+def create_user(username, password, email):
+    """Registers a user in the main database and copies the row to the other cinemas."""
+    with db_pool.connection() as con:
+        cursor = con.cursor()
+
+        check_query = "SELECT user_id FROM users WHERE email=%s"
+        cursor.execute(check_query, (email,))
+        if cursor.fetchone():
+            raise BookingError("This email is already registered. Please use a different email.")
+
+        query = "INSERT INTO users (user_name, password, email) VALUES (%s, %s, %s)"
+        cursor.execute(query, (username, password, email))
+        user_id = cursor.lastrowid
+        con.commit()
+        if shards.copies():
+            cursor.execute("SELECT user_id, user_name, email, password, created_at, last_login FROM users WHERE user_id = %s",
+                           (user_id,))
+            copy_rows(shards, "users", cursor.fetchall())
+        return user_id
+
+def read_pin(user_id):
+    """When user_id's reads leave the primaries (time.time()), after a recent write; None when they are not pinned.
+
+    Pins are per process: an API worker hands this to the client, which
+    sends it back so that any worker honours it through restore_read_pin().
+    """
+    pins = [until for until in (shard.reads.pinned_until(user_id) for shard in shards) if until is not None]
+    return max(pins, default=None)
+
+def restore_read_pin(user_id, until):
+    """Keeps user_id's reads on the primaries of this process until `until`, a read_pin() from another process."""
+    seconds = until - time.time()
+    if seconds > 0:
+        for shard in shards:
+            shard.reads.pin(user_id, seconds)
+
+def _booking_tables(include_archived):
+    # Bookings of shows older than ARCHIVE_AFTER_DAYS live in booking_archive (see archive.py)
+    return ("booking", "booking_archive") if include_archived else ("booking",)
+
+def _show_order(row):
+    return row[3], row[0]
+
+def fetch_reservations(user_id, include_archived=False):
+    """The user's bookings in every cinema, latest show first; archived ones only with include_archived."""
+    def reservations(shard):
+        with shard.reads.connection(user_id) as con:
+            cursor = con.cursor()
+            found = []
+            for table in _booking_tables(include_archived):
+                # Rezervasyonları getir
+                query = f"""
+                    SELECT b.booking_id, m.title AS movie_title, t.theatre_name, s.show_datetime, b.total_price, b.b_status
+                    FROM {table} b
+                    JOIN showtime s ON b.show_id = s.show_id
+                    JOIN movies m ON s.movie_id = m.movie_id
+                    JOIN theatre t ON s.theatre_id = t.theatre_id
+                    WHERE b.user_id = %s
+                    ORDER BY s.show_datetime DESC, b.booking_id DESC
+                """
+                cursor.execute(query, (user_id,))
+                found.append([row[:2] + (_theatre_label(shard, row[2]),) + row[3:] for row in cursor.fetchall()])
+            return list(heapq.merge(*found, key=_show_order, reverse=True))
+
+    return shards.gather(reservations, key=_show_order, reverse=True)
+
+
+def fetch_tickets(user_id, booking_id, include_archived=False):
+    """Tickets of one of the user's bookings, as (ticket_number, title, theatre_name, show_datetime, seat_number, status).
+
+    Tickets of an archived booking come back only with include_archived.
+    """
+    try:
+        shard = shards.for_id(booking_id)
+    except (KeyError, TypeError, ValueError):
+        return []
+    with shard.reads.connection(user_id) as con:
+        cursor = con.cursor()
+        cursor.execute(TICKET_QUERY + " WHERE t.booking_id = %s AND b.user_id = %s ORDER BY t.ticket_id", (booking_id, user_id))
+        tickets = cursor.fetchall()
+        if not tickets and include_archived:
+            cursor.execute(ARCHIVED_TICKET_QUERY + " WHERE t.booking_id = %s AND b.user_id = %s ORDER BY t.ticket_id",
+                           (booking_id, user_id))
+            tickets = cursor.fetchall()
+        return tickets
+
+def lookup_ticket(ticket_number):
+    """A ticket scanned at the door, or None; it admits only while its booking is 'confirmed'."""
+    # Ticket numbers start with the booking id, which names the cinema
+    try:
+        shard = shards.for_id(ticket_number.split("-", 1)[0])
+    except (KeyError, TypeError, ValueError):
+        return None
+    with shard.reads.connection() as con:
+        ticket = find_ticket(con.cursor(), ticket_number)
+    if ticket is None and shard.reads.replicas:
+        # Bought a moment ago and not on the replica yet?
+        with shard.pool.connection() as con:
+            ticket = find_ticket(con.cursor(), ticket_number)
+    return ticket
+
+
+RESERVATION_PAGE_SIZE = 50
+
+
+def fetch_reservations_page(user_id, after=None, limit=RESERVATION_PAGE_SIZE, include_archived=False):
+    """One page of a user's bookings in every cinema, newest first; archived ones only with include_archived.
+
+    `after` is the (booking_date, booking_id) key of the last row already
+    shown, or None for the first page. Returns (rows, next_key); rows are
+    (booking_id, title, theatre_name, show_datetime, total_price, status)
+    and next_key is None on the last page. Each cinema returns its own
+    next page (from booking_archive too, with include_archived); the
+    pages are merged on the key, which booking ids keep unique across
+    cinemas and archives.
+    """
+    # The inner query pages through idx_user_booking_date alone; only the
+    # rows on the page are joined (LEFT, so every page row comes back)
+    if after is None:
+        keyset, params = "", (user_id, limit + 1)
+    else:
+        keyset = "AND (booking_date < %s OR (booking_date = %s AND booking_id < %s))"
+        params = (user_id, after[0], after[0], after[1], limit + 1)
+    query = """
+        SELECT b.booking_id, m.title, t.theatre_name, s.show_datetime, b.total_price, b.b_status, b.booking_date
+        FROM (
+            SELECT booking_id FROM {table}
+            WHERE user_id = %s {keyset}
+            ORDER BY booking_date DESC, booking_id DESC
+            LIMIT %s
+        ) page
+        JOIN {table} b ON b.booking_id = page.booking_id
+        LEFT JOIN showtime s ON b.show_id = s.show_id
+        LEFT JOIN movies m ON s.movie_id = m.movie_id
+        LEFT JOIN theatre t ON s.theatre_id = t.theatre_id
+        ORDER BY b.booking_date DESC, b.booking_id DESC
+    """
+
+    def page_key(row):
+        return row[6], row[0]
+
+    def page(shard):
+        with shard.reads.connection(user_id) as con:
+            cursor = con.cursor()
+            found = []
+            for table in _booking_tables(include_archived):
+                cursor.execute(query.format(table=table, keyset=keyset), params)
+                found.append([row[:2] + (_theatre_label(shard, row[2]),) + row[3:] for row in cursor.fetchall()])
+            return list(itertools.islice(heapq.merge(*found, key=page_key, reverse=True), limit + 1))
+
+    rows = shards.gather(page, key=page_key, reverse=True, limit=limit + 1)
+    next_key = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_key = (rows[-1][6], rows[-1][0])
+    return [row[:6] for row in rows], next_key
+
+
+def _ensure_prices():
+    price_table.ensure_loaded(*(shard.pool for shard in shards))
+
+def place_hold(user_id, show_id, ticket_count):
+    shard = _shard(show_id, "Show")
+    _ensure_prices()
+
+    def price(cursor, seats_left):
+        return price_table.quote(cursor, show_id, ticket_count, seats_left)
+
+    # Koltuklar ödeme süresince 'pending' rezervasyon olarak tutulur; fiyat aynı işlemde hesaplanır
+    hold = hold_stores[shard.index].hold(user_id, show_id, ticket_count, price=price)
+    shard.reads.pin(user_id)
+    return hold
+
+def _check_payment_method(payment_method):
+    if payment_method not in PAYMENT_METHODS:
+        raise BookingError(f"Unknown payment method: {payment_method}.")
+
+def confirm_hold(user_id, booking_id, payment_method="credit_card", transaction_id=None):
+    """Pays for a hold; returns the ticket numbers issued.
+
+    The payment is recorded in the transaction that confirms the booking.
+    """
+    _check_payment_method(payment_method)
+    shard = _shard(booking_id, "Booking")
+    ticket_numbers = hold_stores[shard.index].confirm(booking_id, user_id, (payment_method, transaction_id))
+    shard.reads.pin(user_id)
+    return ticket_numbers
+
+def checkout(user_id, show_id, ticket_count, payment_method="credit_card", transaction_id=None):
+    """Books and pays in one transaction, without a hold.
+
+    The seats, booking, tickets and payment are written together. Returns a
+    dict with booking_id, seat_numbers, ticket_numbers and total_price;
+    raises SeatsUnavailable when the show is sold out.
+    """
+    _check_payment_method(payment_method)
+    shard = _shard(show_id, "Show")
+    _ensure_prices()
+    quoted = [None]
+
+    def price(cursor, seats_left):
+        total, extra = price_table.quote(cursor, show_id, ticket_count, seats_left)
+        quoted[0] = total
+        return total, extra
+
+    booking_id, seat_numbers, ticket_numbers = book_seats(
+        checkout_pools[shard.index], user_id, show_id, ticket_count, None, None, seat_maps,
+        price=price, payment=(payment_method, transaction_id)
+    )
+    shard.reads.pin(user_id)
+    return {"booking_id": booking_id, "seat_numbers": seat_numbers, "ticket_numbers": ticket_numbers,
+            "total_price": quoted[0]}
+
+def release_hold(user_id, booking_id):
+    shard = _shard(booking_id, "Booking")
+    hold_stores[shard.index].release(booking_id, user_id)
+    shard.reads.pin(user_id)
+
+def cancel_reservation(user_id, booking_id):
+    """Cancels a booking, refunds its payment and gives its seats back; user_id=None skips the ownership check."""
+    shard = _shard(booking_id, "Booking")
+
+    def work(cursor):
+        # İptal edilen bilet bilgilerini al
+        cursor.execute("""
+            SELECT b.show_id, b.ticket_count, b.b_status, b.user_id, b.total_price
+            FROM booking b
+            WHERE b.booking_id = %s
+            FOR UPDATE
+        """, (booking_id,))
+        result = cursor.fetchone()
+
+        if not result or result[2] == "cancelled" or (user_id is not None and result[3] != user_id):
+            raise BookingError("Booking already cancelled or not found.")
+
+        show_id, cancelled_tickets, status, _, total_price = result
+
+        # Rezervasyonu iptal et
+        cursor.execute("UPDATE booking SET b_status = 'cancelled' WHERE booking_id = %s", (booking_id,))
+        if status == "confirmed":
+            record_booking(cursor, show_id, -1, -cancelled_tickets, -(total_price or 0))
+            refund_payments(cursor, booking_id)
+
+        # Prosedürü çağırarak koltukları geri ekle
+        cursor.execute("CALL UpdateSeatsOnCancellation(%s, %s)", (cancelled_tickets, show_id))
+        return show_id
+
+    show_id = run_in_transaction(shard.pool, work)
+    seat_maps.invalidate(show_id)
+    if user_id is not None:
+        shard.reads.pin(user_id)
+    return show_id
+
+def fetch_show_summary(show_id):
+    """(title, theatre_name, show_datetime, live_bookings, booked_tickets) of a show, or None."""
+    try:
+        shard = shards.for_id(show_id)
+    except (KeyError, TypeError, ValueError):
+        return None
+    with shard.pool.connection() as con:
+        cursor = con.cursor()
+        cursor.execute("""
+            SELECT m.title, t.theatre_name, s.show_datetime,
+                   COUNT(b.booking_id), COALESCE(SUM(b.ticket_count), 0)
+            FROM showtime s
+            JOIN movies m ON s.movie_id = m.movie_id
+            JOIN theatre t ON s.theatre_id = t.theatre_id
+            LEFT JOIN booking b ON b.show_id = s.show_id AND b.b_status <> 'cancelled'
+            WHERE s.show_id = %s
+            GROUP BY s.show_id, m.title, t.theatre_name, s.show_datetime
+        """, (show_id,))
+        return cursor.fetchone()
+
+def cancel_show(show_id):
+    """Cancels every live booking of a show in one transaction.
+
+    Paid payments become 'refunded' and pending ones 'failed', the seats go
+    back to the show with a single update, and a summary dict is returned.
+    Each step is one set-based statement, whatever the number of bookings.
+    """
+    shard = _shard(show_id, "Show")
+
+    def work(cursor):
+        cursor.execute("SELECT show_id FROM showtime WHERE show_id = %s FOR UPDATE", (show_id,))
+        if cursor.fetchone() is None:
+            raise BookingError("Show not found.")
+
+        # Lock the show's live bookings and total up what is being given back
+        cursor.execute("""
+            SELECT COUNT(*), COALESCE(SUM(ticket_count), 0), COALESCE(SUM(total_price), 0),
+                   COALESCE(SUM(CASE WHEN b_status = 'confirmed' THEN 1 ELSE 0 END), 0),
+                   COALESCE(SUM(CASE WHEN b_status = 'confirmed' THEN ticket_count ELSE 0 END), 0),
+                   COALESCE(SUM(CASE WHEN b_status = 'confirmed' THEN total_price ELSE 0 END), 0)
+            FROM booking
+            WHERE show_id = %s AND b_status <> 'cancelled'
+            FOR UPDATE
+        """, (show_id,))
+        bookings, tickets, booked_amount, confirmed, confirmed_tickets, confirmed_amount = cursor.fetchone()
+
+        cursor.execute("""
+            SELECT p.p_status, COUNT(*), COALESCE(SUM(p.amount), 0)
+            FROM payments p
+            JOIN booking b ON b.booking_id = p.booking_id
+            WHERE b.show_id = %s AND b.b_status <> 'cancelled' AND p.p_status IN ('paid', 'pending')
+            GROUP BY p.p_status
+        """, (show_id,))
+        payments = {status: (count, amount) for status, count, amount in cursor.fetchall()}
+
+        cursor.execute("""
+            UPDATE payments
+            SET p_status = CASE WHEN p_status = 'paid' THEN 'refunded' ELSE 'failed' END
+            WHERE p_status IN ('paid', 'pending') AND booking_id IN (
+                SELECT booking_id FROM booking WHERE show_id = %s AND b_status <> 'cancelled'
+            )
+        """, (show_id,))
+        cursor.execute("UPDATE booking SET b_status = 'cancelled' WHERE show_id = %s AND b_status <> 'cancelled'", (show_id,))
+        if tickets:
+            cursor.execute("CALL UpdateSeatsOnCancellation(%s, %s)", (tickets, show_id))
+        if confirmed:
+            record_booking(cursor, show_id, -int(confirmed), -int(confirmed_tickets), -confirmed_amount)
+
+        return {
+            "show_id": show_id,
+            "bookings_cancelled": bookings,
+            "tickets_restored": int(tickets),
+            "booked_amount": booked_amount,
+            "payments_refunded": payments.get("paid", (0, 0))[0],
+            "refunded_amount": payments.get("paid", (0, 0))[1],
+            "payments_failed": payments.get("pending", (0, 0))[0],
+        }
+
+    summary = run_in_transaction(shard.pool, work)
+    seat_maps.invalidate(show_id)
+    price_table.invalidate(show_id)
+    hold_stores[shard.index].forget_show(show_id)
+    return summary
+
+DASHBOARD_DAYS = 30
+
+
+def fetch_dashboard(days=DASHBOARD_DAYS, limit=200):
+    """Occupancy and revenue since `days` days ago, upcoming shows included, read from the summary tables.
+
+    Each cinema's dashboard is read at once and merged: shows and theatres
+    side by side, movies and totals added up.
+    """
+    since = datetime.now().date() - timedelta(days=days)
+    parts = shards.scatter(lambda shard: (shard, _fetch_dashboard(shard.reads, since, limit)))
+    if len(parts) == 1:
+        return parts[0][1]
+
+    shows = heapq.merge(*([row[:2] + (_theatre_label(shard, row[2]),) + row[3:] for row in part["shows"]]
+                          for shard, part in parts),
+                        key=lambda row: (row[3], row[0]), reverse=True)
+    movies = {}
+    for _, part in parts:
+        for show_date, title, *counts in part["movies"]:
+            totals = movies.get((show_date, title), (0, 0, 0))
+            movies[(show_date, title)] = tuple(total + count for total, count in zip(totals, counts))
+    theatres = [row[:1] + (_theatre_label(shard, row[1]),) + row[2:] for shard, part in parts for row in part["theatres"]]
+    return {
+        "shows": list(itertools.islice(shows, limit)),
+        "movies": sorted(((show_date, title) + counts for (show_date, title), counts in movies.items()),
+                         key=lambda row: (row[0], row[4]), reverse=True)[:limit],
+        "theatres": sorted(theatres, key=lambda row: (-row[0].toordinal(), row[1] or ""))[:limit],
+        "totals": tuple(sum(values) for values in zip(*(part["totals"] for _, part in parts))),
+    }
+
+def _reindex_movie(cursor, movie_id):
+    cursor.execute(MOVIE_ROW_QUERY + " WHERE movie_id = %s", (movie_id,))
+    row = cursor.fetchone()
+    if row is not None:
+        movie_index.update(row)
+
+def _copy_movie(cursor, movie_id):
+    # The other cinemas keep a copy of the movies their showtimes refer to
+    if shards.copies():
+        cursor.execute("SELECT movie_id, title, genre, duration, release_date, rating, director, actors"
+                       " FROM movies WHERE movie_id = %s", (movie_id,))
+        copy_rows(shards, "movies", cursor.fetchall())
+
+def catalog_changed(version=None):
+    """Drops this process's catalog copies after it changed the movies; `version` is what bump_version returned.
+
+    Catalog reads stay on the primary for a while, so the copies are not
+    reloaded from a replica that has not seen the change yet.
+    """
+    read_router.pin(CATALOG)
+    catalog_cache.invalidate(version)
+
+# Movie edits bump the catalog version in their transaction, so other processes drop their cached copies
+def create_movie(title, genre, duration, release_date):
+    with db_pool.connection() as con:
+        cursor = con.cursor()
+        query = "INSERT INTO movies (title, genre, duration, release_date) VALUES (%s, %s, %s, %s)"
+        cursor.execute(query, (title, genre, duration, release_date))
+        movie_id = cursor.lastrowid
+        version = bump_version(cursor)
+        con.commit()
+        catalog_changed(version)
+        _copy_movie(cursor, movie_id)
+        _reindex_movie(cursor, movie_id)
+
+def edit_movie(old_title, title, genre, duration, release_date):
+    with db_pool.connection() as con:
+        cursor = con.cursor()
+        cursor.execute("SELECT movie_id FROM movies WHERE title = %s", (old_title,))
+        row = cursor.fetchone()
+        query = """
+            UPDATE movies
+            SET title = %s, genre = %s, duration = %s, release_date = %s
+            WHERE title = %s
+        """
+        cursor.execute(query, (title, genre, duration, release_date, old_title))
+        version = bump_version(cursor)
+        con.commit()
+        catalog_changed(version)
+        if row is not None:
+            _copy_movie(cursor, row[0])
+            _reindex_movie(cursor, row[0])
+
+def remove_movie(title):
+    with db_pool.connection() as con:
+        cursor = con.cursor()
+        cursor.execute("SELECT movie_id FROM movies WHERE title = %s", (title,))
+        removed = [row[0] for row in cursor.fetchall()]
+        query = "DELETE FROM movies WHERE title = %s"
+        cursor.execute(query, (title,))
+        version = bump_version(cursor)
+        con.commit()
+    catalog_changed(version)
+    if removed:
+        delete_rows(shards, "movies", removed)
+    movie_id = movie_index.id_for_title(title)
+    if movie_id is not None:
+        movie_index.remove(movie_id)
@@ -0,0 +1,318 @@
+"""Bulk import of movies and showtimes from CSV files.
+
+Usage: python bulk_import.py [--movies movies.csv] [--showtimes showtimes.csv] [--batch-size 500] [--dry-run]
+
+movies.csv columns:    title, genre, duration, release_date[, rating, director, actors]
+showtimes.csv columns: title, theatre_name, show_datetime, base_price
+
+Dates are YYYY-MM-DD and show times YYYY-MM-DD HH:MM. Each file is checked
+row by row as it is read; valid rows are written with executemany in
+transactions of `batch_size` rows and invalid ones are reported with their
+line number. With dry_run nothing is written.
+
+With several cinemas (DB_SHARDS) movies go to the main database and are
+copied to the other cinemas batch by batch, and each showtime goes to the
+cinema that owns its theatre. A theatre name found in more than one cinema
+is written with the cinema, as "Hall 1 (north)".
+"""
+import argparse
+import csv
+import sys
+import time
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+from analytics import register_shows
+from booking import run_in_transaction
+from catalog_cache import bump_version
+from sharding import GLOBAL_TABLES, copy_rows
+from storage import DatabaseError
+
+DEFAULT_BATCH_SIZE = 500
+MAX_TEXT = 100  # varchar(100) columns
+
+MOVIE_COLUMNS = ("title", "genre", "duration", "release_date")
+SHOWTIME_COLUMNS = ("title", "theatre_name", "show_datetime", "base_price")
+
+
+class RowError(Exception):
+    pass
+
+
+class ImportResult:
+    def __init__(self, kind, dry_run):
+        self.kind = kind
+        self.dry_run = dry_run
+        self.rows = 0
+        self.imported = 0
+        self.errors = []  # (line_number, message)
+        self.seconds = 0.0
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    def summary(self):
+        verb = "would import" if self.dry_run else "imported"
+        return (f"{self.kind}: {self.rows} rows read, {verb} {self.imported}, {len(self.errors)} errors "
+                f"in {self.seconds:.2f}s ({self.rows_per_second:.0f} rows/s)")
+
+
+def _text(row, name, required=True):
+    value = (row.get(name) or "").strip()
+    if required and not value:
+        raise RowError(f"{name} is required")
+    if len(value) > MAX_TEXT and name != "actors":
+        raise RowError(f"{name} is longer than {MAX_TEXT} characters")
+    return value or None
+
+
+def _parse(row, name, parse, message):
+    value = _text(row, name)
+    try:
+        return parse(value)
+    except (ValueError, InvalidOperation):
+        raise RowError(f"{name} {message}: {value!r}")
+
+
+def _positive_int(value):
+    number = int(value)
+    if number <= 0:
+        raise ValueError
+    return number
+
+
+def _price(value):
+    price = Decimal(value)
+    if price < 0 or price >= Decimal("100000000"):
+        raise InvalidOperation
+    return price.quantize(Decimal("0.01"))
+
+
+def _rating(value):
+    rating = Decimal(value)
+    if not 0 <= rating <= 10:
+        raise InvalidOperation
+    return rating.quantize(Decimal("0.1"))
+
+
+def _check_header(reader, required):
+    missing = [name for name in required if name not in (reader.fieldnames or ())]
+    if missing:
+        raise ValueError(f"missing column(s): {', '.join(missing)}")
+
+
+def _stream(pool, path, kind, required, validate, write, batch_size, dry_run, committed=None, route=None):
+    """Validates rows as they are read and writes them batch by batch with write(cursor, rows).
+
+    route(values), when given, names the pool a row is written to (one
+    transaction per pool and batch); committed(rows) runs after each
+    transaction is committed.
+    """
+    result = ImportResult(kind, dry_run)
+    started = time.perf_counter()
+    batch = []
+
+    def flush():
+        groups = {}
+        for line, values in batch:
+            groups.setdefault(route(values) if route is not None else pool, []).append((line, values))
+        batch.clear()
+        for target, group in groups.items():
+            if not dry_run:
+                rows = [values for _, values in group]
+                try:
+                    run_in_transaction(target, lambda cursor: write(cursor, rows))
+                except DatabaseError as err:
+                    # The whole transaction was rolled back; report it against each of its rows
+                    result.errors.extend((line, f"batch failed: {err}") for line, _ in group)
+                    continue
+                if committed is not None:
+                    committed(rows)
+            result.imported += len(group)
+
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.DictReader(f)
+        _check_header(reader, required)
+        for row in reader:
+            result.rows += 1
+            line = reader.line_num
+            try:
+                batch.append((line, validate(row)))
+            except RowError as err:
+                result.errors.append((line, str(err)))
+                continue
+            if len(batch) >= batch_size:
+                flush()
+    if batch:
+        flush()
+    result.seconds = time.perf_counter() - started
+    return result
+
+
+def import_movies(pool, path, batch_size=DEFAULT_BATCH_SIZE, dry_run=False, shards=None):
+    """Imports movies; titles already in the database or earlier in the file are rejected.
+
+    `pool` is the main database; with `shards` (a ShardSet) each committed
+    batch is copied to the other cinemas. Returns (ImportResult, titles)
+    where titles are the accepted new titles.
+    """
+    with pool.connection() as con:
+        cursor = con.cursor()
+        cursor.execute("SELECT title FROM movies")
+        known = {title.casefold() for (title,) in cursor.fetchall() if title}
+    added = []
+
+    def validate(row):
+        title = _text(row, "title")
+        if title.casefold() in known:
+            raise RowError(f"movie {title!r} already exists")
+        values = (
+            title,
+            _text(row, "genre"),
+            _parse(row, "duration", _positive_int, "must be a positive number of minutes"),
+            _parse(row, "release_date", lambda v: datetime.strptime(v, "%Y-%m-%d").date(), "must be YYYY-MM-DD"),
+            _parse(row, "rating", _rating, "must be between 0 and 10") if (row.get("rating") or "").strip() else None,
+            _text(row, "director", required=False),
+            _text(row, "actors", required=False),
+        )
+        known.add(title.casefold())
+        added.append(title)
+        return values
+
+    def write(cursor, rows):
+        cursor.executemany("INSERT INTO movies (title, genre, duration, release_date, rating, director, actors)"
+                           " VALUES (%s, %s, %s, %s, %s, %s, %s)", rows)
+        bump_version(cursor)  # other processes drop their cached catalog
+
+    def copy(rows):
+        # Read back with their new ids; titles are unique
+        keys, columns = GLOBAL_TABLES["movies"]
+        titles = [row[0] for row in rows]
+        with pool.connection() as con:
+            cursor = con.cursor()
+            cursor.execute(f"SELECT {', '.join(keys + columns)} FROM movies"
+                           f" WHERE title IN ({', '.join(['%s'] * len(titles))})", titles)
+            copy_rows(shards, "movies", cursor.fetchall())
+
+    committed = copy if shards is not None and shards.copies() else None
+    result = _stream(pool, path, "movies", MOVIE_COLUMNS, validate, write, batch_size, dry_run, committed)
+    return result, added
+
+
+def import_showtimes(pool, path, batch_size=DEFAULT_BATCH_SIZE, dry_run=False, pending_titles=(), prices=None,
+                     shards=None):
+    """Imports future showtimes; available_seats starts at the theatre's capacity.
+
+    `pending_titles` are movie titles accepted by a dry-run movie import in
+    the same session, so their showtimes validate before they exist.
+    `prices` (a PriceTable) is reloaded after each batch is committed.
+    With `shards` each show is written to the cinema of its theatre.
+    """
+    with pool.connection() as con:
+        cursor = con.cursor()
+        cursor.execute("SELECT title, movie_id FROM movies")
+        movies = {title.casefold(): movie_id for title, movie_id in cursor.fetchall() if title}
+
+    theatres = {}  # name or "name (cinema)" -> (theatre_id, capacity)
+    names = {}  # plain name -> {cinema: theatre of that name}
+    owners = {}  # theatre_id -> pool of its cinema
+    booked_slots = set()
+    for shard in shards if shards is not None else (None,):
+        target = shard.pool if shard is not None else pool
+        with target.connection() as con:
+            cursor = con.cursor()
+            cursor.execute("SELECT theatre_name, theatre_id, capacity FROM theatre")
+            for name, theatre_id, capacity in cursor.fetchall():
+                if not name:
+                    continue
+                owners[theatre_id] = target
+                names.setdefault(name.casefold(), {})[shard] = (theatre_id, capacity)
+                if shard is not None:
+                    theatres[shards.label(shard, name).casefold()] = (theatre_id, capacity)
+            cursor.execute("SELECT theatre_id, show_datetime FROM showtime WHERE show_datetime >= NOW()")
+            booked_slots.update(cursor.fetchall())
+    for name, found in names.items():
+        if len(found) == 1:
+            theatres.setdefault(name, *found.values())
+    for title in pending_titles:
+        movies.setdefault(title.casefold(), None)
+    now = datetime.now()
+
+    def validate(row):
+        title = _text(row, "title")
+        if title.casefold() not in movies:
+            raise RowError(f"unknown movie {title!r}")
+        theatre_name = _text(row, "theatre_name")
+        if theatre_name.casefold() not in theatres:
+            if len(names.get(theatre_name.casefold(), ())) > 1:
+                raise RowError(f"theatre {theatre_name!r} is in several cinemas; add the cinema, as in 'name (cinema)'")
+            raise RowError(f"unknown theatre {theatre_name!r}")
+        theatre_id, capacity = theatres[theatre_name.casefold()]
+        show_datetime = _parse(row, "show_datetime", lambda v: datetime.strptime(v, "%Y-%m-%d %H:%M"),
+                               "must be YYYY-MM-DD HH:MM")
+        if show_datetime <= now:
+            raise RowError(f"show_datetime {show_datetime:%Y-%m-%d %H:%M} is in the past")
+        if (theatre_id, show_datetime) in booked_slots:
+            raise RowError(f"{theatre_name} already has a show at {show_datetime:%Y-%m-%d %H:%M}")
+        base_price = _parse(row, "base_price", _price, "must be a non-negative amount")
+        booked_slots.add((theatre_id, show_datetime))
+        return movies[title.casefold()], theatre_id, show_datetime, base_price, capacity or 0
+
+    def write(cursor, rows):
+        cursor.execute("SELECT COALESCE(MAX(show_id), 0) FROM showtime")
+        last_show_id = cursor.fetchone()[0]
+        cursor.executemany("INSERT INTO showtime (movie_id, theatre_id, show_datetime, base_price, available_seats)"
+                           " VALUES (%s, %s, %s, %s, %s)", rows)
+        register_shows(cursor, last_show_id)
+
+    committed = (lambda rows: prices.invalidate()) if prices is not None else None
+    return _stream(pool, path, "showtimes", SHOWTIME_COLUMNS, validate, write, batch_size, dry_run, committed,
+                   route=lambda values: owners[values[1]])
+
+
+def run_import(pool, movies_path=None, showtimes_path=None, batch_size=DEFAULT_BATCH_SIZE, dry_run=False,
+               prices=None, shards=None):
+    """Imports movies first so that showtimes may refer to them; returns the ImportResults."""
+    results = []
+    new_titles = ()
+    if movies_path:
+        result, new_titles = import_movies(pool, movies_path, batch_size, dry_run, shards)
+        results.append(result)
+    if showtimes_path:
+        results.append(import_showtimes(pool, showtimes_path, batch_size, dry_run,
+                                        pending_titles=new_titles if dry_run else (), prices=prices, shards=shards))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import movies and showtimes from CSV")
+    parser.add_argument("--movies", help="movies CSV file")
+    parser.add_argument("--showtimes", help="showtimes CSV file")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--dry-run", action="store_true", help="validate only, write nothing")
+    args = parser.parse_args()
+    if not args.movies and not args.showtimes:
+        parser.error("give --movies and/or --showtimes")
+
+    from booking_service import db_pool, shards
+
+    try:
+        results = run_import(db_pool, args.movies, args.showtimes, max(1, args.batch_size), args.dry_run,
+                             shards=shards)
+    except (OSError, ValueError) as err:
+        raise SystemExit(f"Import failed: {err}")
+    finally:
+        shards.close()
+        db_pool.close()
+    failed = False
+    for result in results:
+        print(result.summary())
+        for line, message in result.errors:
+            print(f"  line {line}: {message}")
+        failed = failed or bool(result.errors)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
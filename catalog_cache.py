@@ -0,0 +1,131 @@
+"""Process-wide cache of the movie catalog.
+
+Each process keeps the movie list and the movie details it has read.
+Every change to the movies table bumps the 'catalog' row of cache_versions
+in the same transaction (bump_version). Before answering from memory, a
+process reads that one row, at most every check_interval seconds, and
+drops what it holds when the number has moved. Kiosks and API workers
+therefore see an admin's edit within seconds without re-reading the
+catalog. Entries also expire after ttl seconds, and at most max_entries
+are kept, least recently used out first.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from storage import backend
+
+CATALOG = "catalog"
+
+_BUMP = backend.upsert_sql("cache_versions", ("name",), (), ("version",))
+
+
+def read_version(cursor, name=CATALOG):
+    cursor.execute("SELECT version FROM cache_versions WHERE name = %s", (name,))
+    row = cursor.fetchone()
+    return row[0] if row else 0
+
+
+def bump_version(cursor, name=CATALOG):
+    """Moves the version on in the caller's transaction and returns the new one."""
+    cursor.execute(_BUMP, (name, 1))
+    return read_version(cursor, name)
+
+
+class CatalogCache:
+    """Catalog reads keyed by the caller, valid while the catalog version stands still.
+
+    Functions registered with on_change() run when a version change made
+    by another process is noticed, so other in-memory copies of the
+    catalog (the search index) can be dropped as well.
+    """
+
+    def __init__(self, ttl=300, max_entries=1024, check_interval=2.0, name=CATALOG):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.check_interval = check_interval
+        self.name = name
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (value, loaded_at), least recently used first
+        self._version = None
+        self._checked_at = None
+        # Moves on whenever the entries are dropped; a load started before is not stored
+        self._generation = 0
+        self._listeners = []
+
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+
+    def on_change(self, callback):
+        self._listeners.append(callback)
+
+    def _clear(self):
+        self._entries.clear()
+        self._generation += 1
+        self._invalidations += 1
+
+    def check(self, pool):
+        """Reads the catalog version if check_interval has passed and drops everything if it moved."""
+        now = time.monotonic()
+        if self._checked_at is not None and now - self._checked_at < self.check_interval:
+            return
+        with pool.connection() as con:
+            version = read_version(con.cursor(), self.name)
+        with self._lock:
+            self._checked_at = now
+            changed = self._version is not None and version != self._version
+            self._version = version
+            if changed:
+                self._clear()
+        if changed:
+            for callback in self._listeners:
+                callback()
+
+    def get(self, pool, key, load):
+        """The cached value for key, or load() stored under it."""
+        self.check(pool)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[1] <= self.ttl:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return entry[0]
+            self._misses += 1
+            generation = self._generation
+        value = load()
+        with self._lock:
+            if generation == self._generation:
+                self._entries[key] = (value, now)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self._evictions += 1
+        return value
+
+    def invalidate(self, version=None):
+        """Drops every entry, after this process changed the catalog.
+
+        `version` is what bump_version returned in the committed change.
+        If it directly follows the version last seen, nobody else changed
+        the catalog in between, and the cache moves on to it; otherwise
+        the next read checks the database and runs the on_change functions.
+        """
+        with self._lock:
+            self._clear()
+            if version is not None and self._version is not None and version == self._version + 1:
+                self._version = version
+            else:
+                self._checked_at = None
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "invalidations": self._invalidations,
+            }
@@ -29,7 +29,7 @@ CREATE TABLE `booking` (
   `user_id` int DEFAULT NULL,
   `seat_id` int DEFAULT NULL,
   `show_id` int DEFAULT NULL,
-  `booking_date` datetime DEFAULT NULL,
+  `booking_date` datetime NOT NULL DEFAULT CURRENT_TIMESTAMP,
   `total_price` decimal(10,2) DEFAULT NULL,
   `extra_price` decimal(10,2) DEFAULT NULL,
   `b_status` enum('confirmed','pending','cancelled') DEFAULT 'pending',
@@ -37,7 +37,7 @@ CREATE TABLE `booking` (
   PRIMARY KEY (`booking_id`),
   KEY `seat_id` (`seat_id`),
   KEY `fk_booking_showtime` (`show_id`),
-  KEY `fk_user_id` (`user_id`),
+  KEY `idx_user_booking_date` (`user_id`,`booking_date`),
   CONSTRAINT `booking_ibfk_1` FOREIGN KEY (`user_id`) REFERENCES `users` (`user_id`),
   CONSTRAINT `booking_ibfk_2` FOREIGN KEY (`seat_id`) REFERENCES `seats` (`seat_id`),
   CONSTRAINT `booking_ibfk_3` FOREIGN KEY (`show_id`) REFERENCES `showtime` (`show_id`),
@@ -58,6 +58,36 @@ INSERT INTO `booking` VALUES (21,1,1,114,'2025-01-03 01:27:13',40.00,5.00,'cance
 /*!40000 ALTER TABLE `booking` ENABLE KEYS */;
 UNLOCK TABLES;
 
+--
+-- Table structure for table `booking_archive`
+--
+
+DROP TABLE IF EXISTS `booking_archive`;
+/*!40101 SET @saved_cs_client     = @@character_set_client */;
+/*!50503 SET character_set_client = utf8mb4 */;
+CREATE TABLE `booking_archive` (
+  `booking_id` int NOT NULL,
+  `user_id` int DEFAULT NULL,
+  `seat_id` int DEFAULT NULL,
+  `show_id` int DEFAULT NULL,
+  `booking_date` datetime NOT NULL,
+  `total_price` decimal(10,2) DEFAULT NULL,
+  `extra_price` decimal(10,2) DEFAULT NULL,
+  `b_status` enum('confirmed','pending','cancelled') DEFAULT 'pending',
+  `ticket_count` int NOT NULL DEFAULT '1',
+  PRIMARY KEY (`booking_id`,`booking_date`),
+  KEY `idx_booking_archive_user_date` (`user_id`,`booking_date`),
+  KEY `idx_booking_archive_show` (`show_id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb3
+PARTITION BY RANGE COLUMNS (`booking_date`) (
+  PARTITION `p2024` VALUES LESS THAN ('2025-01-01'),
+  PARTITION `p2025` VALUES LESS THAN ('2026-01-01'),
+  PARTITION `p2026` VALUES LESS THAN ('2027-01-01'),
+  PARTITION `p2027` VALUES LESS THAN ('2028-01-01'),
+  PARTITION `pmax` VALUES LESS THAN (MAXVALUE)
+);
+/*!40101 SET character_set_client = @saved_cs_client */;
+
 --
 -- Table structure for table `booking_seats`
 --
@@ -88,6 +118,54 @@ LOCK TABLES `booking_seats` WRITE;
 /*!40000 ALTER TABLE `booking_seats` ENABLE KEYS */;
 UNLOCK TABLES;
 
+--
+-- Table structure for table `booking_seats_archive`
+--
+
+DROP TABLE IF EXISTS `booking_seats_archive`;
+/*!40101 SET @saved_cs_client     = @@character_set_client */;
+/*!50503 SET character_set_client = utf8mb4 */;
+CREATE TABLE `booking_seats_archive` (
+  `booking_seat_id` int NOT NULL,
+  `booking_id` int DEFAULT NULL,
+  `seat_id` int DEFAULT NULL,
+  PRIMARY KEY (`booking_seat_id`),
+  KEY `idx_booking_seats_archive_booking` (`booking_id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb3;
+/*!40101 SET character_set_client = @saved_cs_client */;
+
+--
+-- Table structure for table `cache_versions`
+--
+
+DROP TABLE IF EXISTS `cache_versions`;
+/*!40101 SET @saved_cs_client     = @@character_set_client */;
+/*!50503 SET character_set_client = utf8mb4 */;
+CREATE TABLE `cache_versions` (
+  `name` varchar(50) NOT NULL,
+  `version` int NOT NULL DEFAULT '0',
+  PRIMARY KEY (`name`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb3;
+/*!40101 SET character_set_client = @saved_cs_client */;
+
+--
+-- Table structure for table `movie_day_stats`
+--
+
+DROP TABLE IF EXISTS `movie_day_stats`;
+/*!40101 SET @saved_cs_client     = @@character_set_client */;
+/*!50503 SET character_set_client = utf8mb4 */;
+CREATE TABLE `movie_day_stats` (
+  `movie_id` int NOT NULL,
+  `show_date` date NOT NULL,
+  `bookings` int NOT NULL DEFAULT '0',
+  `tickets_sold` int NOT NULL DEFAULT '0',
+  `revenue` decimal(12,2) NOT NULL DEFAULT '0.00',
+  PRIMARY KEY (`movie_id`,`show_date`),
+  KEY `idx_movie_day_stats_date` (`show_date`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb3;
+/*!40101 SET character_set_client = @saved_cs_client */;
+
 --
 -- Table structure for table `movies`
 --
@@ -104,7 +182,8 @@ CREATE TABLE `movies` (
   `rating` decimal(3,1) DEFAULT NULL,
   `director` varchar(100) DEFAULT NULL,
   `actors` text,
-  PRIMARY KEY (`movie_id`)
+  PRIMARY KEY (`movie_id`),
+  UNIQUE KEY `uq_movies_title` (`title`)
 ) ENGINE=InnoDB AUTO_INCREMENT=16 DEFAULT CHARSET=utf8mb3;
 /*!40101 SET character_set_client = @saved_cs_client */;
 
@@ -132,7 +211,7 @@ CREATE TABLE `payments` (
   `payment_method` enum('credit_card','cash','paypal') DEFAULT 'credit_card',
   `transaction_id` varchar(50) DEFAULT NULL,
   `booking_id` int DEFAULT NULL,
-  `p_status` enum('paid','failed','pending') DEFAULT 'pending',
+  `p_status` enum('paid','failed','pending','refunded') DEFAULT 'pending',
   PRIMARY KEY (`payment_id`),
   KEY `fk_payment_booking` (`booking_id`),
   CONSTRAINT `fk_payment_booking` FOREIGN KEY (`booking_id`) REFERENCES `booking` (`booking_id`),
@@ -149,6 +228,26 @@ LOCK TABLES `payments` WRITE;
 /*!40000 ALTER TABLE `payments` ENABLE KEYS */;
 UNLOCK TABLES;
 
+--
+-- Table structure for table `payments_archive`
+--
+
+DROP TABLE IF EXISTS `payments_archive`;
+/*!40101 SET @saved_cs_client     = @@character_set_client */;
+/*!50503 SET character_set_client = utf8mb4 */;
+CREATE TABLE `payments_archive` (
+  `payment_id` int NOT NULL,
+  `payment_date` datetime DEFAULT NULL,
+  `amount` decimal(10,2) DEFAULT NULL,
+  `payment_method` enum('credit_card','cash','paypal') DEFAULT 'credit_card',
+  `transaction_id` varchar(50) DEFAULT NULL,
+  `booking_id` int DEFAULT NULL,
+  `p_status` enum('paid','failed','pending','refunded') DEFAULT 'pending',
+  PRIMARY KEY (`payment_id`),
+  KEY `idx_payments_archive_booking` (`booking_id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb3;
+/*!40101 SET character_set_client = @saved_cs_client */;
+
 --
 -- Table structure for table `seat_reservations`
 --
@@ -213,6 +312,27 @@ INSERT INTO `seats` VALUES (1,'1',1,NULL,'available',NULL),(2,'2',1,NULL,'availa
 /*!40000 ALTER TABLE `seats` ENABLE KEYS */;
 UNLOCK TABLES;
 
+--
+-- Table structure for table `show_stats`
+--
+
+DROP TABLE IF EXISTS `show_stats`;
+/*!40101 SET @saved_cs_client     = @@character_set_client */;
+/*!50503 SET character_set_client = utf8mb4 */;
+CREATE TABLE `show_stats` (
+  `show_id` int NOT NULL,
+  `movie_id` int DEFAULT NULL,
+  `theatre_id` int DEFAULT NULL,
+  `show_date` date NOT NULL,
+  `capacity` int NOT NULL DEFAULT '0',
+  `bookings` int NOT NULL DEFAULT '0',
+  `tickets_sold` int NOT NULL DEFAULT '0',
+  `revenue` decimal(12,2) NOT NULL DEFAULT '0.00',
+  PRIMARY KEY (`show_id`),
+  KEY `idx_show_stats_date` (`show_date`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb3;
+/*!40101 SET character_set_client = @saved_cs_client */;
+
 --
 -- Table structure for table `showtime`
 --
@@ -228,7 +348,7 @@ CREATE TABLE `showtime` (
   `base_price` decimal(10,2) DEFAULT '0.00',
   `available_seats` int NOT NULL DEFAULT '80',
   PRIMARY KEY (`show_id`),
-  KEY `idx_movie_id` (`movie_id`),
+  KEY `idx_movie_show_datetime` (`movie_id`,`show_datetime`),
   KEY `idx_theatre_id` (`theatre_id`),
   KEY `idx_show_datetime` (`show_datetime`),
   CONSTRAINT `fk_movie_id` FOREIGN KEY (`movie_id`) REFERENCES `movies` (`movie_id`),
@@ -276,6 +396,24 @@ INSERT INTO `theatre` VALUES (1,'Salon 1',80,'STANDARD',0.00),(3,'Salon 2',80,'S
 /*!40000 ALTER TABLE `theatre` ENABLE KEYS */;
 UNLOCK TABLES;
 
+--
+-- Table structure for table `theatre_day_stats`
+--
+
+DROP TABLE IF EXISTS `theatre_day_stats`;
+/*!40101 SET @saved_cs_client     = @@character_set_client */;
+/*!50503 SET character_set_client = utf8mb4 */;
+CREATE TABLE `theatre_day_stats` (
+  `theatre_id` int NOT NULL,
+  `show_date` date NOT NULL,
+  `bookings` int NOT NULL DEFAULT '0',
+  `tickets_sold` int NOT NULL DEFAULT '0',
+  `revenue` decimal(12,2) NOT NULL DEFAULT '0.00',
+  PRIMARY KEY (`theatre_id`,`show_date`),
+  KEY `idx_theatre_day_stats_date` (`show_date`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb3;
+/*!40101 SET character_set_client = @saved_cs_client */;
+
 --
 -- Table structure for table `tickets`
 --
@@ -294,6 +432,7 @@ CREATE TABLE `tickets` (
   `show_id` int DEFAULT NULL,
   `show_datetime` datetime DEFAULT NULL,
   PRIMARY KEY (`ticket_id`),
+  UNIQUE KEY `idx_tickets_number` (`ticket_number`),
   KEY `booking_id` (`booking_id`),
   KEY `seat_id` (`seat_id`),
   KEY `show_id` (`show_id`),
@@ -312,6 +451,29 @@ LOCK TABLES `tickets` WRITE;
 /*!40000 ALTER TABLE `tickets` ENABLE KEYS */;
 UNLOCK TABLES;
 
+--
+-- Table structure for table `tickets_archive`
+--
+
+DROP TABLE IF EXISTS `tickets_archive`;
+/*!40101 SET @saved_cs_client     = @@character_set_client */;
+/*!50503 SET character_set_client = utf8mb4 */;
+CREATE TABLE `tickets_archive` (
+  `ticket_id` int NOT NULL,
+  `booking_id` int DEFAULT NULL,
+  `seat_id` int DEFAULT NULL,
+  `ticket_number` varchar(20) DEFAULT NULL,
+  `theatre_name` varchar(100) DEFAULT NULL,
+  `seat_number` varchar(10) DEFAULT NULL,
+  `title` varchar(200) DEFAULT NULL,
+  `show_id` int DEFAULT NULL,
+  `show_datetime` datetime DEFAULT NULL,
+  PRIMARY KEY (`ticket_id`),
+  UNIQUE KEY `idx_tickets_archive_number` (`ticket_number`),
+  KEY `idx_tickets_archive_booking` (`booking_id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb3;
+/*!40101 SET character_set_client = @saved_cs_client */;
+
 --
 -- Table structure for table `users`
 --
@@ -0,0 +1,220 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class _Waiter:
+    """A thread queued for a connection; release() hands it one directly."""
+
+    __slots__ = ("ready", "granted", "con", "returned_at")
+
+    def __init__(self, lock):
+        self.ready = threading.Condition(lock)
+        self.granted = False
+        self.con = None  # None with granted: a free slot, the waiter opens the connection
+        self.returned_at = None
+
+
+class ConnectionPool:
+    """A fixed-size pool of reusable database connections.
+
+    `connect` is any zero-argument callable returning a DB-API connection
+    (e.g. connect_to_db). Connections are checked out with::
+
+        with pool.connection() as con:
+            cursor = con.cursor()
+            ...
+
+    and returned automatically; any transaction left open is rolled back
+    on return so the next user starts from a clean connection. `on_wait`,
+    if given, is called with the seconds each checkout spent waiting.
+
+    Waiters are served in arrival order: a returned connection goes
+    straight to the thread that has waited longest, so a thread that
+    releases and checks out again queues behind it.
+    """
+
+    def __init__(self, connect, size=5, timeout=10.0, idle_timeout=300.0, health_check_interval=30.0, on_wait=None):
+        self._connect = connect
+        self._on_wait = on_wait
+        self.size = size
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self.health_check_interval = health_check_interval
+
+        self._lock = threading.Lock()
+        self._idle = deque()  # (connection, returned_at) - most recently used on the right
+        self._waiters = deque()  # _Waiter - longest waiting on the left
+        self._in_use = 0
+        self._closed = False
+
+        self._checkouts = 0
+        self._misses = 0
+        self._waits = 0
+        self._wait_time = 0.0
+        self._max_wait = 0.0
+        self._evictions = 0
+        self._health_check_failures = 0
+        self._discarded = 0
+
+    def _is_healthy(self, con):
+        try:
+            return con.is_connected()
+        except Exception:
+            return False
+
+    def _close_quietly(self, con):
+        try:
+            con.close()
+        except Exception:
+            pass
+
+    def _evict_idle_locked(self, now):
+        # Idle connections are ordered oldest first, so stop at the first fresh one.
+        evicted = []
+        while self._idle and now - self._idle[0][1] > self.idle_timeout:
+            evicted.append(self._idle.popleft()[0])
+            self._evictions += 1
+        return evicted
+
+    def _hand_over_locked(self, con):
+        """Gives a returned connection (or, with None, its free slot) to the longest waiter; False if none waits."""
+        if not self._waiters:
+            return False
+        waiter = self._waiters.popleft()
+        waiter.granted = True
+        waiter.con = con
+        waiter.returned_at = time.monotonic()
+        waiter.ready.notify()
+        return True
+
+    def acquire(self):
+        started = time.monotonic()
+        waiter = None
+        stale = []
+        with self._lock:
+            if self._closed:
+                raise PoolTimeout("Connection pool is closed.")
+            stale.extend(self._evict_idle_locked(started))
+            # Threads already queued come first
+            if self._idle and not self._waiters:
+                con, returned_at = self._idle.pop()
+                self._in_use += 1
+            elif self._in_use < self.size and not self._waiters:
+                con, returned_at = None, None
+                self._in_use += 1
+                self._misses += 1
+            else:
+                waiter = _Waiter(self._lock)
+                self._waiters.append(waiter)
+                while not waiter.granted:
+                    if self._closed:
+                        self._waiters.remove(waiter)
+                        raise PoolTimeout("Connection pool is closed.")
+                    remaining = self.timeout - (time.monotonic() - started)
+                    if remaining <= 0:
+                        self._waiters.remove(waiter)
+                        raise PoolTimeout(f"No database connection available after {self.timeout:.1f}s.")
+                    waiter.ready.wait(remaining)
+                # The slot was counted as in use by whoever handed it over
+                con, returned_at = waiter.con, waiter.returned_at
+                if con is None:
+                    self._misses += 1
+
+            wait = time.monotonic() - started
+            self._checkouts += 1
+            if waiter is not None:
+                self._waits += 1
+            self._wait_time += wait
+            self._max_wait = max(self._max_wait, wait)
+
+        for old in stale:
+            self._close_quietly(old)
+        if self._on_wait is not None:
+            self._on_wait(wait)
+
+        try:
+            # Only ping connections that sat idle long enough to have been dropped by the server.
+            if con is not None and time.monotonic() - returned_at > self.health_check_interval:
+                if not self._is_healthy(con):
+                    with self._lock:
+                        self._health_check_failures += 1
+                    self._close_quietly(con)
+                    con = None
+            if con is None:
+                con = self._connect()
+        except Exception:
+            with self._lock:
+                if not self._hand_over_locked(None):
+                    self._in_use -= 1
+            raise
+        return con
+
+    def release(self, con, discard=False):
+        if not discard:
+            try:
+                con.rollback()
+            except Exception:
+                discard = True
+        with self._lock:
+            if discard or self._closed:
+                self._discarded += 1
+                if self._closed or not self._hand_over_locked(None):
+                    self._in_use -= 1
+            else:
+                if not self._hand_over_locked(con):
+                    self._in_use -= 1
+                    self._idle.append((con, time.monotonic()))
+                con = None
+        if con is not None:
+            self._close_quietly(con)
+
+    @contextmanager
+    def connection(self):
+        con = self.acquire()
+        try:
+            yield con
+        except Exception:
+            self.release(con, discard=not self._is_healthy(con))
+            raise
+        else:
+            self.release(con)
+
+    def evict_idle(self):
+        with self._lock:
+            evicted = self._evict_idle_locked(time.monotonic())
+        for con in evicted:
+            self._close_quietly(con)
+        return len(evicted)
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            idle = [con for con, _ in self._idle]
+            self._idle.clear()
+            for waiter in self._waiters:
+                waiter.ready.notify()
+        for con in idle:
+            self._close_quietly(con)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": self.size,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "checkouts": self._checkouts,
+                "misses": self._misses,
+                "waits": self._waits,
+                "total_wait_time": self._wait_time,
+                "avg_wait_time": self._wait_time / self._checkouts if self._checkouts else 0.0,
+                "max_wait_time": self._max_wait,
+                "evictions": self._evictions,
+                "health_check_failures": self._health_check_failures,
+                "discarded": self._discarded,
+            }
@@ -0,0 +1,136 @@
+"""Sends reads to read replicas and everything else to the primary.
+
+Catalog, schedule and reservation reads may be served by a replica; seat
+checks, holds, checkouts and every other write stay on the primary's pool.
+Replicas apply the primary's changes with some delay, so a user who just
+booked or cancelled could read their reservations from a replica that
+has not seen it yet. pin() sends the reads of a key (a user id, or the
+catalog) to the primary for pin_seconds after such a write. Pins live in
+the process that made the write; pinned_until() gives a pin's end as a
+wall-clock time, so it can travel with the user's session (the API sends
+it back and forth as a signed header) and be pinned again in another
+process with pin(key, seconds).
+
+A replica that cannot be connected to is skipped for retry_after seconds
+and its reads go to the next replica, or to the primary.
+"""
+import itertools
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+
+from db_pool import PoolTimeout
+from storage import DatabaseError
+
+DEFAULT_PIN_SECONDS = 5.0
+
+
+class ReplicaRouter:
+    """Chooses the pool for a read: a replica in turn, or the primary.
+
+    connection(key) is used like ConnectionPool.connection(); reader(key)
+    wraps it as a pool of its own, for code that takes a pool and only
+    reads (the catalog cache, the search index, the price table).
+    """
+
+    def __init__(self, primary, replicas=(), pin_seconds=DEFAULT_PIN_SECONDS, retry_after=30.0):
+        self.primary = primary
+        self.replicas = list(replicas)
+        self.pin_seconds = pin_seconds
+        self.retry_after = retry_after
+        self._lock = threading.Lock()
+        self._turns = itertools.cycle(range(len(self.replicas)))
+        self._pins = {}  # key -> monotonic time the pin ends
+        self._down = {}  # replica index -> monotonic time to try it again
+
+        self._replica_reads = 0
+        self._primary_reads = 0
+        self._pinned_reads = 0
+        self._failovers = 0
+
+    def pin(self, key, seconds=None):
+        """Reads for key go to the primary for the next `seconds` (pin_seconds by default); pins only get longer."""
+        if not self.replicas:
+            return
+        now = time.monotonic()
+        until = now + (self.pin_seconds if seconds is None else min(seconds, self.pin_seconds))
+        with self._lock:
+            self._pins[key] = max(until, self._pins.get(key, 0))
+            if len(self._pins) > 10000:
+                self._pins = {pinned: until for pinned, until in self._pins.items() if until > now}
+
+    def pinned(self, key):
+        with self._lock:
+            until = self._pins.get(key)
+            return until is not None and until > time.monotonic()
+
+    def pinned_until(self, key):
+        """The wall-clock time (time.time()) the key's pin ends; None when it is not pinned."""
+        with self._lock:
+            until = self._pins.get(key)
+        left = until - time.monotonic() if until is not None else 0
+        return time.time() + left if left > 0 else None
+
+    def _candidates(self, key):
+        # Replicas to try in order, starting with the next one in turn; [] means the primary
+        now = time.monotonic()
+        with self._lock:
+            if not self.replicas:
+                return []
+            until = self._pins.get(key) if key is not None else None
+            if until is not None:
+                if until > now:
+                    self._pinned_reads += 1
+                    return []
+                del self._pins[key]
+            first = next(self._turns)
+            order = [(first + step) % len(self.replicas) for step in range(len(self.replicas))]
+            return [index for index in order if self._down.get(index, 0) <= now]
+
+    def reader(self, key=None):
+        return _Reader(self, key)
+
+    @contextmanager
+    def connection(self, key=None):
+        for index in self._candidates(key):
+            with ExitStack() as stack:
+                try:
+                    con = stack.enter_context(self.replicas[index].connection())
+                except (*DatabaseError, PoolTimeout):
+                    with self._lock:
+                        self._down[index] = time.monotonic() + self.retry_after
+                        self._failovers += 1
+                    continue
+                with self._lock:
+                    self._down.pop(index, None)
+                    self._replica_reads += 1
+                yield con
+            return
+        with self._lock:
+            self._primary_reads += 1
+        with self.primary.connection() as con:
+            yield con
+
+    def stats(self):
+        with self._lock:
+            now = time.monotonic()
+            return {
+                "replicas": len(self.replicas),
+                "replicas_down": sum(1 for until in self._down.values() if until > now),
+                "replica_reads": self._replica_reads,
+                "primary_reads": self._primary_reads,  # pinned reads and failovers included
+                "pinned_reads": self._pinned_reads,
+                "failovers": self._failovers,
+                "active_pins": sum(1 for until in self._pins.values() if until > now),
+            }
+
+
+class _Reader:
+    """The reads of one key, in the shape of a pool."""
+
+    def __init__(self, router, key):
+        self._router = router
+        self._key = key
+
+    def connection(self):
+        return self._router.connection(self._key)
@@ -1,110 +1,41 @@
 from tkinter import *
-from tkinter import messagebox, ttk
-from PIL import Image, ImageTk
+from tkinter import filedialog, messagebox, ttk
+import importlib
 import os
-from dotenv import load_dotenv
-import mysql.connector
+import sys
+import threading
+import time
 
-load_dotenv()
+from async_db import DBWorker
+from image_cache import DETAIL_SIZE, GRID_SIZE, get_photo, precompute_thumbnails
 
-def connect_to_db():
-    return mysql.connector.connect(
-        host="localhost",
-        user=os.getenv("DB_USER"),
-        password=os.getenv("DB_PASSWORD"),
-        database="database_project"
-    )
+_imported_at = time.time()
 
 
-def fetch_movies():
-    try:
-        con = connect_to_db()
-        cursor = con.cursor()
-        query = "SELECT title, duration, genre, release_date FROM movies"
-        cursor.execute(query)
-        movies = cursor.fetchall()
-        con.close()
-        return movies
-    except mysql.connector.Error as err:
-        print(f"Database error: {err}")
-        return []
+class LazyModule:
+    """Imports a module on first attribute access, so the window can appear before heavy imports finish."""
 
-def fetch_movie_details(title):
-    try:
-        con = connect_to_db()
-        cursor = con.cursor()
-        query = """
-            SELECT title, genre, duration, director, actors, rating, release_date
-            FROM movies
-            WHERE title = %s
-        """
-        cursor.execute(query, (title,))
-        movie_details = cursor.fetchone()
-        con.close()
-        return movie_details
-    except mysql.connector.Error as err:
-        print(f"Database error: {err}")
-        return None
+    def __init__(self, name):
+        self._name = name
 
-def fetch_dates_for_movie(title):
-    try:
-        con = connect_to_db()
-        cursor = con.cursor()
-        query = """
-            SELECT DISTINCT DATE(show_datetime) AS show_date
-            FROM showtime
-            WHERE movie_id = (SELECT movie_id FROM movies WHERE title = %s)
-            ORDER BY show_date
-        """
-        cursor.execute(query, (title,))
-        dates = cursor.fetchall()
-        con.close()
-        return [date[0].strftime('%Y-%m-%d') for date in dates]
-    except mysql.connector.Error as err:
-        print(f"Database error: {err}")
-        return []
+    def __getattr__(self, attr):
+        return getattr(importlib.import_module(self._name), attr)
 
-def fetch_times_for_movie(title, selected_date):
-    try:
-        con = connect_to_db()
-        cursor = con.cursor()
-        query = """
-            SELECT TIME(show_datetime) AS show_time
-            FROM showtime
-            WHERE movie_id = (SELECT movie_id FROM movies WHERE title = %s)
-              AND DATE(show_datetime) = %s
-            ORDER BY show_time
-        """
-        cursor.execute(query, (title, selected_date))
-        times = cursor.fetchall()
-        con.close()
-        return [str(time[0]) for time in times]
-    except mysql.connector.Error as err:
-        print(f"Database error: {err}")
-        return []
 
-def fetch_theatres_for_movie(title, selected_date, selected_time):
-    try:
-        con = connect_to_db()
-        cursor = con.cursor()
-        query = """
-            SELECT t.theatre_name
-            FROM showtime s
-            JOIN movies m ON s.movie_id = m.movie_id
-            JOIN theatre t ON s.theatre_id = t.theatre_id
-            WHERE m.title = %s AND DATE(s.show_datetime) = %s AND TIME(s.show_datetime) = %s
-        """
-        cursor.execute(query, (title, selected_date, selected_time))
-        theatres = cursor.fetchall()
-        con.close()
-        return [theatre[0] for theatre in theatres]
-    except mysql.connector.Error as err:
-        print(f"Database error: {err}")
-        return []
+# booking_service pulls in the database driver and dotenv; it is imported by
+# the warm-up thread once the first frame is up (or by whichever call needs it first)
+service = LazyModule("booking_service")
 
-def user_login():
-    global current_user_id
+current_user_id = None
+# Posters that fit the movie window; search narrows down the rest
+MOVIE_GRID_LIMIT = 9
+# Results fetched by the warm-up thread, each used once
+prefetched = {}
 
+def show_db_error(err):
+    messagebox.showerror("Database Error", f"Error: {err}")
+
+def user_login():
     username = entry_username.get()
     password = entry_password.get()
 
@@ -112,94 +43,36 @@ def user_login():
         messagebox.showerror("Error", "All fields are required!")
         return
 
-    try:
-        con = connect_to_db()
-        cursor = con.cursor()
-
-        query = "SELECT user_id FROM users WHERE user_name = %s AND password = %s"
-        cursor.execute(query, (username, password))
-        result = cursor.fetchone()
-        con.close()
-
-        if result:
-            current_user_id = result[0]  # current_user_id güncelleniyor
+    def on_login(user_id):
+        global current_user_id
+        if user_id:
+            current_user_id = user_id  # current_user_id güncelleniyor
             messagebox.showinfo("Success", "Login successful!")
             film_goruntuleme()
         else:
             messagebox.showerror("Error", "Invalid username or password.")
 
-    except mysql.connector.Error as err:
-        messagebox.showerror("Database Error", f"Error: {err}")
-
-        
-def update_seats(ticket_count, movie_title, show_datetime, theatre_name):
-    try:
-        con = connect_to_db()
-        cursor = con.cursor()
-
-        query = """
-            SELECT show_id, available_seats
-            FROM showtime s
-            JOIN movies m ON s.movie_id = m.movie_id
-            JOIN theatre t ON s.theatre_id = t.theatre_id
-            WHERE m.title = %s AND s.show_datetime = %s AND t.theatre_name = %s
-        """
-        cursor.execute(query, (movie_title, show_datetime, theatre_name))
-        result = cursor.fetchone()
-
-        if not result:
-            messagebox.showerror("Error", "No matching show found for the selected criteria.")
-            return
-
-        show_id, available_seats = result
-        if ticket_count > available_seats:
-            messagebox.showerror("Error", f"Not enough seats available. Only {available_seats} seats left.")
-            return
+    db_worker.submit(service.find_user, username, password, on_success=on_login, on_error=show_db_error, owner=frame)
 
-        return show_id
-    except mysql.connector.Error as err:
-        messagebox.showerror("Database Error", f"Error: {err}")
-        return None
-    finally:
-        cursor.close()
-        con.close()
-
-def finalize_seat_update(ticket_count, show_id):
-    try:
-        con = connect_to_db()
-        cursor = con.cursor()
-        call_proc = "CALL UpdateSeats(%s, %s)"
-        cursor.execute(call_proc, (ticket_count, show_id))
-        con.commit()
-        con.close()
-    except mysql.connector.Error as err:
-        messagebox.showerror("Database Error", f"Error: {err}")
         
-def save_booking(show_id, seat_id, total_price, extra_price, ticket_count, status="confirmed"):
-    try:
-        con = connect_to_db()
-        cursor = con.cursor()
-        query = """
-            INSERT INTO booking (user_id, seat_id, show_id, booking_date, total_price, extra_price, ticket_count, b_status)
-            VALUES (%s, %s, %s, NOW(), %s, %s, %s, %s)
-        """
-        cursor.execute(query, (current_user_id, seat_id, show_id, total_price, extra_price, ticket_count, status))
-        con.commit()
-        con.close()
-    except mysql.connector.Error as err:
+def show_hold_error(err):
+    if isinstance(err, service.SeatsUnavailable):
+        messagebox.showerror("Error", str(err))
+    else:
         messagebox.showerror("Database Error", f"Error: {err}")
 
-
-def payment_simulation(ticket_count, show_id, theatre_name):
+def payment_simulation(hold, theatre_name):
     payment_window = Toplevel(root)
     payment_window.title("Payment")
-    payment_window.geometry("400x400")
-
-    total_price = ticket_count * 20.0  # Örnek birim fiyat
+    payment_window.geometry("400x460")
 
     Label(payment_window, text="Payment Details", font=("Times New Roman", 16, "bold"), pady=10).pack()
 
-    Label(payment_window, text=f"Total Price: ${total_price:.2f}", font=("Times New Roman", 14), pady=10, fg="green").pack()
+    Label(payment_window, text=f"Total Price: ${hold.total_price:.2f}", font=("Times New Roman", 14), pady=10, fg="green").pack()
+    if hold.seat_numbers:
+        Label(payment_window, text=f"{theatre_name} - Seats: {', '.join(hold.seat_numbers)}", font=("Times New Roman", 12)).pack()
+    countdown_label = Label(payment_window, font=("Times New Roman", 12), fg="dark red")
+    countdown_label.pack()
 
     Label(payment_window, text="Card Number:", font=("Times New Roman", 12)).pack(pady=5)
     card_number_entry = Entry(payment_window, font=("Times New Roman", 12))
@@ -213,47 +86,90 @@ def payment_simulation(ticket_count, show_id, theatre_name):
     cvv_entry = Entry(payment_window, show="*", font=("Times New Roman", 12))
     cvv_entry.pack(pady=5)
 
+    def update_countdown():
+        if not payment_window.winfo_exists():
+            return
+        minutes, seconds = divmod(int(hold.seconds_left()), 60)
+        countdown_label.config(text=f"Seats held for {minutes:02d}:{seconds:02d}")
+        payment_window.after(1000, update_countdown)
+
+    paying = {"active": False}
+
+    def cancel_payment():
+        # Closing the window mid-payment would release the hold being confirmed
+        if paying["active"]:
+            return
+        db_worker.submit(service.release_hold, current_user_id, hold.booking_id, on_success=lambda result: None,
+                         timeout=0)
+        payment_window.destroy()
+
+    def on_paid(ticket_numbers):
+        seats_text = f"\nYour seats: {', '.join(hold.seat_numbers)}" if hold.seat_numbers else ""
+        tickets_text = f"\nTicket numbers: {', '.join(ticket_numbers)}" if ticket_numbers else ""
+        messagebox.showinfo("Payment Successful", f"Your payment has been successfully processed!{seats_text}{tickets_text}")
+        payment_window.destroy()
+
+    def on_payment_error(err):
+        paying["active"] = False
+        if isinstance(err, service.HoldExpired):
+            messagebox.showerror("Error", str(err))
+            payment_window.destroy()
+            return
+        messagebox.showerror("Database Error", f"Error: {err}")
+        pay_button.config(state=NORMAL)
+
     def confirm_payment():
         if not card_number_entry.get() or not expiry_date_entry.get() or not cvv_entry.get():
             messagebox.showerror("Error", "All payment fields are required!")
             return
 
-        seat_id = 1 
-        extra_price = 5.0  # Örnek ekstra ücret (VIP vb.)
-
-        finalize_seat_update(ticket_count, show_id)  # Koltuk sayısına göre güncelle
-        save_booking(show_id, seat_id, total_price, extra_price, ticket_count)  # current_user_id kullanılıyor
-        messagebox.showinfo("Payment Successful", "Your payment has been successfully processed!")
-        payment_window.destroy()
+        paying["active"] = True
+        pay_button.config(state=DISABLED)
+        db_worker.submit(service.confirm_hold, current_user_id, hold.booking_id, "credit_card",
+                         on_success=on_paid, on_error=on_payment_error, owner=payment_window, timeout=0)
 
-    Button(payment_window, text="Pay Now", font=("Times New Roman", 14), bg="green", fg="white",
-           command=confirm_payment).pack(pady=20)
+    pay_button = Button(payment_window, text="Pay Now", font=("Times New Roman", 14), bg="green", fg="white",
+                        command=confirm_payment)
+    pay_button.pack(pady=20)
+    payment_window.protocol("WM_DELETE_WINDOW", cancel_payment)
+    update_countdown()
 
     
 def book_ticket(title):
-    def select_date():
-        dates = fetch_dates_for_movie(title)
-        if not dates:
-            messagebox.showerror("Error", "No dates available for this movie.")
-            return
+    schedule = {}
 
+    def select_date():
         date_window = Toplevel(root)
         date_window.title("Select Date")
         date_window.geometry("600x400")
 
         Label(date_window, text="Select a Date:", font=("Times New Roman", 14)).pack(pady=10)
         date_listbox = Listbox(date_window, font=("Times New Roman", 12), height=10)
-        for date in dates:
-            date_listbox.insert(END, date)
         date_listbox.pack(pady=20)
 
+        def on_schedule(loaded):
+            if not loaded:
+                messagebox.showerror("Error", "No dates available for this movie.")
+                date_window.destroy()
+                return
+            schedule.update(loaded)
+            for date in schedule:
+                date_listbox.insert(END, date)
+
+        def on_error(err):
+            show_db_error(err)
+            date_window.destroy()
+
+        # Tüm seans planı arka planda tek sorguyla yüklenir
+        db_worker.submit(service.fetch_schedule_for_movie, title, on_success=on_schedule, on_error=on_error, owner=date_window)
+
         def select_time():
             selected_date = date_listbox.get(ACTIVE)
             if not selected_date:
                 messagebox.showerror("Error", "Please select a date.")
                 return
 
-            times = fetch_times_for_movie(title, selected_date)
+            times = schedule.get(selected_date)
             if not times:
                 messagebox.showerror("Error", "No times available for the selected date.")
                 return
@@ -274,7 +190,7 @@ def book_ticket(title):
                     messagebox.showerror("Error", "Please select a time.")
                     return
 
-                theatres = fetch_theatres_for_movie(title, selected_date, selected_time)
+                theatres = times.get(selected_time)
                 if not theatres:
                     messagebox.showerror("Error", "No theatres available for the selected time.")
                     return
@@ -295,44 +211,42 @@ def book_ticket(title):
                         messagebox.showerror("Error", "Please select a theatre.")
                         return
 
+                    show = theatres[selected_theatre]
+
                     def ask_ticket_count():
                         count_window = Toplevel(theatre_window)
                         count_window.title("Ticket Count")
-                        count_window.geometry("400x300")
-
-                        query = """
-                            SELECT available_seats
-                            FROM showtime s
-                            JOIN movies m ON s.movie_id = m.movie_id
-                            JOIN theatre t ON s.theatre_id = t.theatre_id
-                            WHERE m.title = %s AND s.show_datetime = %s AND t.theatre_name = %s
-                        """
-                        con = connect_to_db()
-                        cursor = con.cursor()
-                        cursor.execute(query, (title, f"{selected_date} {selected_time}", selected_theatre))
-                        available_seats = cursor.fetchone()[0]
-                        con.close()
-
-                        Label(count_window, text=f"Available Seats: {available_seats}", font=("Times New Roman", 14)).pack(pady=10)
+                        count_window.geometry("400x340")
+
+                        Label(count_window, text=f"Available Seats: {show['available_seats']}", font=("Times New Roman", 14)).pack(pady=10)
+                        if show["price"] is not None:
+                            Label(count_window, text=f"Price per Ticket: ${show['price']:.2f}", font=("Times New Roman", 14)).pack()
                         Label(count_window, text="Enter Ticket Count:", font=("Times New Roman", 14)).pack(pady=10)
                         ticket_count_entry = Entry(count_window, font=("Times New Roman", 14))
                         ticket_count_entry.pack(pady=10)
 
+                        def on_hold(hold):
+                            payment_simulation(hold, selected_theatre)  # 'selected_theatre' burada tiyatro adı
+                            date_window.destroy()
+
+                        def on_hold_error(err):
+                            show_hold_error(err)
+                            date_window.destroy()
+
                         def finalize_booking():
                             try:
                                 ticket_count = int(ticket_count_entry.get())
                                 if ticket_count <= 0:
                                     raise ValueError
-                                show_id = update_seats(ticket_count, title, f"{selected_date} {selected_time}", selected_theatre)
-                                if show_id:
-                                    payment_simulation(ticket_count, show_id, selected_theatre)  # 'selected_theatre' burada tiyatro adı
-                                count_window.destroy()
-                                theatre_window.destroy()
-                                time_window.destroy()
-                                date_window.destroy()
                             except ValueError:
                                 messagebox.showerror("Error", "Please enter a valid ticket count.")
-                        Button(count_window, text="Confirm", command=finalize_booking, font=("Times New Roman", 14), bg="green", fg="white").pack(pady=20)
+                                return
+                            # The hold may wait on the show's row lock; the window stays responsive meanwhile
+                            confirm_button.config(state=DISABLED)
+                            db_worker.submit(service.place_hold, current_user_id, show["show_id"], ticket_count,
+                                             on_success=on_hold, on_error=on_hold_error, owner=count_window, timeout=0)
+                        confirm_button = Button(count_window, text="Confirm", command=finalize_booking, font=("Times New Roman", 14), bg="green", fg="white")
+                        confirm_button.pack(pady=20)
 
                     ask_ticket_count()
 
@@ -351,137 +265,141 @@ def show_reservations():
         messagebox.showerror("Error", "Please log in to view your reservations.")
         return
 
-    try:
-        con = connect_to_db()
-        cursor = con.cursor()
-
-        # Rezervasyonları getir
-        query = """
-            SELECT b.booking_id, m.title AS movie_title, t.theatre_name, s.show_datetime, b.total_price, b.b_status
-            FROM booking b
-            JOIN showtime s ON b.show_id = s.show_id
-            JOIN movies m ON s.movie_id = m.movie_id
-            JOIN theatre t ON s.theatre_id = t.theatre_id
-            WHERE b.user_id = %s
-        """
-        cursor.execute(query, (current_user_id,))
-        bookings = cursor.fetchall()
-        con.close()
-
-        reservation_window = Toplevel(root)
-        reservation_window.title("My Reservations")
-        reservation_window.geometry("900x400")
-
-        Label(reservation_window, text="Your Reservations", font=("Times New Roman", 16, "bold"), pady=10).pack()
-        if not bookings:
-            Label(reservation_window, text="No reservations found.", font=("Times New Roman", 12)).pack(pady=10)
+    reservation_window = Toplevel(root)
+    reservation_window.title("My Reservations")
+    reservation_window.geometry("900x400")
+
+    Label(reservation_window, text="Your Reservations", font=("Times New Roman", 16, "bold"), pady=10).pack()
+
+    frame = Frame(reservation_window)
+    frame.pack(fill=BOTH, expand=1, padx=10)
+    columns = ("Movie Title", "Theatre Name", "Date & Time", "Total Price", "Status")
+    tree = ttk.Treeview(frame, columns=columns, show="headings", selectmode="browse")
+    for col_name in columns:
+        tree.heading(col_name, text=col_name)
+        tree.column(col_name, width=170, anchor=CENTER)
+    scrollbar = Scrollbar(frame, orient=VERTICAL, command=tree.yview)
+    scrollbar.pack(side=RIGHT, fill=Y)
+    tree.pack(side=LEFT, fill=BOTH, expand=1)
+
+    status_label = Label(reservation_window, font=("Times New Roman", 12))
+    status_label.pack(pady=5)
+    # Bookings of long-past shows are archived and only listed on request
+    include_archived = BooleanVar(reservation_window, value=False)
+    archived_check = Checkbutton(reservation_window, text="Include past bookings", variable=include_archived,
+                                 font=("Times New Roman", 12))
+    archived_check.pack()
+    cancel_button = Button(reservation_window, text="Cancel Selected", font=("Times New Roman", 12), bg="dark red",
+                           fg="white", state=DISABLED)
+    cancel_button.pack(pady=5)
+
+    # Pages are loaded on demand as the list is scrolled towards its end;
+    # "generation" moves on when the list is restarted, so late pages are dropped
+    paging = {"next_key": None, "loading": False, "done": False, "generation": 0}
+    user_id = current_user_id
+
+    def on_page(result, generation):
+        if generation != paging["generation"]:
             return
+        rows, next_key = result
+        paging.update(loading=False, next_key=next_key, done=next_key is None)
+        for booking_id, movie_title, theatre_name, show_datetime, total_price, status in rows:
+            tree.insert("", END, iid=str(booking_id), values=(movie_title, theatre_name, show_datetime, total_price, status))
+        count = len(tree.get_children())
+        if not count:
+            status_label.config(text="No reservations found.")
+        else:
+            status_label.config(text=f"{count} reservations" + ("" if paging["done"] else " (scroll for more)"))
 
-        frame = Frame(reservation_window)
-        frame.pack(fill=BOTH, expand=1, padx=10, pady=10)
-
-        columns = ["Movie Title", "Theatre Name", "Date & Time", "Total Price", "Status", "Action"]
-        for idx, col_name in enumerate(columns):
-            Label(frame, text=col_name, font=("Times New Roman", 12, "bold"), borderwidth=2, relief="groove").grid(row=0, column=idx, sticky="nsew")
-
-        for row_idx, booking in enumerate(bookings, start=1):
-            booking_id, movie_title, theatre_name, show_datetime, total_price, status = booking
-            for col_idx, value in enumerate(booking[1:]):
-                Label(frame, text=value, font=("Times New Roman", 12), borderwidth=2, relief="groove").grid(row=row_idx, column=col_idx, sticky="nsew")
-
-            # Eğer durum 'cancelled' değilse iptal butonu ekle
-            if status != "cancelled":
-                Button(frame, text="Cancel", font=("Times New Roman", 12), bg="dark red", fg="white",
-                       command=lambda b_id=booking_id: cancel_booking(b_id)).grid(row=row_idx, column=len(columns) - 1, sticky="nsew")
-            else:
-                Label(frame, text="Cancelled", font=("Times New Roman", 12), fg="gray", borderwidth=2, relief="groove").grid(row=row_idx, column=len(columns) - 1, sticky="nsew")
-
-    except mysql.connector.Error as err:
-        messagebox.showerror("Database Error", f"Error: {err}")
-
-
-
-def cancel_booking(booking_id):
-    try:
-        con = connect_to_db()
-        cursor = con.cursor()
-
-        # İptal edilen bilet bilgilerini al
-        query = """
-            SELECT b.show_id, b.ticket_count, b.b_status
-            FROM booking b
-            WHERE b.booking_id = %s
-        """
-        cursor.execute(query, (booking_id,))
-        result = cursor.fetchone()
-
-        if not result or result[2] == "cancelled":
-            messagebox.showerror("Error", "Booking already cancelled or not found.")
+    def on_page_error(err, generation):
+        if generation != paging["generation"]:
             return
+        paging["loading"] = False
+        show_db_error(err)
 
-        show_id, cancelled_tickets, _ = result
-
-        # Rezervasyonu iptal et
-        query_update = """
-            UPDATE booking
-            SET b_status = 'cancelled'
-            WHERE booking_id = %s
-        """
-        cursor.execute(query_update, (booking_id,))
-
-        # Prosedürü çağırarak koltukları geri ekle
-        query_proc = "CALL UpdateSeatsOnCancellation(%s, %s)"
-        cursor.execute(query_proc, (cancelled_tickets, show_id))
-
-        con.commit()
+    def load_page():
+        if paging["loading"] or paging["done"]:
+            return
+        paging["loading"] = True
+        generation = paging["generation"]
+        db_worker.submit(service.fetch_reservations_page, user_id, paging["next_key"], service.RESERVATION_PAGE_SIZE,
+                         include_archived.get(),
+                         on_success=lambda result: on_page(result, generation),
+                         on_error=lambda err: on_page_error(err, generation), owner=reservation_window)
+
+    def reload():
+        paging.update(next_key=None, loading=False, done=False, generation=paging["generation"] + 1)
+        tree.delete(*tree.get_children())
+        on_select(None)
+        load_page()
+
+    def on_scroll(first, last):
+        scrollbar.set(first, last)
+        if float(last) > 0.9:
+            load_page()
+
+    def on_select(event):
+        selection = tree.selection()
+        active = selection and tree.set(selection[0], "Status") != "cancelled"
+        cancel_button.config(state=NORMAL if active else DISABLED)
+
+    def cancel_selected():
+        selection = tree.selection()
+        if selection:
+            cancel_booking(int(selection[0]), on_cancelled=lambda: mark_cancelled(selection[0]))
+
+    def mark_cancelled(iid):
+        if tree.winfo_exists() and tree.exists(iid):
+            tree.set(iid, "Status", "cancelled")
+            on_select(None)
+
+    tree.configure(yscrollcommand=on_scroll)
+    tree.bind("<<TreeviewSelect>>", on_select)
+    cancel_button.config(command=cancel_selected)
+    archived_check.config(command=reload)
+    load_page()
+
+
+def cancel_booking(booking_id, on_cancelled):
+    def on_success(show_id):
         messagebox.showinfo("Success", "Your booking has been successfully cancelled!")
-        show_reservations()
-
-    except mysql.connector.Error as err:
-        messagebox.showerror("Error", f"An error occurred while cancelling your booking: {err}")
+        on_cancelled()
 
-    finally:
-        cursor.close()
-        con.close()
+    def on_error(err):
+        if isinstance(err, service.BookingError):
+            messagebox.showerror("Error", str(err))
+        else:
+            messagebox.showerror("Error", f"An error occurred while cancelling your booking: {err}")
 
-poster_paths = {
-        "Gladiator II": r"C:\\Users\\dilar\\OneDrive\\Masaüstü\\first_part\\posters\\Gladiator_II.png",
-        "Moana 2": r"C:\\Users\\dilar\\OneDrive\\Masaüstü\\first_part\\posters\\Moana_2.png",
-        "The Bell Keeper": r"C:\\Users\\dilar\\OneDrive\\Masaüstü\\first_part\\posters\\The_Bell_Keeper.png",
-        "Here": r"C:\\Users\\dilar\\OneDrive\\Masaüstü\\first_part\\posters\\Here.png",
-        "The Last Breath": r"C:\\Users\\dilar\\OneDrive\\Masaüstü\\first_part\\posters\\The_Last_Breath.png",
-        "Wicked": r"C:\\Users\\dilar\\OneDrive\\Masaüstü\\first_part\\posters\\Wicked.png"
-    }
+    db_worker.submit(service.cancel_reservation, current_user_id, booking_id, on_success=on_success, on_error=on_error,
+                     timeout=0)
 
 # Movie details window setup
 def show_movie_details(title):
-    movie_details = fetch_movie_details(title)
-    if not movie_details:
-        messagebox.showerror("Error", "Details for this movie could not be retrieved.")
-        return
-
     details_window = Toplevel(root)
     details_window.title(f"Details - {title}")
     details_window.geometry("650x650")
 
-    details_frame = Frame(details_window, bg="black")
-    details_frame.place(relwidth=1, relheight=1)
+    def on_details(movie_details):
+        if not movie_details:
+            messagebox.showerror("Error", "Details for this movie could not be retrieved.")
+            details_window.destroy()
+            return
 
-    poster_frame = Frame(details_frame, bg="black")
-    poster_frame.grid(row=0, column=0, padx=20, pady=20)
+        details_frame = Frame(details_window, bg="black")
+        details_frame.place(relwidth=1, relheight=1)
 
-    info_frame = Frame(details_frame, bg="black")
-    info_frame.grid(row=1, column=0, padx=20, pady=10)
+        poster_frame = Frame(details_frame, bg="black")
+        poster_frame.grid(row=0, column=0, padx=20, pady=20)
 
-    button_frame = Frame(details_frame, bg="black")
-    button_frame.grid(row=0, column=1, rowspan=2, padx=20, pady=20, sticky=N)
+        info_frame = Frame(details_frame, bg="black")
+        info_frame.grid(row=1, column=0, padx=20, pady=10)
+
+        button_frame = Frame(details_frame, bg="black")
+        button_frame.grid(row=0, column=1, rowspan=2, padx=20, pady=20, sticky=N)
 
-    poster_path = poster_paths.get(title, None)
-    if poster_path:
         try:
-            poster_image = Image.open(poster_path)
-            poster_image = poster_image.resize((250, 300))
-            photo = ImageTk.PhotoImage(poster_image)
+            photo = get_photo(title, DETAIL_SIZE)
             poster_label_frame = Frame(poster_frame, bg="black")
             poster_label_frame.pack()
             Label(poster_label_frame, text=title, font=("Times New Roman", 14, "bold"), fg="white", bg="black").pack()
@@ -491,24 +409,26 @@ def show_movie_details(title):
         except FileNotFoundError:
             Label(poster_frame, text="No Poster Available", fg="white", bg="black", font=("Times New Roman", 12)).pack()
 
-    details = {
-        "Genre": movie_details[1],
-        "Duration": f"{movie_details[2]} min",
-        "Director": movie_details[3],
-        "Actors": movie_details[4],
-        "IMDB Rating": movie_details[5],
-        "Release Date": movie_details[6].strftime('%Y-%m-%d')
-    }
-
-    for key, value in details.items():
-        frame = Frame(info_frame, bg="black")
-        frame.pack(anchor=W, pady=2)
-        Label(frame, text=f"{key}: ", font=("Times New Roman", 12, "bold"), fg="white", bg="black").pack(side=LEFT)
-        Label(frame, text=value, font=("Times New Roman", 12), fg="white", bg="black").pack(side=LEFT)
-
-    Button(details_frame, text="Buy Ticket", bg="gray", fg="white", font=("Times New Roman", 16, "bold"),
-           command=lambda: book_ticket(title))\
-        .place(x=370, y=300)
+        details = {
+            "Genre": movie_details[1],
+            "Duration": f"{movie_details[2]} min",
+            "Director": movie_details[3],
+            "Actors": movie_details[4],
+            "IMDB Rating": movie_details[5],
+            "Release Date": movie_details[6].strftime('%Y-%m-%d')
+        }
+
+        for key, value in details.items():
+            frame = Frame(info_frame, bg="black")
+            frame.pack(anchor=W, pady=2)
+            Label(frame, text=f"{key}: ", font=("Times New Roman", 12, "bold"), fg="white", bg="black").pack(side=LEFT)
+            Label(frame, text=value, font=("Times New Roman", 12), fg="white", bg="black").pack(side=LEFT)
+
+        Button(details_frame, text="Buy Ticket", bg="gray", fg="white", font=("Times New Roman", 16, "bold"),
+               command=lambda: book_ticket(title))\
+            .place(x=370, y=300)
+
+    db_worker.submit(service.fetch_movie_details, title, on_success=on_details, owner=details_window)
 
 # Movie viewer window
 def film_goruntuleme():
@@ -517,9 +437,7 @@ def film_goruntuleme():
     movie_window.geometry("900x800")
     
     try:
-        background_image = Image.open(r"C:\\Users\\dilar\\OneDrive\\Masaüstü\\background2.jpeg")
-        background_image = background_image.resize((900, 800))
-        bg = ImageTk.PhotoImage(background_image)
+        bg = get_photo("background2", (900, 800))
         bg_label = Label(movie_window, image=bg)
         bg_label.image = bg
         bg_label.place(x=0, y=0, relwidth=1, relheight=1)
@@ -527,26 +445,40 @@ def film_goruntuleme():
         messagebox.showerror("Error", "Background image file not found. Please ensure the path is correct.")
 
     Button(movie_window, text="My Reservations", command=show_reservations, font=("Times New Roman", 12), bg="green", fg="white").place(x=612, y=50)
-    movies = fetch_movies()
 
-    if not movies:
-        messagebox.showerror("Error", "No movies found in the database!")
-        return
-
-    movie_frame = Frame(movie_window, bg="black")
-    movie_frame.place(relx=0.5, rely=0.55, anchor=CENTER)
+    search_bar = Frame(movie_window, bg="black")
+    search_bar.place(x=40, y=50)
+    Label(search_bar, text="Search:", font=("Times New Roman", 12), fg="white", bg="black").pack(side=LEFT)
+    entry_search = Entry(search_bar, font=("Times New Roman", 12), width=22)
+    entry_search.pack(side=LEFT, padx=5)
+    genre_box = ttk.Combobox(search_bar, values=("All genres",), state="readonly", width=14)
+    genre_box.current(0)
+    genre_box.pack(side=LEFT, padx=5)
+    rating_box = ttk.Combobox(search_bar, values=("Any rating", "5+", "6+", "7+", "8+", "9+"), state="readonly", width=10)
+    rating_box.current(0)
+    rating_box.pack(side=LEFT, padx=5)
+
+    movie_frame = None
+    # Only the latest search may fill the grid: starting one cancels the one still running
+    pending = {"after": None, "request": None}
+
+    def on_movies(movies):
+        nonlocal movie_frame
+        if movie_frame is not None:
+            movie_frame.destroy()
+        movie_frame = Frame(movie_window, bg="black")
+        movie_frame.place(relx=0.5, rely=0.55, anchor=CENTER)
+        if not movies:
+            Label(movie_frame, text="No movies found.", font=("Times New Roman", 14), fg="white", bg="black").grid(padx=30, pady=20)
+            return
 
-    for idx, movie in enumerate(movies):
-        title, duration, genre, release_date = movie
-        row = idx // 3
-        column = idx % 3
+        for idx, movie in enumerate(movies):
+            title, duration, genre, release_date = movie
+            row = idx // 3
+            column = idx % 3
 
-        poster_path = poster_paths.get(title, None)
-        if poster_path:
             try:
-                poster_image = Image.open(poster_path)
-                poster_image = poster_image.resize((142, 192))
-                photo = ImageTk.PhotoImage(poster_image)
+                photo = get_photo(title, GRID_SIZE)
                 poster_label = Label(movie_frame, image=photo, bg="black", cursor="hand2")
                 poster_label.image = photo
                 poster_label.grid(row=row * 3, column=column, padx=30, pady=20)
@@ -554,11 +486,48 @@ def film_goruntuleme():
             except FileNotFoundError:
                 Label(movie_frame, text="No Image", font=("Times New Roman", 10), fg="white", bg="black").grid(row=row * 3, column=column, padx=30, pady=20)
 
-        title_label = Label(movie_frame, text=title, font=("Times New Roman", 12, "bold"), fg="white", bg="black")
-        title_label.grid(row=row * 3 + 1, column=column, padx=30, pady=(10, 0))
-
-        details_label = Label(movie_frame, text=f"{duration} min\n{genre}", font=("Times New Roman", 12), fg="gray", bg="black")
-        details_label.grid(row=row * 3 + 2, column=column, padx=30, pady=(0, 10))
+            title_label = Label(movie_frame, text=title, font=("Times New Roman", 12, "bold"), fg="white", bg="black")
+            title_label.grid(row=row * 3 + 1, column=column, padx=30, pady=(10, 0))
+
+            details_label = Label(movie_frame, text=f"{duration} min\n{genre}", font=("Times New Roman", 12), fg="gray", bg="black")
+            details_label.grid(row=row * 3 + 2, column=column, padx=30, pady=(0, 10))
+
+    def on_genres(genres):
+        genre_box.config(values=("All genres", *genres))
+
+    def search():
+        pending["after"] = None
+        genre = genre_box.get() if genre_box.current() > 0 else None
+        min_rating = float(rating_box.get().rstrip("+")) if rating_box.current() > 0 else None
+        if pending["request"] is not None:
+            pending["request"].cancel()
+        pending["request"] = db_worker.submit(service.search_movies, entry_search.get(), genre, min_rating,
+                                              MOVIE_GRID_LIMIT, on_success=on_movies, on_error=show_db_error,
+                                              owner=movie_window)
+
+    def schedule_search(event=None):
+        # Wait for a pause in typing instead of searching on every key
+        if pending["after"] is not None:
+            movie_window.after_cancel(pending["after"])
+        pending["after"] = movie_window.after(150, search)
+
+    def cancel_search(event):
+        if event.widget is movie_window and pending["after"] is not None:
+            movie_window.after_cancel(pending["after"])
+            pending["after"] = None
+
+    entry_search.bind("<KeyRelease>", schedule_search)
+    genre_box.bind("<<ComboboxSelected>>", schedule_search)
+    rating_box.bind("<<ComboboxSelected>>", schedule_search)
+    movie_window.bind("<Destroy>", cancel_search, add="+")
+
+    movies = prefetched.pop("movies", None)
+    if movies is not None:
+        on_movies(movies)
+    else:
+        pending["request"] = db_worker.submit(service.search_movies, "", None, None, MOVIE_GRID_LIMIT,
+                                              on_success=on_movies, on_error=show_db_error, owner=movie_window)
+    db_worker.submit(service.fetch_genres, on_success=on_genres, owner=movie_window)
 
 # Add a movie to the database
 def add_movie():
@@ -572,17 +541,17 @@ def add_movie():
             messagebox.showerror("Error", "All fields are required!")
             return
 
-        try:
-            con = connect_to_db()
-            cursor = con.cursor()
-            query = "INSERT INTO movies (title, genre, duration, release_date) VALUES (%s, %s, %s, %s)"
-            cursor.execute(query, (title, genre, duration, release_date))
-            con.commit()
-            con.close()
+        def on_added(result):
             messagebox.showinfo("Success", "Movie added successfully!")
             add_window.destroy()
-        except mysql.connector.Error as err:
+
+        def on_error(err):
             messagebox.showerror("Error", f"Database error: {err}")
+            add_button.config(state=NORMAL)
+
+        add_button.config(state=DISABLED)
+        db_worker.submit(service.create_movie, title, genre, duration, release_date,
+                         on_success=on_added, on_error=on_error, owner=add_window, timeout=0)
 
     add_window = Toplevel(root)
     add_window.title("Add Movie")
@@ -604,86 +573,97 @@ def add_movie():
     entry_release_date = Entry(add_window, font=("Times New Roman", 12))
     entry_release_date.place(x=260, y=200, width=200)
 
-    Button(add_window, text="Add", command=save_movie, font=("Times New Roman", 12), bg="#458b00", fg="white").place(x=310, y=250, width=100)
+    add_button = Button(add_window, text="Add", command=save_movie, font=("Times New Roman", 12), bg="#458b00", fg="white")
+    add_button.place(x=310, y=250, width=100)
 
 # Delete a movie from the database
 def delete_movie():
-    movies = fetch_movies()
-    if not movies:
-        messagebox.showerror("Error", "No movies available for deletion.")
-        return
-
     delete_window = Toplevel(root)
     delete_window.title("Delete Movie")
     delete_window.geometry("400x350")
 
     Label(delete_window, text="Select a movie to delete:", font=("Times New Roman", 12)).pack(pady=10)
     movie_listbox = Listbox(delete_window, font=("Times New Roman", 12), height=10)
-    for movie in movies:
-        movie_listbox.insert(END, movie[0])  # Assuming movie title is in index 0
     movie_listbox.pack(pady=10)
 
+    def on_movies(movies):
+        if not movies:
+            messagebox.showerror("Error", "No movies available for deletion.")
+            delete_window.destroy()
+            return
+        for movie in movies:
+            movie_listbox.insert(END, movie[0])  # Assuming movie title is in index 0
+
+    def on_deleted(result):
+        messagebox.showinfo("Success", "Movie deleted successfully!")
+        delete_window.destroy()
+
+    def on_error(err):
+        messagebox.showerror("Error", f"Database error: {err}")
+        delete_button.config(state=NORMAL)
+
     def confirm_deletion():
         selected_movie = movie_listbox.get(ACTIVE)
         if not selected_movie:
             messagebox.showerror("Error", "Please select a movie.")
             return
 
-        try:
-            con = connect_to_db()
-            cursor = con.cursor()
-            query = "DELETE FROM movies WHERE title = %s"
-            cursor.execute(query, (selected_movie,))
-            con.commit()
-            con.close()
-            messagebox.showinfo("Success", "Movie deleted successfully!")
-            delete_window.destroy()
-        except mysql.connector.Error as err:
-            messagebox.showerror("Error", f"Database error: {err}")
+        delete_button.config(state=DISABLED)
+        db_worker.submit(service.remove_movie, selected_movie, on_success=on_deleted, on_error=on_error,
+                         owner=delete_window, timeout=0)
 
-    Button(delete_window, text="Delete", command=confirm_deletion, font=("Times New Roman", 12), bg="#a40000", fg="white").pack(pady=10)
+    delete_button = Button(delete_window, text="Delete", command=confirm_deletion, font=("Times New Roman", 12), bg="#a40000", fg="white")
+    delete_button.pack(pady=10)
+    db_worker.submit(service.fetch_movies, on_success=on_movies, on_error=show_db_error, owner=delete_window)
 
 # List movies
 def list_movies():
-    movies = fetch_movies()
-    if not movies:
-        messagebox.showerror("Error", "No movies to display.")
-        return
-
     list_window = Toplevel(root)
     list_window.title("Movies")
     list_window.geometry("600x400")
 
     Label(list_window, text="Movies List", font=("Times New Roman", 16, "bold")).pack(pady=10)
     listbox = Listbox(list_window, font=("Times New Roman", 12), height=20, width=50)
-    for movie in movies:
-        listbox.insert(END, f"{movie[0]} - {movie[1]} min - {movie[2]}")
     listbox.pack(pady=10)
 
+    def on_movies(movies):
+        if not movies:
+            messagebox.showerror("Error", "No movies to display.")
+            list_window.destroy()
+            return
+        for movie in movies:
+            listbox.insert(END, f"{movie[0]} - {movie[1]} min - {movie[2]}")
+
+    db_worker.submit(service.fetch_movies, on_success=on_movies, on_error=show_db_error, owner=list_window)
+
 # Update movie details
 def update_movie():
-    movies = fetch_movies()
-    if not movies:
-        messagebox.showerror("Error", "No movies available for updating.")
-        return
-
     update_window = Toplevel(root)
     update_window.title("Update Movie")
     update_window.geometry("400x600")
 
     Label(update_window, text="Select a movie to update:", font=("Times New Roman", 12)).pack(pady=10)
     movie_listbox = Listbox(update_window, font=("Times New Roman", 12), height=10)
-    for movie in movies:
-        movie_listbox.insert(END, movie[0])
     movie_listbox.pack(pady=10)
 
+    def on_movies(movies):
+        if not movies:
+            messagebox.showerror("Error", "No movies available for updating.")
+            update_window.destroy()
+            return
+        for movie in movies:
+            movie_listbox.insert(END, movie[0])
+
     def load_movie_details():
         selected_movie = movie_listbox.get(ACTIVE)
         if not selected_movie:
             messagebox.showerror("Error", "Please select a movie.")
             return
 
-        movie_details = fetch_movie_details(selected_movie)
+        db_worker.submit(service.fetch_movie_details, selected_movie, on_success=on_details, on_error=show_db_error,
+                         owner=update_window)
+
+    def on_details(movie_details):
         if not movie_details:
             messagebox.showerror("Error", "Could not fetch movie details.")
             return
@@ -707,21 +687,17 @@ def update_movie():
             messagebox.showerror("Error", "All fields are required!")
             return
 
-        try:
-            con = connect_to_db()
-            cursor = con.cursor()
-            query = """
-                UPDATE movies
-                SET title = %s, genre = %s, duration = %s, release_date = %s
-                WHERE title = %s
-            """
-            cursor.execute(query, (title, genre, duration, release_date, movie_listbox.get(ACTIVE)))
-            con.commit()
-            con.close()
+        def on_updated(result):
             messagebox.showinfo("Success", "Movie updated successfully!")
             update_window.destroy()
-        except mysql.connector.Error as err:
+
+        def on_error(err):
             messagebox.showerror("Error", f"Database error: {err}")
+            save_button.config(state=NORMAL)
+
+        save_button.config(state=DISABLED)
+        db_worker.submit(service.edit_movie, movie_listbox.get(ACTIVE), title, genre, duration, release_date,
+                         on_success=on_updated, on_error=on_error, owner=update_window, timeout=0)
 
     entry_title = Entry(update_window, font=("Times New Roman", 12))
     entry_genre = Entry(update_window, font=("Times New Roman", 12))
@@ -737,13 +713,249 @@ def update_movie():
     entry_duration.pack()
     Label(update_window, text="Release Date:", font=("Times New Roman", 12)).pack()
     entry_release_date.pack()
-    Button(update_window, text="Save", command=save_updated_movie, font=("Times New Roman", 12), bg="orange", fg="white").pack(pady=10)
+    save_button = Button(update_window, text="Save", command=save_updated_movie, font=("Times New Roman", 12), bg="orange", fg="white")
+    save_button.pack(pady=10)
+    db_worker.submit(service.fetch_movies, on_success=on_movies, on_error=show_db_error, owner=update_window)
+
+# Connection pool and seat hold statistics
+def show_pool_stats():
+    stats_window = Toplevel(root)
+    stats_window.title("Statistics")
+    stats_window.geometry("400x880")
+
+    sections = [("Connection Pool", service.db_pool.stats()), ("Seat Holds", service.hold_stats()),
+                ("Catalog Cache", service.catalog_cache.stats()),
+                ("Read Routing", service.read_router.stats())]
+    for section_title, stats in sections:
+        Label(stats_window, text=section_title, font=("Times New Roman", 16, "bold")).pack(pady=10)
+        listbox = Listbox(stats_window, font=("Times New Roman", 12), height=len(stats), width=40)
+        for key, value in stats.items():
+            if key == "conversion_rate":
+                value = f"{value:.0%}"
+            elif isinstance(value, float):
+                value = f"{value * 1000:.2f} ms"
+            listbox.insert(END, f"{key}: {value}")
+        listbox.pack(pady=5)
+
+def cancel_show_window():
+    cancel_window = Toplevel(root)
+    cancel_window.title("Cancel Show")
+    cancel_window.geometry("500x300")
+
+    Label(cancel_window, text="Show ID:", font=("Times New Roman", 12)).pack(pady=(20, 5))
+    entry_show_id = Entry(cancel_window, font=("Times New Roman", 12))
+    entry_show_id.pack()
+    info_label = Label(cancel_window, font=("Times New Roman", 12), justify=LEFT)
+    info_label.pack(pady=10)
+
+    def read_show_id():
+        try:
+            return int(entry_show_id.get())
+        except ValueError:
+            messagebox.showerror("Error", "Show ID must be a number.", parent=cancel_window)
+            return None
+
+    def on_cancelled(summary):
+        info_label.config(text="")
+        messagebox.showinfo("Show Cancelled", (
+            f"Bookings cancelled: {summary['bookings_cancelled']}\n"
+            f"Seats restored: {summary['tickets_restored']}\n"
+            f"Payments refunded: {summary['payments_refunded']} ({summary['refunded_amount']})\n"
+            f"Pending payments failed: {summary['payments_failed']}"), parent=cancel_window)
+
+    def on_error(err):
+        if isinstance(err, service.BookingError):
+            messagebox.showerror("Error", str(err), parent=cancel_window)
+        else:
+            show_db_error(err)
+
+    def on_summary(show_id, show):
+        if show is None:
+            messagebox.showerror("Error", "Show not found.", parent=cancel_window)
+            return
+        title, theatre_name, show_datetime, bookings, tickets = show
+        info_label.config(text=f"{title}\n{theatre_name}, {show_datetime}\n{bookings} bookings, {tickets} seats")
+        if messagebox.askyesno("Cancel Show", f"Cancel all {bookings} bookings of {title} at {show_datetime}?", parent=cancel_window):
+            db_worker.submit(service.cancel_show, show_id, on_success=on_cancelled, on_error=on_error, owner=cancel_window,
+                             timeout=0)
+
+    def start_cancel():
+        show_id = read_show_id()
+        if show_id is not None:
+            db_worker.submit(service.fetch_show_summary, show_id, on_success=lambda show: on_summary(show_id, show), on_error=show_db_error, owner=cancel_window)
+
+    Button(cancel_window, text="Cancel Show", command=start_cancel, font=("Times New Roman", 12), bg="#a40000", fg="white").pack(pady=10)
+
+
+def import_csv():
+    from bulk_import import DEFAULT_BATCH_SIZE, run_import
+
+    import_window = Toplevel(root)
+    import_window.title("Import CSV")
+    import_window.geometry("700x520")
+
+    paths = {"movies": StringVar(import_window), "showtimes": StringVar(import_window)}
+    for row, (kind, columns) in enumerate((("movies", "title, genre, duration, release_date[, rating, director, actors]"),
+                                           ("showtimes", "title, theatre_name, show_datetime, base_price"))):
+        Label(import_window, text=f"{kind.capitalize()} CSV:", font=("Times New Roman", 12)).grid(row=row * 2, column=0, padx=10, pady=(10, 0), sticky=W)
+        Entry(import_window, textvariable=paths[kind], font=("Times New Roman", 12), width=45).grid(row=row * 2, column=1, pady=(10, 0))
+        Button(import_window, text="Browse", font=("Times New Roman", 12),
+               command=lambda var=paths[kind]: var.set(filedialog.askopenfilename(
+                   parent=import_window, filetypes=[("CSV files", "*.csv"), ("All files", "*")]) or var.get())
+               ).grid(row=row * 2, column=2, padx=10, pady=(10, 0))
+        Label(import_window, text=columns, font=("Times New Roman", 10, "italic"), fg="gray").grid(row=row * 2 + 1, column=1, sticky=W)
+
+    Label(import_window, text="Batch size:", font=("Times New Roman", 12)).grid(row=4, column=0, padx=10, pady=10, sticky=W)
+    entry_batch_size = Entry(import_window, font=("Times New Roman", 12), width=10)
+    entry_batch_size.insert(0, str(DEFAULT_BATCH_SIZE))
+    entry_batch_size.grid(row=4, column=1, sticky=W)
+    dry_run = BooleanVar(import_window, value=True)
+    Checkbutton(import_window, text="Dry run (validate only)", variable=dry_run, font=("Times New Roman", 12)).grid(row=5, column=1, sticky=W)
+
+    report = Listbox(import_window, font=("Courier", 10), width=90, height=16)
+    report.grid(row=7, column=0, columnspan=3, padx=10, pady=10)
+
+    def on_done(results):
+        run_button.config(state=NORMAL)
+        report.delete(0, END)
+        if any(result.kind == "movies" and result.imported and not result.dry_run for result in results):
+            service.catalog_changed()
+        for result in results:
+            report.insert(END, result.summary())
+            for line, message in result.errors:
+                report.insert(END, f"  line {line}: {message}")
+
+    def on_error(err):
+        run_button.config(state=NORMAL)
+        if isinstance(err, (OSError, ValueError)):
+            messagebox.showerror("Error", f"Import failed: {err}", parent=import_window)
+        else:
+            show_db_error(err)
+
+    def start_import():
+        movies_path, showtimes_path = paths["movies"].get().strip(), paths["showtimes"].get().strip()
+        if not movies_path and not showtimes_path:
+            messagebox.showerror("Error", "Choose a movies and/or showtimes CSV file.", parent=import_window)
+            return
+        try:
+            batch_size = int(entry_batch_size.get())
+            if batch_size <= 0:
+                raise ValueError
+        except ValueError:
+            messagebox.showerror("Error", "Batch size must be a positive number.", parent=import_window)
+            return
+        run_button.config(state=DISABLED)
+        report.delete(0, END)
+        db_worker.submit(run_import, service.db_pool, movies_path or None, showtimes_path or None, batch_size, dry_run.get(),
+                         service.price_table, service.shards, on_success=on_done, on_error=on_error, owner=import_window, timeout=0)
+
+    run_button = Button(import_window, text="Import", command=start_import, font=("Times New Roman", 12), bg="#458b00", fg="white")
+    run_button.grid(row=6, column=1, pady=5)
+
+
+def show_performance():
+    perf_window = Toplevel(root)
+    perf_window.title("Performance")
+    perf_window.geometry("1000x520")
+
+    summary_label = Label(perf_window, font=("Times New Roman", 12), justify=LEFT)
+    summary_label.pack(pady=10)
+
+    columns = ("count", "p50", "p95", "p99", "max", "rows", "errors")
+    tree = ttk.Treeview(perf_window, columns=columns, height=16)
+    tree.heading("#0", text="Statement")
+    tree.column("#0", width=520)
+    for column in columns:
+        tree.heading(column, text=column if column in ("count", "rows", "errors") else f"{column} (ms)")
+        tree.column(column, width=65, anchor=E)
+    tree.pack(fill=BOTH, expand=True, padx=10)
+
+    def refresh():
+        summary = service.query_stats.summary()
+        summary_label.config(text=(
+            f"{summary['executions']} executions of {summary['statements']} statements, "
+            f"{summary['errors']} errors, {summary['slow_queries']} slow queries\n"
+            f"Connection wait: {summary['connection_waits']} checkouts, p50 {summary['wait_p50'] * 1000:.2f} ms, "
+            f"p99 {summary['wait_p99'] * 1000:.2f} ms, max {summary['wait_max'] * 1000:.2f} ms"))
+        tree.delete(*tree.get_children())
+        for row in service.query_stats.snapshot():
+            tree.insert("", END, text=row["statement"], values=(
+                row["count"], *(f"{row[key] * 1000:.2f}" for key in ("p50", "p95", "p99", "max")), row["rows"], row["errors"]))
+
+    def export():
+        try:
+            path = service.write_metrics()
+        except OSError as err:
+            messagebox.showerror("Error", f"Could not write metrics: {err}")
+            return
+        messagebox.showinfo("Performance", f"Metrics written to {os.path.abspath(path)}")
+
+    def reset():
+        service.query_stats.reset()
+        refresh()
+
+    buttons = Frame(perf_window)
+    buttons.pack(pady=10)
+    Button(buttons, text="Refresh", command=refresh, font=("Times New Roman", 12)).pack(side=LEFT, padx=5)
+    Button(buttons, text="Export", command=export, font=("Times New Roman", 12)).pack(side=LEFT, padx=5)
+    Button(buttons, text="Reset", command=reset, font=("Times New Roman", 12)).pack(side=LEFT, padx=5)
+    refresh()
+
+def show_dashboard():
+    dashboard_window = Toplevel(root)
+    dashboard_window.title("Dashboard")
+    dashboard_window.geometry("900x560")
+
+    totals_label = Label(dashboard_window, font=("Times New Roman", 12), justify=LEFT)
+    totals_label.pack(pady=10)
+
+    notebook = ttk.Notebook(dashboard_window)
+    notebook.pack(fill=BOTH, expand=True, padx=10)
+
+    def add_tab(title, headings):
+        tree = ttk.Treeview(notebook, columns=[name for name, _ in headings], show="headings", height=16)
+        for name, width in headings:
+            tree.heading(name, text=name)
+            tree.column(name, width=width, anchor=W if width > 100 else E)
+        notebook.add(tree, text=title)
+        return tree
+
+    shows_tree = add_tab("Shows", (("Date", 90), ("Show", 60), ("Movie", 220), ("Theatre", 140),
+                                   ("Sold", 60), ("Capacity", 70), ("Occupancy", 80), ("Revenue", 90)))
+    movies_tree = add_tab("Movies by day", (("Date", 90), ("Movie", 260), ("Bookings", 80), ("Sold", 80), ("Revenue", 90)))
+    theatres_tree = add_tab("Theatres by day", (("Date", 90), ("Theatre", 180), ("Shows", 60), ("Sold", 70),
+                                                ("Capacity", 80), ("Occupancy", 80), ("Revenue", 90)))
+
+    def percent(tickets, capacity):
+        return f"{service.occupancy(tickets, capacity):.0%}"
+
+    def on_loaded(data):
+        bookings, tickets, capacity, revenue = data["totals"]
+        totals_label.config(text=(
+            f"Last {service.DASHBOARD_DAYS} days and upcoming shows: {bookings} bookings, {tickets} tickets, "
+            f"{percent(tickets, capacity)} occupancy, ${revenue:.2f} revenue"))
+        for tree in (shows_tree, movies_tree, theatres_tree):
+            tree.delete(*tree.get_children())
+        for show_id, title, theatre_name, show_date, sold, seats, _, amount in data["shows"]:
+            shows_tree.insert("", END, values=(show_date, show_id, title or "", theatre_name or "", sold, seats,
+                                               percent(sold, seats), amount))
+        for show_date, title, day_bookings, sold, amount in data["movies"]:
+            movies_tree.insert("", END, values=(show_date, title or "", day_bookings, sold, amount))
+        for show_date, theatre_name, shows, sold, seats, amount in data["theatres"]:
+            theatres_tree.insert("", END, values=(show_date, theatre_name or "", shows, sold, seats,
+                                                  percent(sold, seats), amount))
+
+    def refresh():
+        db_worker.submit(service.fetch_dashboard, on_success=on_loaded, on_error=show_db_error, owner=dashboard_window)
+
+    Button(dashboard_window, text="Refresh", command=refresh, font=("Times New Roman", 12)).pack(pady=10)
+    refresh()
 
 # Admin panel
 def admin_panel():
     admin_window = Toplevel(root)
     admin_window.title("Admin Panel")
-    admin_window.geometry("600x400")
+    admin_window.geometry("600x720")
 
     Label(admin_window, text="Admin Panel", font=("Times New Roman", 16, "bold")).pack(pady=20)
 
@@ -751,6 +963,11 @@ def admin_panel():
     Button(admin_window, text="Delete Movie", command=delete_movie, font=("Times New Roman", 14), bg="#a40000", fg="white").pack(pady=10)
     Button(admin_window, text="Update Movie", command=update_movie, font=("Times New Roman", 14), bg="orange", fg="white").pack(pady=10)
     Button(admin_window, text="List Movies", command=list_movies, font=("Times New Roman", 14), bg="#191970", fg="white").pack(pady=10)
+    Button(admin_window, text="Cancel Show", command=cancel_show_window, font=("Times New Roman", 14), bg="#a40000", fg="white").pack(pady=10)
+    Button(admin_window, text="Import CSV", command=import_csv, font=("Times New Roman", 14), bg="#191970", fg="white").pack(pady=10)
+    Button(admin_window, text="Statistics", command=show_pool_stats, font=("Times New Roman", 14), bg="gray", fg="white").pack(pady=10)
+    Button(admin_window, text="Performance", command=show_performance, font=("Times New Roman", 14), bg="gray", fg="white").pack(pady=10)
+    Button(admin_window, text="Dashboard", command=show_dashboard, font=("Times New Roman", 14), bg="#191970", fg="white").pack(pady=10)
 
 
 # Admin login
@@ -790,30 +1007,24 @@ def register_user():
         messagebox.showerror("Error", "All fields are required!")
         return
 
-    try:
-        con = connect_to_db()
-        cursor = con.cursor()
-
-        check_query = "SELECT * FROM users WHERE email=%s"
-        cursor.execute(check_query, (email,))
-        existing_user = cursor.fetchone()
-
-        if existing_user:
-            messagebox.showerror("Error", "This email is already registered. Please use a different email.")
-            return
-
-        query = "INSERT INTO users (user_name, password, email) VALUES (%s, %s, %s)"
-        cursor.execute(query, (username, password, email))
-        con.commit()
-        con.close()
+    def on_registered(user_id):
         messagebox.showinfo("Success", "Registration successful!")
         reg_window.destroy()
-    except mysql.connector.Error as err:
-        messagebox.showerror("Error", f"Database error: {err}")
+
+    def on_error(err):
+        if isinstance(err, service.BookingError):
+            messagebox.showerror("Error", str(err))
+        else:
+            messagebox.showerror("Error", f"Database error: {err}")
+        reg_button.config(state=NORMAL)
+
+    reg_button.config(state=DISABLED)
+    db_worker.submit(service.create_user, username, password, email, on_success=on_registered, on_error=on_error,
+                     owner=reg_window, timeout=0)
 
 # Register window
 def register():
-    global reg_window, reg_entry_username, reg_entry_password, reg_entry_email
+    global reg_window, reg_entry_username, reg_entry_password, reg_entry_email, reg_button
     reg_window = Toplevel(root)
     reg_window.title("Register")
     reg_window.geometry("400x300")
@@ -830,37 +1041,93 @@ def register():
     reg_entry_email = Entry(reg_window, font=("Times New Roman", 14))
     reg_entry_email.place(x=150, y=150, width=200)
 
-    Button(reg_window, text="Sign Up", command=register_user, font=("Times New Roman", 14), bg="#4f94cd", fg="white").place(x=150, y=200, width=100)
-
-# Main window (Login)
-root = Tk()
-root.title("Welcome Screen")
-root.geometry("800x600")
+    reg_button = Button(reg_window, text="Sign Up", command=register_user, font=("Times New Roman", 14), bg="#4f94cd", fg="white")
+    reg_button.place(x=150, y=200, width=100)
 
-try:
-    background_image = Image.open(r"C:\\Users\\dilar\\OneDrive\\Masaüstü\\background.jpeg")
-    background_image = background_image.resize((800, 600))
-    bg = ImageTk.PhotoImage(background_image)
+def load_background():
+    global bg
+    try:
+        bg = get_photo("background", (800, 600))
+    except FileNotFoundError:
+        messagebox.showerror("Error", "Background image file not found. Please ensure the path is correct.")
+        return
     bg_label = Label(root, image=bg)
     bg_label.place(x=0, y=0, relwidth=1, relheight=1)
-except FileNotFoundError:
-    messagebox.showerror("Error", "Background image file not found. Please ensure the path is correct.")
-    
-frame = Frame(root, bg="black")
-frame.place(x=375, y=150, width=400, height=300)
+    bg_label.lower()
+
+
+def warm_up():
+    """Runs after the first frame: imports the booking core, opens a pooled connection and loads the catalog."""
+    try:
+        service.recover_holds()
+        service.start_holds()
+        service.start_metrics_export()
+        prefetched["movies"] = service.search_movies(limit=MOVIE_GRID_LIMIT)
+    except service.DatabaseError as err:
+        print(f"Database error: {err}")
+    precompute_thumbnails()
+
+
+def build_login_window():
+    global root, db_worker, frame, entry_username, entry_password
+
+    root = Tk()
+    root.title("Welcome Screen")
+    root.geometry("800x600")
+    root.configure(bg="black")
+
+    db_worker = DBWorker(
+        root,
+        max_workers=int(os.getenv("DB_WORKERS", "4")),
+        timeout=float(os.getenv("DB_QUERY_TIMEOUT", "10")),
+    )
+
+    frame = Frame(root, bg="black")
+    frame.place(x=375, y=150, width=400, height=300)
+
+    Label(frame, text="Username:", font=("Times New Roman", 16), bg="black", fg="white").place(x=20, y=50)
+    entry_username = Entry(frame, font=("Times New Roman", 14))
+    entry_username.place(x=150, y=50, width=200)
+
+    Label(frame, text="Password:", font=("Times New Roman", 16), bg="black", fg="white").place(x=20, y=100)
+    entry_password = Entry(frame, show="*", font=("Times New Roman", 14))
+    entry_password.place(x=150, y=100, width=200)
+
+    Button(frame, text="Log In", command=user_login, font=("Times New Roman", 14), bg="#a38c3d", fg="white").place(x=50, y=200, width=120)
+    Button(frame, text="Sign Up", command=register, font=("Times New Roman", 14), bg="#654321", fg="white").place(x=200, y=200, width=120)
 
-Label(frame, text="Username:", font=("Times New Roman", 16), bg="black", fg="white").place(x=20, y=50)
-entry_username = Entry(frame, font=("Times New Roman", 14))
-entry_username.place(x=150, y=50, width=200)
+    # Admin login button
+    Button(frame, text="Admin Login", command=admin_login_window, font=("Times New Roman", 14), bg="#6f7a11", fg="white").place(x=125, y=250, width=120)
+
+
+def main(argv=None):
+    """Starts the app. With --first-frame-probe it prints the seconds from
+    STARTUP_T0 (or module import) to the first drawn frame and exits."""
+    argv = sys.argv[1:] if argv is None else argv
+    probe = "--first-frame-probe" in argv
+
+    build_login_window()
+
+    def after_first_frame():
+        if probe:
+            elapsed = time.time() - float(os.getenv("STARTUP_T0", _imported_at))
+            print(f"first_frame {elapsed:.4f}")
+            root.destroy()
+            return
+        # Posters and the background are decoded only once the login form is on screen
+        load_background()
+        threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
 
-Label(frame, text="Password:", font=("Times New Roman", 16), bg="black", fg="white").place(x=20, y=100)
-entry_password = Entry(frame, show="*", font=("Times New Roman", 14))
-entry_password.place(x=150, y=100, width=200)
+    root.update_idletasks()
+    root.after(0, after_first_frame)
+    root.mainloop()
 
-Button(frame, text="Log In", command=user_login, font=("Times New Roman", 14), bg="#a38c3d", fg="white").place(x=50, y=200, width=120)
-Button(frame, text="Sign Up", command=register, font=("Times New Roman", 14), bg="#654321", fg="white").place(x=200, y=200, width=120)
+    db_worker.shutdown()
+    if "booking_service" in sys.modules:
+        service.stop_holds()
+        service.shards.close()
+        service.db_pool.close()
 
-# Admin login button
-Button(frame, text="Admin Login", command=admin_login_window, font=("Times New Roman", 14), bg="#6f7a11", fg="white").place(x=125, y=250, width=120)
 
-root.mainloop()
\ No newline at end of file
+if __name__ == "__main__":
+    main()
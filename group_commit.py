@@ -0,0 +1,196 @@
+"""Group commit: concurrent checkouts share one database commit.
+
+Every commit waits for the database to flush its log to disk (an fsync
+with InnoDB's default innodb_flush_log_at_trx_commit=1), and on a busy
+night those flushes rather than the statements cap the checkouts per
+second. GroupCommitter stands in for the connection pool in
+run_in_transaction: the transactions handed to it run one after another
+on a single connection, each inside its own savepoint, and are committed
+together. A caller's commit() returns only once the shared commit is
+done, so a checkout is still reported only after it is durable.
+
+A transaction that raises is rolled back to its savepoint and leaves the
+rest of its batch alone. A deadlock or lock wait timeout may have rolled
+back the whole database transaction, so it fails the batch instead:
+every member gets the error and run_in_transaction runs it again.
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+from storage import DatabaseError, backend
+
+
+class _Batch:
+    __slots__ = ("con", "members", "done", "error")
+
+    def __init__(self, con):
+        self.con = con
+        self.members = 0  # transactions released from their savepoint, waiting for the commit
+        self.done = threading.Event()
+        self.error = None
+
+
+class _Member:
+    """What a transaction sees as its connection: cursor() and commit()."""
+
+    def __init__(self, committer, batch):
+        self._committer = committer
+        self._batch = batch
+        self.joined = False
+
+    def cursor(self, *args, **kwargs):
+        return self._batch.con.cursor(*args, **kwargs)
+
+    def commit(self):
+        self._committer._join(self)
+
+
+class GroupCommitter:
+    """Batches the transactions of concurrent callers into shared commits.
+
+    Used like the pool it wraps::
+
+        with committer.connection() as con:
+            ...
+            con.commit()
+
+    The first transaction of a batch commits it. If other callers are
+    queued behind it, it waits up to max_wait seconds for them (or until
+    max_batch have joined); a lone caller commits at once, so a quiet
+    system pays nothing for the batching.
+    """
+
+    def __init__(self, pool, max_batch=32, max_wait=0.005):
+        self.pool = pool
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        # Held while a transaction runs on the batch connection, and while the batch commits
+        self._turn = threading.Lock()
+        self._cond = threading.Condition()
+        self._batch = None
+        self._waiting = 0  # callers inside connection() not yet in a batch
+
+        self._commits = 0
+        self._transactions = 0
+        self._largest = 0
+        self._failed = 0
+
+    @contextmanager
+    def connection(self):
+        with self._cond:
+            self._waiting += 1
+        batch = self._enter()
+        member = _Member(self, batch)
+        try:
+            yield member
+        except BaseException as err:
+            if not member.joined:
+                self._abandon(batch, err)
+            raise
+        else:
+            if not member.joined:
+                self._abandon(batch, None)
+
+    def _enter(self):
+        while True:
+            self._turn.acquire()
+            batch = self._batch
+            if batch is None or batch.members < self.max_batch:
+                break
+            # Full: let its first member commit it, then start the next one
+            self._turn.release()
+            batch.done.wait()
+        try:
+            if batch is None:
+                batch = self._batch = _Batch(self.pool.acquire())
+            batch.con.cursor().execute("SAVEPOINT checkout")
+        except BaseException as err:
+            self._abandon(batch, err, savepoint=False)
+            raise
+        return batch
+
+    def _abandon(self, batch, err, savepoint=True):
+        # Called holding the turn by a transaction that will not commit
+        try:
+            if batch is None:
+                return
+            if isinstance(err, DatabaseError) and backend.is_retryable(err):
+                self._end(batch, err)
+                return
+            try:
+                if savepoint:
+                    cursor = batch.con.cursor()
+                    cursor.execute("ROLLBACK TO SAVEPOINT checkout")
+                    cursor.execute("RELEASE SAVEPOINT checkout")
+            except DatabaseError as rollback_err:
+                self._end(batch, rollback_err)
+            else:
+                if batch.members == 0:
+                    # Nobody left to commit it: give the connection back rather than keep its locks
+                    self._end(batch, None)
+        finally:
+            with self._cond:
+                self._waiting -= 1
+                self._cond.notify_all()
+            self._turn.release()
+
+    def _end(self, batch, error):
+        # Called holding the turn; the pool rolls back whatever was not committed
+        if self._batch is batch:
+            self._batch = None
+        self.pool.release(batch.con)
+        batch.error = error
+        if error is not None and batch.members:
+            with self._cond:
+                self._failed += 1
+        batch.done.set()
+
+    def _join(self, member):
+        batch = member._batch
+        batch.con.cursor().execute("RELEASE SAVEPOINT checkout")
+        with self._cond:
+            batch.members += 1
+            self._waiting -= 1
+            leader = batch.members == 1
+            self._cond.notify_all()
+        member.joined = True
+        self._turn.release()
+        if leader:
+            self._commit(batch)
+        batch.done.wait()
+        if batch.error is not None:
+            raise batch.error
+
+    def _commit(self, batch):
+        deadline = time.monotonic() + self.max_wait
+        with self._cond:
+            while batch.members < self.max_batch and self._waiting and not batch.done.is_set():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+        with self._turn:
+            if batch.done.is_set():
+                return  # failed by a deadlock while we waited
+            self._batch = None
+            try:
+                batch.con.commit()
+            except Exception as err:
+                self._end(batch, err)
+                return
+            with self._cond:
+                self._commits += 1
+                self._transactions += batch.members
+                self._largest = max(self._largest, batch.members)
+            self._end(batch, None)
+
+    def stats(self):
+        with self._cond:
+            return {
+                "commits": self._commits,
+                "transactions": self._transactions,
+                "avg_batch": self._transactions / self._commits if self._commits else 0.0,
+                "largest_batch": self._largest,
+                "failed_batches": self._failed,
+            }
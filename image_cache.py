@@ -0,0 +1,117 @@
+import os
+import threading
+from collections import OrderedDict
+from tkinter import PhotoImage
+
+IMAGES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "images")
+THUMBNAIL_DIR = os.getenv("IMAGE_CACHE_DIR", os.path.join(IMAGES_DIR, ".thumbnails"))
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg")
+
+GRID_SIZE = (142, 192)
+DETAIL_SIZE = (250, 300)
+
+_thumbnail_lock = threading.Lock()
+
+
+def find_image(name):
+    """Path of images/<name> with any known extension; spaces may be underscores."""
+    stem = name.replace(" ", "_")
+    for candidate in (name, stem):
+        for extension in ("",) + IMAGE_EXTENSIONS:
+            path = os.path.join(IMAGES_DIR, candidate + extension)
+            if os.path.isfile(path):
+                return path
+    raise FileNotFoundError(f"No image found for {name!r} in {IMAGES_DIR}")
+
+
+def thumbnail_path(source, size):
+    """Pre-sized PNG copy of `source`, created on first use and whenever the source changes."""
+    mtime = os.stat(source).st_mtime_ns
+    stem = os.path.splitext(os.path.basename(source))[0]
+    prefix = f"{stem}_{size[0]}x{size[1]}_"
+    path = os.path.join(THUMBNAIL_DIR, f"{prefix}{mtime}.png")
+    if os.path.isfile(path):
+        return path
+
+    with _thumbnail_lock:
+        if os.path.isfile(path):
+            return path
+        # PIL is only needed when a thumbnail has to be (re)built, so it is not imported at startup
+        from PIL import Image
+
+        os.makedirs(THUMBNAIL_DIR, exist_ok=True)
+        with Image.open(source) as image:
+            thumbnail = image.convert("RGBA").resize(size)
+        # Write under a temporary name so a half-written file is never picked up
+        temporary = path + ".tmp"
+        thumbnail.save(temporary, "PNG")
+        os.replace(temporary, path)
+        for name in os.listdir(THUMBNAIL_DIR):
+            if name.startswith(prefix) and name.endswith(".png") and os.path.join(THUMBNAIL_DIR, name) != path:
+                os.remove(os.path.join(THUMBNAIL_DIR, name))
+    return path
+
+
+def precompute_thumbnails(sizes=(GRID_SIZE, DETAIL_SIZE)):
+    """Builds any missing poster thumbnails; safe to run in a background thread."""
+    built = 0
+    for name in sorted(os.listdir(IMAGES_DIR)):
+        source = os.path.join(IMAGES_DIR, name)
+        if not os.path.isfile(source) or not name.lower().endswith(IMAGE_EXTENSIONS):
+            continue
+        for size in sizes:
+            try:
+                thumbnail_path(source, size)
+                built += 1
+            except OSError as err:
+                print(f"Thumbnail error for {name}: {err}")
+    return built
+
+
+class PhotoCache:
+    """LRU of decoded PhotoImage objects, bounded by their pixel memory."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._photos = OrderedDict()  # (path, mtime, size) -> (PhotoImage, bytes)
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, source, size):
+        key = (source, os.stat(source).st_mtime_ns, size)
+        entry = self._photos.get(key)
+        if entry is not None:
+            self._photos.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+        self.misses += 1
+        photo = PhotoImage(file=thumbnail_path(source, size))
+        cost = size[0] * size[1] * 4
+        self._photos[key] = (photo, cost)
+        self._bytes += cost
+        while self._bytes > self.max_bytes and len(self._photos) > 1:
+            _, (_, evicted_cost) = self._photos.popitem(last=False)
+            self._bytes -= evicted_cost
+        return photo
+
+    def stats(self):
+        return {
+            "images": len(self._photos),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+photo_cache = PhotoCache(int(float(os.getenv("IMAGE_CACHE_MB", "32")) * 1024 * 1024))
+
+
+def get_photo(name, size):
+    """PhotoImage of images/<name> at `size`; raises FileNotFoundError if it is missing.
+
+    Must be called from the Tk main thread.
+    """
+    return photo_cache.get(find_image(name), size)
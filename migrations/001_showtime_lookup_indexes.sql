@@ -0,0 +1,10 @@
+-- Showtime lookups filter on movie_id plus a show_datetime range, and every
+-- lookup resolves the movie by title first.
+USE `database_project`;
+
+ALTER TABLE `showtime`
+  ADD KEY `idx_movie_show_datetime` (`movie_id`,`show_datetime`),
+  DROP KEY `idx_movie_id`;
+
+ALTER TABLE `movies`
+  ADD UNIQUE KEY `uq_movies_title` (`title`);
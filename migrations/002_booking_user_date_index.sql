@@ -0,0 +1,18 @@
+-- My Reservations pages through a user's bookings newest first on
+-- (booking_date, booking_id). The index below serves that scan on its own:
+-- InnoDB appends the primary key, so it holds (user_id, booking_date, booking_id).
+-- Keyset pagination needs booking_date to be set, so old rows without one
+-- take their show time and new rows default to the insert time.
+USE `database_project`;
+
+UPDATE `booking` b
+JOIN `showtime` s ON s.show_id = b.show_id
+SET b.booking_date = s.show_datetime
+WHERE b.booking_date IS NULL;
+
+UPDATE `booking` SET `booking_date` = CURRENT_TIMESTAMP WHERE `booking_date` IS NULL;
+
+ALTER TABLE `booking`
+  MODIFY `booking_date` datetime NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  ADD KEY `idx_user_booking_date` (`user_id`,`booking_date`),
+  DROP KEY `fk_user_id`;
@@ -0,0 +1,5 @@
+-- Cancelling a whole show refunds its paid bookings; unpaid ones are marked failed.
+USE `database_project`;
+
+ALTER TABLE `payments`
+  MODIFY `p_status` enum('paid','failed','pending','refunded') DEFAULT 'pending';
@@ -0,0 +1,38 @@
+-- Occupancy and revenue summaries of confirmed bookings for the admin
+-- dashboard, kept up to date by the booking code in the same transaction
+-- as each booking or cancellation. After applying this file, fill them from
+-- the existing bookings with: python analytics.py rebuild
+USE `database_project`;
+
+CREATE TABLE `show_stats` (
+  `show_id` int NOT NULL,
+  `movie_id` int DEFAULT NULL,
+  `theatre_id` int DEFAULT NULL,
+  `show_date` date NOT NULL,
+  `capacity` int NOT NULL DEFAULT '0',
+  `bookings` int NOT NULL DEFAULT '0',
+  `tickets_sold` int NOT NULL DEFAULT '0',
+  `revenue` decimal(12,2) NOT NULL DEFAULT '0.00',
+  PRIMARY KEY (`show_id`),
+  KEY `idx_show_stats_date` (`show_date`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb3;
+
+CREATE TABLE `movie_day_stats` (
+  `movie_id` int NOT NULL,
+  `show_date` date NOT NULL,
+  `bookings` int NOT NULL DEFAULT '0',
+  `tickets_sold` int NOT NULL DEFAULT '0',
+  `revenue` decimal(12,2) NOT NULL DEFAULT '0.00',
+  PRIMARY KEY (`movie_id`,`show_date`),
+  KEY `idx_movie_day_stats_date` (`show_date`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb3;
+
+CREATE TABLE `theatre_day_stats` (
+  `theatre_id` int NOT NULL,
+  `show_date` date NOT NULL,
+  `bookings` int NOT NULL DEFAULT '0',
+  `tickets_sold` int NOT NULL DEFAULT '0',
+  `revenue` decimal(12,2) NOT NULL DEFAULT '0.00',
+  PRIMARY KEY (`theatre_id`,`show_date`),
+  KEY `idx_theatre_day_stats_date` (`show_date`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb3;
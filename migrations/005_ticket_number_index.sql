@@ -0,0 +1,7 @@
+-- Tickets are issued when a booking is confirmed and checked at the door by
+-- their number, so ticket_number is unique and indexed. The table was not
+-- written to before this change, so no existing rows can collide.
+USE `database_project`;
+
+ALTER TABLE `tickets`
+  ADD UNIQUE KEY `idx_tickets_number` (`ticket_number`);
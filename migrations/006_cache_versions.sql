@@ -0,0 +1,10 @@
+-- Processes cache the movie catalog in memory. Every change to the movies
+-- table bumps the 'catalog' row here in the same transaction, and each
+-- process reads this one row to tell whether its copy is still current.
+USE `database_project`;
+
+CREATE TABLE `cache_versions` (
+  `name` varchar(50) NOT NULL,
+  `version` int NOT NULL DEFAULT '0',
+  PRIMARY KEY (`name`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb3;
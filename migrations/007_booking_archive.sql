@@ -0,0 +1,67 @@
+-- Archive tables for bookings of past shows. archive.py moves each booking
+-- of a show older than ARCHIVE_AFTER_DAYS, with its seats, payments and
+-- tickets, out of the live tables in small transactions, so the live tables
+-- only hold recent and upcoming shows. booking_archive is range-partitioned
+-- by booking_date, one partition per year: old years can be dropped or
+-- exported a partition at a time, and history queries for a date range only
+-- read the partitions concerned. The live booking table is not partitioned,
+-- because MySQL does not allow foreign keys on partitioned tables.
+-- `python archive.py partitions` adds the partitions of coming years.
+USE `database_project`;
+
+CREATE TABLE `booking_archive` (
+  `booking_id` int NOT NULL,
+  `user_id` int DEFAULT NULL,
+  `seat_id` int DEFAULT NULL,
+  `show_id` int DEFAULT NULL,
+  `booking_date` datetime NOT NULL,
+  `total_price` decimal(10,2) DEFAULT NULL,
+  `extra_price` decimal(10,2) DEFAULT NULL,
+  `b_status` enum('confirmed','pending','cancelled') DEFAULT 'pending',
+  `ticket_count` int NOT NULL DEFAULT '1',
+  PRIMARY KEY (`booking_id`,`booking_date`),
+  KEY `idx_booking_archive_user_date` (`user_id`,`booking_date`),
+  KEY `idx_booking_archive_show` (`show_id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb3
+PARTITION BY RANGE COLUMNS (`booking_date`) (
+  PARTITION `p2024` VALUES LESS THAN ('2025-01-01'),
+  PARTITION `p2025` VALUES LESS THAN ('2026-01-01'),
+  PARTITION `p2026` VALUES LESS THAN ('2027-01-01'),
+  PARTITION `p2027` VALUES LESS THAN ('2028-01-01'),
+  PARTITION `pmax` VALUES LESS THAN (MAXVALUE)
+);
+
+CREATE TABLE `booking_seats_archive` (
+  `booking_seat_id` int NOT NULL,
+  `booking_id` int DEFAULT NULL,
+  `seat_id` int DEFAULT NULL,
+  PRIMARY KEY (`booking_seat_id`),
+  KEY `idx_booking_seats_archive_booking` (`booking_id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb3;
+
+CREATE TABLE `payments_archive` (
+  `payment_id` int NOT NULL,
+  `payment_date` datetime DEFAULT NULL,
+  `amount` decimal(10,2) DEFAULT NULL,
+  `payment_method` enum('credit_card','cash','paypal') DEFAULT 'credit_card',
+  `transaction_id` varchar(50) DEFAULT NULL,
+  `booking_id` int DEFAULT NULL,
+  `p_status` enum('paid','failed','pending','refunded') DEFAULT 'pending',
+  PRIMARY KEY (`payment_id`),
+  KEY `idx_payments_archive_booking` (`booking_id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb3;
+
+CREATE TABLE `tickets_archive` (
+  `ticket_id` int NOT NULL,
+  `booking_id` int DEFAULT NULL,
+  `seat_id` int DEFAULT NULL,
+  `ticket_number` varchar(20) DEFAULT NULL,
+  `theatre_name` varchar(100) DEFAULT NULL,
+  `seat_number` varchar(10) DEFAULT NULL,
+  `title` varchar(200) DEFAULT NULL,
+  `show_id` int DEFAULT NULL,
+  `show_datetime` datetime DEFAULT NULL,
+  PRIMARY KEY (`ticket_id`),
+  UNIQUE KEY `idx_tickets_archive_number` (`ticket_number`),
+  KEY `idx_tickets_archive_booking` (`booking_id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb3;
@@ -0,0 +1,60 @@
+# Runs EXPLAIN on the schedule query in booking_service.py and fails unless it
+# reads showtime through idx_movie_show_datetime with range/ref access.
+# Usage: python migrations/check_showtime_plans.py  (after 001_showtime_lookup_indexes.sql)
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from booking_service import SCHEDULE_QUERY, connect_to_db  # noqa: E402
+from storage import backend  # noqa: E402
+
+GOOD_ACCESS = {"range", "ref", "eq_ref", "const"}
+INDEX = "idx_movie_show_datetime"
+
+
+def explain(cursor, query, params):
+    cursor.execute("EXPLAIN " + query, params)
+    columns = [c[0] for c in cursor.description]
+    return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def check_plan(name, plan):
+    showtime_rows = [row for row in plan if row["table"] in ("showtime", "s")]
+    problems = []
+    for row in showtime_rows:
+        if row["type"] not in GOOD_ACCESS:
+            problems.append(f"access type {row['type']}")
+        if row["key"] != INDEX:
+            problems.append(f"key {row['key']}")
+    if not showtime_rows:
+        problems.append("showtime not in plan")
+    status = "OK  " if not problems else "FAIL"
+    print(f"{status} {name}: " + "; ".join(
+        f"{row['table']} type={row['type']} key={row['key']} rows={row['rows']}" for row in plan))
+    return not problems
+
+
+def main():
+    if backend.name != "mysql":
+        print("The plan check reads MySQL EXPLAIN output; run it with DB_BACKEND=mysql.")
+        return 1
+    con = connect_to_db()
+    cursor = con.cursor()
+    cursor.execute("""
+        SELECT m.title
+        FROM showtime s JOIN movies m ON s.movie_id = m.movie_id
+        ORDER BY s.show_id LIMIT 1
+    """)
+    sample = cursor.fetchone()
+    if not sample:
+        print("No showtimes to explain.")
+        return 1
+
+    ok = check_plan("schedule", explain(cursor, SCHEDULE_QUERY, sample))
+    con.close()
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
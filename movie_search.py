@@ -0,0 +1,225 @@
+import bisect
+import heapq
+import re
+import threading
+
+# Loads the columns indexed for search, in the order stored per movie
+LOAD_QUERY = "SELECT movie_id, title, genre, duration, release_date, rating, director, actors FROM movies"
+
+_WORD = re.compile(r"\w+")
+
+# A prefix matching more distinct words than this, or whose words cover more
+# than 1/BROAD_FRACTION of the catalog, is checked movie by movie instead of
+# being expanded into the union of the words' postings
+MAX_EXPANSION = 2048
+BROAD_FRACTION = 10
+# Movies are checked against a prefix spread over at most this many words by
+# looking them up in each word's postings, otherwise by scanning their words
+MAX_PROBES = 4
+
+
+def tokenize(text):
+    return _WORD.findall(text.casefold()) if text else []
+
+
+def _rank_key(row):
+    # Best rated first, then alphabetical; unrated movies last
+    movie_id, title, rating = row[0], row[1], row[5]
+    return (-(float(rating) if rating is not None else -1.0), (title or "").casefold(), movie_id)
+
+
+class MovieIndex:
+    """In-memory search index over the movies table.
+
+    Every word of title, genre, director and actors maps to the set of
+    movies containing it. Query words are prefixes (type-ahead): a prefix
+    is resolved by bisecting the sorted vocabulary, and all query words
+    must match. Results come best rated first. Genre and minimum rating
+    are filters. The index is built with one query on first use and then
+    kept current by add(), update() and remove() as movies are edited.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._rows = {}       # movie_id -> (movie_id, title, genre, duration, release_date, rating, director, actors)
+        self._words = {}      # movie_id -> tuple of its distinct words
+        self._postings = {}   # word -> set of movie_ids
+        self._vocabulary = []  # sorted words of _postings
+        self._genres = {}     # casefolded genre -> set of movie_ids
+        self._ids = {}        # casefolded title -> movie_id
+        self._keys = {}       # movie_id -> _rank_key of its row
+        self._ranking = []    # every _rank_key, sorted
+
+    @property
+    def loaded(self):
+        return self._loaded
+
+    def ensure_loaded(self, pool):
+        with self._lock:
+            if not self._loaded:
+                with pool.connection() as con:
+                    cursor = con.cursor()
+                    cursor.execute(LOAD_QUERY)
+                    self.load(cursor.fetchall())
+
+    def load(self, rows):
+        """Rebuilds the index from (movie_id, title, genre, duration, release_date, rating, director, actors) rows."""
+        with self._lock:
+            self._rows, self._words, self._postings, self._genres, self._ids, self._keys = {}, {}, {}, {}, {}, {}
+            for row in rows:
+                self._insert(tuple(row))
+            self._vocabulary = sorted(self._postings)
+            self._ranking = sorted(self._keys.values())
+            self._loaded = True
+
+    def invalidate(self):
+        """Forgets everything; the next search reloads from the database."""
+        with self._lock:
+            self._loaded = False
+
+    def _insert(self, row):
+        movie_id, title, genre = row[0], row[1], row[2]
+        words = tuple({word: None for text in (title, genre, row[6], row[7]) for word in tokenize(text)})
+        self._rows[movie_id] = row
+        self._words[movie_id] = words
+        self._keys[movie_id] = _rank_key(row)
+        new_words = []
+        for word in words:
+            posting = self._postings.get(word)
+            if posting is None:
+                posting = self._postings[word] = set()
+                new_words.append(word)
+            posting.add(movie_id)
+        if genre:
+            self._genres.setdefault(genre.casefold(), set()).add(movie_id)
+        if title:
+            self._ids[title.casefold()] = movie_id
+        return new_words
+
+    def add(self, row):
+        row = tuple(row)
+        with self._lock:
+            if not self._loaded:
+                return
+            if row[0] in self._rows:
+                self._delete(row[0])
+            for word in self._insert(row):
+                bisect.insort(self._vocabulary, word)
+            bisect.insort(self._ranking, self._keys[row[0]])
+
+    update = add
+
+    def _delete(self, movie_id):
+        row = self._rows.pop(movie_id)
+        for word in self._words.pop(movie_id):
+            posting = self._postings[word]
+            posting.discard(movie_id)
+            if not posting:
+                del self._postings[word]
+                del self._vocabulary[bisect.bisect_left(self._vocabulary, word)]
+        genre = (row[2] or "").casefold()
+        if genre in self._genres:
+            self._genres[genre].discard(movie_id)
+            if not self._genres[genre]:
+                del self._genres[genre]
+        if row[1] and self._ids.get(row[1].casefold()) == movie_id:
+            del self._ids[row[1].casefold()]
+        del self._ranking[bisect.bisect_left(self._ranking, self._keys.pop(movie_id))]
+
+    def remove(self, movie_id):
+        with self._lock:
+            if self._loaded and movie_id in self._rows:
+                self._delete(movie_id)
+
+    def id_for_title(self, title):
+        with self._lock:
+            return self._ids.get((title or "").casefold())
+
+    def genres(self):
+        with self._lock:
+            return sorted({self._rows[next(iter(ids))][2] for ids in self._genres.values()}, key=str.casefold)
+
+    def __len__(self):
+        return len(self._rows)
+
+    def _matching_words(self, prefix):
+        """Words starting with prefix, or None if there are more than MAX_EXPANSION of them."""
+        start = bisect.bisect_left(self._vocabulary, prefix)
+        end = bisect.bisect_left(self._vocabulary, prefix + "\U0010ffff", start)
+        if end - start > MAX_EXPANSION:
+            return None
+        return self._vocabulary[start:end]
+
+    def search(self, text="", genre=None, min_rating=None, limit=50):
+        """Rows of the best rated movies matching every word of text as a prefix, the genre and the minimum rating."""
+        with self._lock:
+            total = len(self._rows)
+            terms = []  # (prefix, postings): a movie matches the term if it is in any of the postings
+            for prefix in set(tokenize(text)):
+                words = self._matching_words(prefix)
+                if words == []:
+                    return []
+                terms.append((prefix, None if words is None else [self._postings[word] for word in words]))
+            if genre:
+                in_genre = self._genres.get(genre.casefold())
+                if not in_genre:
+                    return []
+                terms.append((None, [in_genre]))
+            # Terms spread over too many words (postings None) go last and are never unioned
+            terms.sort(key=lambda term: sum(map(len, term[1])) if term[1] is not None else total + 1)
+
+            # Narrow the candidates with set operations while that stays cheap
+            candidates = None
+            unresolved = []
+            for prefix, postings in terms:
+                if postings is None:
+                    unresolved.append((prefix, None))
+                elif candidates is None:
+                    if len(postings) == 1:
+                        candidates = postings[0]  # shared with the index, never modified
+                    elif sum(map(len, postings)) * BROAD_FRACTION <= total:
+                        candidates = set().union(*postings)
+                    else:
+                        unresolved.append((prefix, postings))
+                elif len(postings) <= MAX_PROBES or sum(map(len, postings)) * BROAD_FRACTION <= total:
+                    # Intersect each word's movies with the candidates, then combine: C speed throughout
+                    candidates = set().union(*(candidates.intersection(posting) for posting in postings))
+                else:
+                    unresolved.append((prefix, postings))
+                if candidates is not None and not candidates:
+                    return []
+            floor = -min_rating if min_rating is not None else None
+            # Checked per movie: by lookup in a few postings, against the set of matching words, or by scanning its words
+            checks = []
+            for prefix, postings in unresolved:
+                if postings is not None and len(postings) <= MAX_PROBES:
+                    checks.append(lambda movie_id, postings=postings: any(movie_id in posting for posting in postings))
+                elif postings is not None:
+                    words = frozenset(self._matching_words(prefix))
+                    checks.append(lambda movie_id, words=words: not words.isdisjoint(self._words[movie_id]))
+                else:
+                    checks.append(lambda movie_id, prefix=prefix: any(word.startswith(prefix) for word in self._words[movie_id]))
+
+            # Sorting costs about len(candidates); walking the ranking about limit / share of matches
+            if candidates is not None and len(candidates) ** 2 <= limit * total:
+                matches = candidates
+                for check in checks:
+                    matches = filter(check, matches)
+                keys = map(self._keys.__getitem__, matches)
+                if floor is not None:
+                    keys = (key for key in keys if key[0] <= floor)
+                best = heapq.nsmallest(limit, keys)
+                return [self._rows[key[2]] for key in best]
+
+            # The ranking is sorted by rating, so a minimum rating ends the walk once passed
+            results = []
+            for key in self._ranking:
+                if floor is not None and key[0] > floor:
+                    break
+                movie_id = key[2]
+                if (candidates is None or movie_id in candidates) and all(check(movie_id) for check in checks):
+                    results.append(self._rows[movie_id])
+                    if len(results) >= limit:
+                        break
+            return results
@@ -0,0 +1,31 @@
+"""Payments of bookings.
+
+A booking is paid in the transaction that confirms it: the payments row
+(amount, method, transaction id, 'paid') is written together with the
+booking's status and seats, so a booking can never be confirmed without
+its payment or the other way round. The transaction id is the payment
+provider's reference when there is one, otherwise a random one.
+"""
+import secrets
+
+PAYMENT_METHODS = ("credit_card", "cash", "paypal")
+
+
+def new_transaction_id():
+    return f"TX-{secrets.token_hex(8).upper()}"
+
+
+def record_payment(cursor, booking_id, amount, method="credit_card", transaction_id=None):
+    """Writes the payment of a booking on the caller's cursor and returns its transaction id."""
+    transaction_id = transaction_id or new_transaction_id()
+    cursor.execute("""
+        INSERT INTO payments (payment_date, amount, payment_method, transaction_id, booking_id, p_status)
+        VALUES (NOW(), %s, %s, %s, %s, 'paid')
+    """, (amount, method, transaction_id, booking_id))
+    return transaction_id
+
+
+def refund_payments(cursor, booking_id):
+    """Marks the paid payments of a cancelled booking refunded; returns how many."""
+    cursor.execute("UPDATE payments SET p_status = 'refunded' WHERE booking_id = %s AND p_status = 'paid'", (booking_id,))
+    return cursor.rowcount
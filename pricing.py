@@ -0,0 +1,157 @@
+"""Ticket prices.
+
+The price of one ticket is built from the showtime and theatre rows:
+
+    (   showtime.base_price (DEFAULT_BASE_PRICE when unset)
+          x the factor of the show's weekday and starting hour
+      + theatre.extra_price (TYPE_SURCHARGES by theatre.type when unset) )
+    x the surge factor once most of the show's seats are sold
+
+Everything except the surge is fixed per show, so PriceTable computes it
+for all upcoming shows in one batch and keeps it in memory; the surge is
+applied when a booking is made, from the seats left at that moment.
+"""
+import threading
+import time
+from decimal import ROUND_HALF_UP, Decimal
+
+CENT = Decimal("0.01")
+
+# Used for shows whose base_price was left at its 0.00 default
+DEFAULT_BASE_PRICE = Decimal("20.00")
+# Surcharge per ticket by theatre type, for theatres without an extra_price
+TYPE_SURCHARGES = {"VIP": Decimal("5.00"), "IMAX": Decimal("4.00"), "3D": Decimal("3.00")}
+# (first hour, factor): matinees before 17:00 and late shows from 22:00 are cheaper
+TIME_OF_DAY = ((0, Decimal("0.85")), (17, Decimal("1.00")), (22, Decimal("0.90")))
+# Monday first: discount Tuesday, weekend premium
+WEEKDAY_FACTORS = tuple(Decimal(factor) for factor in ("1.00", "0.80", "1.00", "1.00", "1.10", "1.10", "1.10"))
+# (share of seats already sold, factor), highest share first
+SURGE = ((Decimal("0.90"), Decimal("1.20")), (Decimal("0.75"), Decimal("1.10")))
+
+# How long a loaded table is trusted before it is rebuilt, so shows and
+# theatres changed by other processes are picked up
+PRICE_TABLE_MAX_AGE = 900
+
+# Loads the columns prices depend on, per show
+LOAD_QUERY = """
+    SELECT s.show_id, s.show_datetime, s.base_price, t.type, t.extra_price, t.capacity
+    FROM showtime s
+    LEFT JOIN theatre t ON t.theatre_id = s.theatre_id
+"""
+
+
+_HOUR_FACTORS = [[factor for first, factor in TIME_OF_DAY if first <= hour][-1] for hour in range(24)]
+# Factor of each (weekday, hour), at index weekday * 24 + hour
+_FACTORS = [weekday * hour for weekday in WEEKDAY_FACTORS for hour in _HOUR_FACTORS]
+
+
+def show_price(show_datetime, base_price, theatre_type, theatre_extra):
+    """(ticket price before surge, theatre surcharge included in it) of a show."""
+    base = base_price if base_price else DEFAULT_BASE_PRICE
+    if theatre_extra is not None:
+        extra = Decimal(theatre_extra)
+    else:
+        extra = TYPE_SURCHARGES.get((theatre_type or "").upper(), Decimal("0.00"))
+    factor = _FACTORS[show_datetime.weekday() * 24 + show_datetime.hour] if show_datetime else Decimal(1)
+    return (Decimal(base) * factor + extra).quantize(CENT, ROUND_HALF_UP), extra.quantize(CENT, ROUND_HALF_UP)
+
+
+def surge_factor(seats_left, capacity):
+    if not capacity:
+        return Decimal(1)
+    sold = Decimal(capacity - seats_left) / capacity
+    for share, factor in SURGE:
+        if sold >= share:
+            return factor
+    return Decimal(1)
+
+
+class PriceTable:
+    """Prices of the upcoming shows, keyed by show_id.
+
+    Built from one query by load(); shows are priced per distinct
+    (base price, theatre, weekday, hour) combination, which a catalog has
+    far fewer of than shows. A show missing from the table (added since
+    the last load, or by another process) is priced from the database on
+    first use and kept. invalidate() drops one show or the whole table
+    when showtimes or theatres change.
+    """
+
+    def __init__(self, max_age=PRICE_TABLE_MAX_AGE):
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._prices = {}  # show_id -> (unit_price, extra_price, capacity)
+        self._loaded_at = None
+
+    def _stale(self):
+        return self._loaded_at is None or time.monotonic() - self._loaded_at > self.max_age
+
+    def ensure_loaded(self, *pools):
+        """Loads the table if it was never loaded, invalidated or is older than max_age.
+
+        With several pools (one per cinema database) the shows of all of
+        them go into the one table; show ids do not repeat across cinemas.
+        """
+        if self._stale():
+            # One thread rebuilds; quotes keep using the old table meanwhile
+            with self._load_lock:
+                if self._stale():
+                    rows = []
+                    for pool in pools:
+                        with pool.connection() as con:
+                            cursor = con.cursor()
+                            cursor.execute(LOAD_QUERY + " WHERE s.show_datetime >= NOW()")
+                            rows += cursor.fetchall()
+                    self.load(rows)
+
+    def load(self, rows):
+        """Replaces the table with (show_id, show_datetime, base_price, type, extra_price, capacity) rows."""
+        priced = {}
+        prices = {}
+        for show_id, show_datetime, base_price, theatre_type, theatre_extra, capacity in rows:
+            key = (base_price, theatre_type, theatre_extra,
+                   show_datetime.weekday() * 24 + show_datetime.hour if show_datetime else None)
+            price = priced.get(key)
+            if price is None:
+                price = priced[key] = show_price(show_datetime, base_price, theatre_type, theatre_extra)
+            prices[show_id] = price + (capacity or 0,)
+        with self._lock:
+            self._prices = prices
+            self._loaded_at = time.monotonic()
+
+    def invalidate(self, show_id=None):
+        with self._lock:
+            if show_id is None:
+                self._loaded_at = None
+            else:
+                self._prices.pop(show_id, None)
+
+    def _entry(self, cursor, show_id):
+        with self._lock:
+            entry = self._prices.get(show_id)
+        if entry is None:
+            cursor.execute(LOAD_QUERY + " WHERE s.show_id = %s", (show_id,))
+            row = cursor.fetchone()
+            if row is None:
+                return None
+            entry = show_price(*row[1:5]) + (row[5] or 0,)
+            with self._lock:
+                self._prices[show_id] = entry
+        return entry
+
+    def unit_price(self, cursor, show_id, seats_left):
+        """Price of one ticket for the show now, surge included; None for an unknown show."""
+        return self.quote(cursor, show_id, 1, seats_left)[0]
+
+    def quote(self, cursor, show_id, ticket_count, seats_left):
+        """(total_price, extra_price) of a booking, given the seats left before it."""
+        entry = self._entry(cursor, show_id)
+        if entry is None:
+            return None, None
+        unit, extra, capacity = entry
+        unit = (unit * surge_factor(seats_left, capacity)).quantize(CENT, ROUND_HALF_UP)
+        return unit * ticket_count, extra * ticket_count
+
+    def __len__(self):
+        return len(self._prices)
@@ -0,0 +1,271 @@
+import re
+import threading
+import time
+from datetime import datetime
+
+# Histogram bucket upper bounds in seconds, as used by Prometheus clients
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize(statement):
+    """Single-line form of a statement, used as its key in the statistics."""
+    if isinstance(statement, (bytes, bytearray)):
+        statement = statement.decode("utf-8", "replace")
+    return _WHITESPACE.sub(" ", statement).strip()
+
+
+class Histogram:
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)  # last slot is +Inf
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        index = 0
+        while index < len(BUCKETS) and seconds > BUCKETS[index]:
+            index += 1
+        self.counts[index] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def quantile(self, fraction):
+        """Upper bound of the bucket holding the given quantile (capped at the observed max)."""
+        if not self.count:
+            return 0.0
+        rank = fraction * self.count
+        seen = 0
+        for bound, count in zip(BUCKETS + (self.max,), self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+
+class StatementStats:
+    __slots__ = ("latency", "rows", "errors")
+
+    def __init__(self):
+        self.latency = Histogram()
+        self.rows = 0
+        self.errors = 0
+
+
+class QueryStats:
+    """Per-statement latency histograms, row and error counts, and a slow-query log.
+
+    Connections are instrumented by wrapping them with `traced(con)`; every
+    cursor they hand out then reports execute/executemany/callproc timings
+    here. Statement parameters are never logged.
+    """
+
+    def __init__(self, slow_threshold=0.5, slow_log_path=None):
+        self.slow_threshold = slow_threshold
+        self.slow_log_path = slow_log_path
+        self._lock = threading.Lock()
+        self._statements = {}
+        self._wait = Histogram()
+        self._slow = 0
+
+    def traced(self, con):
+        return TracedConnection(con, self)
+
+    def record(self, statement, seconds, rows=0, error=False):
+        with self._lock:
+            stats = self._statements.get(statement)
+            if stats is None:
+                stats = self._statements[statement] = StatementStats()
+            stats.latency.observe(seconds)
+            if rows > 0:
+                stats.rows += rows
+            if error:
+                stats.errors += 1
+            slow = seconds >= self.slow_threshold
+            if slow:
+                self._slow += 1
+        if slow:
+            self._log_slow(statement, seconds, error)
+
+    def add_rows(self, statement, rows):
+        with self._lock:
+            stats = self._statements.get(statement)
+            if stats is not None:
+                stats.rows += rows
+
+    def record_wait(self, seconds):
+        """Time spent waiting for a pooled connection; passed to ConnectionPool as on_wait."""
+        with self._lock:
+            self._wait.observe(seconds)
+
+    def _log_slow(self, statement, seconds, error):
+        if not self.slow_log_path:
+            return
+        line = f"{datetime.now().isoformat(timespec='milliseconds')} {seconds * 1000:.1f}ms{' ERROR' if error else ''} {statement}\n"
+        try:
+            with open(self.slow_log_path, "a", encoding="utf-8") as f:
+                f.write(line)
+        except OSError as err:
+            print(f"Slow query log error: {err}")
+
+    def reset(self):
+        with self._lock:
+            self._statements.clear()
+            self._wait = Histogram()
+            self._slow = 0
+
+    def snapshot(self):
+        """Rows of per-statement numbers, slowest total time first; times are in seconds."""
+        with self._lock:
+            rows = [{
+                "statement": statement,
+                "count": stats.latency.count,
+                "total": stats.latency.total,
+                "p50": stats.latency.quantile(0.50),
+                "p95": stats.latency.quantile(0.95),
+                "p99": stats.latency.quantile(0.99),
+                "max": stats.latency.max,
+                "rows": stats.rows,
+                "errors": stats.errors,
+            } for statement, stats in self._statements.items()]
+        rows.sort(key=lambda row: row["total"], reverse=True)
+        return rows
+
+    def summary(self):
+        with self._lock:
+            return {
+                "statements": len(self._statements),
+                "executions": sum(stats.latency.count for stats in self._statements.values()),
+                "errors": sum(stats.errors for stats in self._statements.values()),
+                "slow_queries": self._slow,
+                "connection_waits": self._wait.count,
+                "wait_p50": self._wait.quantile(0.50),
+                "wait_p99": self._wait.quantile(0.99),
+                "wait_max": self._wait.max,
+            }
+
+    def prometheus(self, gauges=()):
+        """Prometheus text exposition of the statistics.
+
+        `gauges` is an iterable of (metric_name, help, value) appended as-is,
+        e.g. pool and seat hold numbers.
+        """
+        lines = []
+
+        def histogram(name, help_text, entries):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} histogram")
+            for labels, hist in entries:
+                cumulative = 0
+                for bound, count in zip(BUCKETS, hist.counts):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{{{labels}le="{bound}"}} {cumulative}')
+                lines.append(f'{name}_bucket{{{labels}le="+Inf"}} {hist.count}')
+                plain = "{" + labels.rstrip(",") + "}" if labels else ""
+                lines.append(f"{name}_sum{plain} {hist.total}")
+                lines.append(f"{name}_count{plain} {hist.count}")
+
+        with self._lock:
+            statements = [(f'statement="{_escape(statement)}",', stats) for statement, stats in sorted(self._statements.items())]
+            histogram("cinema_query_duration_seconds", "Statement execution time.",
+                      [(labels, stats.latency) for labels, stats in statements])
+            for name, help_text, attribute in (("cinema_query_rows_total", "Rows returned or affected.", "rows"),
+                                               ("cinema_query_errors_total", "Statements that raised.", "errors")):
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} counter")
+                for labels, stats in statements:
+                    lines.append(f"{name}{{{labels.rstrip(',')}}} {getattr(stats, attribute)}")
+            lines.append("# HELP cinema_slow_queries_total Statements slower than the slow-query threshold.")
+            lines.append("# TYPE cinema_slow_queries_total counter")
+            lines.append(f"cinema_slow_queries_total {self._slow}")
+            histogram("cinema_pool_wait_seconds", "Time spent waiting for a pooled connection.", [("", self._wait)])
+
+        for name, help_text, value in gauges:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"')
+
+
+class TracedConnection:
+    """Connection proxy whose cursors report to a QueryStats; everything else is passed through."""
+
+    def __init__(self, con, stats):
+        self._con = con
+        self._stats = stats
+
+    def cursor(self, *args, **kwargs):
+        return TracedCursor(self._con.cursor(*args, **kwargs), self._stats)
+
+    def commit(self):
+        self._timed("COMMIT", self._con.commit)
+
+    def _timed(self, statement, fn):
+        started = time.perf_counter()
+        try:
+            fn()
+        except Exception:
+            self._stats.record(statement, time.perf_counter() - started, error=True)
+            raise
+        self._stats.record(statement, time.perf_counter() - started)
+
+    def __getattr__(self, name):
+        return getattr(self._con, name)
+
+
+class TracedCursor:
+    def __init__(self, cursor, stats):
+        self._cursor = cursor
+        self._stats = stats
+        self._statement = None
+
+    def _run(self, statement, fn, *args, **kwargs):
+        self._statement = normalize(statement)
+        started = time.perf_counter()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception:
+            self._stats.record(self._statement, time.perf_counter() - started, error=True)
+            raise
+        # SELECT rowcounts are only known once fetched; fetch* adds those
+        rowcount = getattr(self._cursor, "rowcount", -1)
+        self._stats.record(self._statement, time.perf_counter() - started,
+                           rows=rowcount if rowcount and rowcount > 0 and self._cursor.description is None else 0)
+        return result
+
+    def execute(self, operation, *args, **kwargs):
+        return self._run(operation, self._cursor.execute, operation, *args, **kwargs)
+
+    def executemany(self, operation, *args, **kwargs):
+        return self._run(operation, self._cursor.executemany, operation, *args, **kwargs)
+
+    def callproc(self, procname, args=()):
+        return self._run(f"CALL {procname}", self._cursor.callproc, procname, args)
+
+    def _fetched(self, rows):
+        if self._statement is not None and rows:
+            self._stats.add_rows(self._statement, len(rows) if isinstance(rows, list) else 1)
+        return rows
+
+    def fetchone(self):
+        return self._fetched(self._cursor.fetchone())
+
+    def fetchmany(self, *args, **kwargs):
+        return self._fetched(self._cursor.fetchmany(*args, **kwargs))
+
+    def fetchall(self):
+        return self._fetched(self._cursor.fetchall())
+
+    def __iter__(self):
+        return iter(self.fetchone, None)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
@@ -0,0 +1,258 @@
+import heapq
+import threading
+import time
+
+from analytics import record_booking
+from booking import book_seats, run_in_transaction
+from payments import record_payment
+from tickets import issue_tickets
+
+DEFAULT_HOLD_TTL = 600
+
+
+class HoldExpired(Exception):
+    pass
+
+
+class Hold:
+    __slots__ = ("booking_id", "show_id", "ticket_count", "total_price", "seat_numbers", "expires_at")
+
+    def __init__(self, booking_id, show_id, ticket_count, total_price, seat_numbers, expires_at):
+        self.booking_id = booking_id
+        self.show_id = show_id
+        self.ticket_count = ticket_count
+        self.total_price = total_price
+        self.seat_numbers = seat_numbers
+        self.expires_at = expires_at
+
+    def seconds_left(self):
+        return max(0.0, self.expires_at - time.monotonic())
+
+
+class HoldStore:
+    """Seats held for a customer while they pay.
+
+    A hold is a booking row in the 'pending' state whose seats are already
+    taken from the show. It is either confirmed (paid), released by the
+    customer, or cancelled automatically once its TTL runs out. Deadlines
+    live in a min-heap watched by one timer thread, so expiry never scans
+    the booking table. Confirmations commit through checkout_pool (the
+    pool itself, or a GroupCommitter over it) when one is given.
+    """
+
+    def __init__(self, pool, seat_maps=None, ttl=DEFAULT_HOLD_TTL, checkout_pool=None):
+        self.pool = pool
+        self.checkout_pool = checkout_pool or pool
+        self.seat_maps = seat_maps
+        self.ttl = ttl
+
+        self._cond = threading.Condition()
+        self._heap = []  # (expires_at, booking_id)
+        self._active = {}  # booking_id -> Hold
+        self._thread = None
+        self._stopped = False
+
+        self._created = 0
+        self._converted = 0
+        self._released = 0
+        self._expired = 0
+
+    def start(self):
+        with self._cond:
+            if self._thread is None:
+                self._stopped = False
+                self._thread = threading.Thread(target=self._run, name="seat-hold-expiry", daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join()
+
+    def _schedule(self, hold):
+        with self._cond:
+            self._active[hold.booking_id] = hold
+            heapq.heappush(self._heap, (hold.expires_at, hold.booking_id))
+            # Wake the timer only if this hold is now the earliest deadline
+            if self._heap[0][1] == hold.booking_id:
+                self._cond.notify()
+
+    def recover(self):
+        """Re-arms timers for pending holds left behind by a previous run."""
+        with self.pool.connection() as con:
+            cursor = con.cursor()
+            cursor.execute("""
+                SELECT booking_id, show_id, ticket_count, total_price, TIMESTAMPDIFF(SECOND, booking_date, NOW())
+                FROM booking
+                WHERE b_status = 'pending'
+            """)
+            pending = cursor.fetchall()
+        now = time.monotonic()
+        for booking_id, show_id, ticket_count, total_price, age in pending:
+            self._schedule(Hold(booking_id, show_id, ticket_count, total_price, [], now + max(0, self.ttl - (age or 0))))
+        return len(pending)
+
+    def hold(self, user_id, show_id, ticket_count, total_price=None, extra_price=None, price=None):
+        """Takes the seats and returns a Hold; raises SeatsUnavailable when sold out.
+
+        `price` is handed to book_seats to price the booking in its
+        transaction; the Hold then carries the quoted total.
+        """
+        quoted = [total_price]
+
+        def priced(cursor, seats_left):
+            total, extra = price(cursor, seats_left)
+            quoted[0] = total
+            return total, extra
+
+        booking_id, seat_numbers, _ = book_seats(
+            self.pool, user_id, show_id, ticket_count, total_price, extra_price,
+            self.seat_maps, status="pending", price=priced if price is not None else None
+        )
+        hold = Hold(booking_id, show_id, ticket_count, quoted[0], seat_numbers, time.monotonic() + self.ttl)
+        with self._cond:
+            self._created += 1
+        self._schedule(hold)
+        return hold
+
+    def confirm(self, booking_id, user_id=None, payment=None):
+        """Turns a hold into a confirmed booking and returns its ticket numbers; raises HoldExpired if it is gone.
+
+        `payment` is a (payment_method, transaction_id) pair; the payment of
+        the booking's total is recorded in the same transaction. Works for
+        holds placed by another process too, since only the booking row is
+        read.
+        """
+        def work(cursor):
+            query = "UPDATE booking SET b_status = 'confirmed' WHERE booking_id = %s AND b_status = 'pending'"
+            params = (booking_id,)
+            if user_id is not None:
+                query += " AND user_id = %s"
+                params += (user_id,)
+            cursor.execute(query, params)
+            if cursor.rowcount != 1:
+                return None
+            cursor.execute("SELECT show_id, ticket_count, total_price FROM booking WHERE booking_id = %s", (booking_id,))
+            show_id, ticket_count, total_price = cursor.fetchone()
+            record_booking(cursor, show_id, 1, ticket_count, total_price)
+            if payment is not None:
+                record_payment(cursor, booking_id, total_price, *payment)
+            return issue_tickets(cursor, booking_id, show_id, ticket_count)
+
+        ticket_numbers = run_in_transaction(self.checkout_pool, work)
+        with self._cond:
+            self._active.pop(booking_id, None)
+            if ticket_numbers is not None:
+                self._converted += 1
+        if ticket_numbers is None:
+            raise HoldExpired("Your seat hold has expired. Please start the booking again.")
+        return ticket_numbers
+
+    def release(self, booking_id, user_id=None):
+        """Gives the seats of an unpaid hold back to the show."""
+        with self._cond:
+            hold = self._active.get(booking_id)
+        if hold is None or user_id is not None:
+            # Placed by another process (or ownership must be checked): read it from the database
+            with self.pool.connection() as con:
+                cursor = con.cursor()
+                query = "SELECT show_id, ticket_count, total_price FROM booking WHERE booking_id = %s AND b_status = 'pending'"
+                params = (booking_id,)
+                if user_id is not None:
+                    query += " AND user_id = %s"
+                    params += (user_id,)
+                cursor.execute(query, params)
+                row = cursor.fetchone()
+            if row is None:
+                return
+            hold = Hold(booking_id, row[0], row[1], row[2], [], 0)
+        with self._cond:
+            self._active.pop(booking_id, None)
+        if self._cancel([hold]):
+            with self._cond:
+                self._released += 1
+
+    def forget_show(self, show_id):
+        """Drops the timers of a show whose bookings were all cancelled in the database."""
+        with self._cond:
+            for booking_id in [booking_id for booking_id, hold in self._active.items() if hold.show_id == show_id]:
+                # Its heap entry is skipped when it comes due
+                del self._active[booking_id]
+
+    def _cancel(self, holds):
+        # Only rows still pending are cancelled, so a hold paid for at the last moment is kept
+        def work(cursor):
+            cancelled = 0
+            restored = {}
+            for hold in holds:
+                cursor.execute("""
+                    UPDATE booking SET b_status = 'cancelled'
+                    WHERE booking_id = %s AND b_status = 'pending'
+                """, (hold.booking_id,))
+                if cursor.rowcount == 1:
+                    cancelled += 1
+                    restored[hold.show_id] = restored.get(hold.show_id, 0) + hold.ticket_count
+            for show_id, seats in restored.items():
+                cursor.execute("CALL UpdateSeatsOnCancellation(%s, %s)", (seats, show_id))
+            return cancelled, restored
+
+        cancelled, restored = run_in_transaction(self.pool, work)
+        if self.seat_maps is not None:
+            for show_id in restored:
+                self.seat_maps.invalidate(show_id)
+        return cancelled
+
+    def expire_due(self, now=None):
+        """Cancels every hold whose deadline has passed; returns how many."""
+        now = time.monotonic() if now is None else now
+        due = []
+        with self._cond:
+            while self._heap and self._heap[0][0] <= now:
+                _, booking_id = heapq.heappop(self._heap)
+                # Confirmed or released holds stay in the heap until popped here
+                hold = self._active.pop(booking_id, None)
+                if hold is not None:
+                    due.append(hold)
+        if not due:
+            return 0
+        try:
+            expired = self._cancel(due)
+        except Exception:
+            # Try again shortly rather than leaving the seats held forever
+            for hold in due:
+                hold.expires_at = now + 5
+                self._schedule(hold)
+            raise
+        with self._cond:
+            self._expired += expired
+        return expired
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if self._stopped:
+                    return
+                timeout = self._heap[0][0] - time.monotonic() if self._heap else None
+                if timeout is None or timeout > 0:
+                    self._cond.wait(timeout)
+                    continue
+            try:
+                self.expire_due()
+            except Exception as err:
+                print(f"Seat hold expiry error: {err}")
+                time.sleep(1)
+
+    def stats(self):
+        with self._cond:
+            finished = self._converted + self._expired + self._released
+            return {
+                "active": len(self._active),
+                "created": self._created,
+                "converted": self._converted,
+                "expired": self._expired,
+                "released": self._released,
+                "conversion_rate": self._converted / finished if finished else 0.0,
+            }
@@ -0,0 +1,255 @@
+import heapq
+import re
+import sys
+import threading
+
+DEFAULT_ROW_WIDTH = 10
+# How much a row away from the centre costs compared to a seat away from the centre
+ROW_WEIGHT = 1.5
+
+SEAT_NUMBER = re.compile(r"^\s*([A-Za-z]*)\s*(\d+)\s*$")
+
+LOAD_QUERY = """
+    SELECT s.seat_id, s.seat_number, sh.theatre_id,
+           s.s_status = 'unavailable' OR b.booking_id IS NOT NULL AS taken
+    FROM showtime sh
+    JOIN seats s ON s.theatre_id = sh.theatre_id
+    LEFT JOIN (booking_seats bs
+               JOIN booking b ON b.booking_id = bs.booking_id AND b.b_status <> 'cancelled')
+           ON bs.seat_id = s.seat_id AND b.show_id = sh.show_id
+    WHERE sh.show_id = %s
+"""
+
+# Which of a few seats are no longer free for a show, through the seat_id index of booking_seats
+TAKEN_QUERY = """
+    SELECT s.seat_id
+    FROM seats s
+    WHERE s.seat_id IN ({seats})
+      AND (s.s_status = 'unavailable' OR EXISTS (
+          SELECT 1 FROM booking_seats bs
+          JOIN booking b ON b.booking_id = bs.booking_id
+          WHERE bs.seat_id = s.seat_id AND b.show_id = %s AND b.b_status <> 'cancelled'))
+"""
+
+
+def _position(seat_number, ordinal, row_width):
+    # "C7" -> row C, seat 7; plain numbers are laid out row_width seats per row
+    match = SEAT_NUMBER.match(str(seat_number or ""))
+    if not match:
+        return divmod(ordinal, row_width)
+    letters, number = match.group(1).upper(), int(match.group(2))
+    if not letters:
+        return divmod(number - 1, row_width)
+    row = 0
+    for letter in letters:
+        row = row * 26 + (ord(letter) - ord("A") + 1)
+    return row - 1, number - 1
+
+
+class TheatreLayout:
+    """Physical seat grid of a theatre, shared by every show in it."""
+
+    __slots__ = ("theatre_id", "rows", "cols", "seat_ids", "seat_numbers", "index_of", "gaps")
+
+    def __init__(self, theatre_id, seats, row_width=DEFAULT_ROW_WIDTH):
+        positions = []
+        for ordinal, (seat_id, seat_number) in enumerate(sorted(seats, key=lambda seat: seat[0])):
+            row, col = _position(seat_number, ordinal, row_width)
+            positions.append((row, col, seat_id, seat_number))
+
+        self.theatre_id = theatre_id
+        self.rows = max((p[0] for p in positions), default=-1) + 1
+        self.cols = max((p[1] for p in positions), default=-1) + 1
+        size = self.rows * self.cols
+        self.seat_ids = [None] * size
+        self.seat_numbers = [None] * size
+        self.index_of = {}
+        for row, col, seat_id, seat_number in positions:
+            index = row * self.cols + col
+            self.seat_ids[index] = seat_id
+            self.seat_numbers[index] = seat_number
+            self.index_of[seat_id] = index
+
+        # Grid cells with no seat behind them are permanently taken
+        self.gaps = 0
+        for index, seat_id in enumerate(self.seat_ids):
+            if seat_id is None:
+                self.gaps |= 1 << index
+
+
+class SeatMap:
+    """Occupancy of one show: bit i of `taken` is set when grid cell i is not free.
+
+    `seats_left` is the show's available_seats as of the last load or
+    booking through this map; None when unknown.
+    """
+
+    __slots__ = ("layout", "taken", "seats_left")
+
+    def __init__(self, layout, taken=0, seats_left=None):
+        self.layout = layout
+        self.taken = taken | layout.gaps
+        self.seats_left = seats_left
+
+    def free_count(self):
+        size = self.layout.rows * self.layout.cols
+        return size - bin(self.taken & ((1 << size) - 1)).count("1")
+
+    def mark(self, indices):
+        for index in indices:
+            self.taken |= 1 << index
+
+    def release(self, seat_ids):
+        for seat_id in seat_ids:
+            index = self.layout.index_of.get(seat_id)
+            if index is not None:
+                self.taken &= ~(1 << index)
+
+    def best_available(self, count):
+        """Grid indices of the best `count` free seats, or None if there aren't enough.
+
+        A contiguous block in a single row is always preferred; blocks are
+        ranked by distance from the centre of the auditorium. Only when no
+        row has `count` adjacent free seats are the best individual seats used.
+        """
+        layout = self.layout
+        rows, cols = layout.rows, layout.cols
+        if count <= 0 or count > self.free_count():
+            return None
+        if count > cols:
+            return self._best_scattered(count)
+
+        full = (1 << cols) - 1
+        center_row, center_col = (rows - 1) / 2, (cols - 1) / 2
+        best = None
+        # Visit rows from the centre outwards so we can stop once no row can beat the best block
+        for row in sorted(range(rows), key=lambda r: abs(r - center_row)):
+            row_penalty = abs(row - center_row) * ROW_WEIGHT
+            if best is not None and row_penalty >= best[0]:
+                break
+            free = ~(self.taken >> (row * cols)) & full
+            starts = free
+            for shift in range(1, count):
+                starts &= free >> shift
+            while starts:
+                low = starts & -starts
+                col = low.bit_length() - 1
+                starts ^= low
+                score = row_penalty + abs(col + (count - 1) / 2 - center_col)
+                if best is None or score < best[0]:
+                    best = (score, row * cols + col)
+
+        if best is None:
+            return self._best_scattered(count)
+        return list(range(best[1], best[1] + count))
+
+    def _best_scattered(self, count):
+        layout = self.layout
+        center_row, center_col = (layout.rows - 1) / 2, (layout.cols - 1) / 2
+        free = (
+            (abs(index // layout.cols - center_row) * ROW_WEIGHT + abs(index % layout.cols - center_col), index)
+            for index in range(layout.rows * layout.cols)
+            if not self.taken >> index & 1
+        )
+        picked = heapq.nsmallest(count, free)
+        return sorted(index for _, index in picked) if len(picked) == count else None
+
+
+class SeatMapCache:
+    """Seat maps of many shows; theatre layouts are loaded once and shared."""
+
+    def __init__(self, row_width=DEFAULT_ROW_WIDTH):
+        self.row_width = row_width
+        self._layouts = {}
+        self._maps = {}
+        self._lock = threading.Lock()
+
+    def load(self, cursor, show_id, seats_left=None):
+        """(Re)loads a show's seat map with a single query and caches it; `seats_left` is recorded on it."""
+        cursor.execute(LOAD_QUERY, (show_id,))
+        rows = cursor.fetchall()
+        if not rows:
+            return None
+        theatre_id = rows[0][2]
+        with self._lock:
+            layout = self._layouts.get(theatre_id)
+        if layout is None or len(layout.index_of) != len({row[0] for row in rows}):
+            layout = TheatreLayout(theatre_id, {(row[0], row[1]) for row in rows}, self.row_width)
+            with self._lock:
+                self._layouts[theatre_id] = layout
+
+        taken = 0
+        for seat_id, _, _, is_taken in rows:
+            if is_taken:
+                taken |= 1 << layout.index_of[seat_id]
+        seat_map = SeatMap(layout, taken, seats_left)
+        with self._lock:
+            self._maps[show_id] = seat_map
+        return seat_map
+
+    def get(self, show_id):
+        with self._lock:
+            return self._maps.get(show_id)
+
+    def invalidate(self, show_id):
+        with self._lock:
+            self._maps.pop(show_id, None)
+
+    def footprint(self):
+        """Approximate bytes held by cached seat maps and layouts."""
+        with self._lock:
+            maps = list(self._maps.values())
+            layouts = list(self._layouts.values())
+        size = sys.getsizeof(self._maps) + sys.getsizeof(self._layouts)
+        for seat_map in maps:
+            size += sys.getsizeof(seat_map) + sys.getsizeof(seat_map.taken)
+        for layout in layouts:
+            size += sys.getsizeof(layout) + sys.getsizeof(layout.seat_ids) + sys.getsizeof(layout.seat_numbers)
+            size += sys.getsizeof(layout.index_of) + sys.getsizeof(layout.gaps)
+        return size
+
+
+def _taken(cursor, show_id, seat_ids):
+    cursor.execute(TAKEN_QUERY.format(seats=", ".join(["%s"] * len(seat_ids))), tuple(seat_ids) + (show_id,))
+    return cursor.fetchall()
+
+
+def allocate_seats(cursor, cache, show_id, count, seats_left=None):
+    """Picks the best `count` free seats of a show and marks them taken.
+
+    Must run inside the booking transaction, after the showtime row has been
+    locked, so the seats of the show cannot change underneath us.
+    `seats_left` is the show's available_seats before this booking, read
+    from the locked row. The cached seat map is used when it last saw the
+    same number, and the seats it picks are checked against the database;
+    when the numbers differ (another process booked or cancelled) or a
+    picked seat is taken after all, the map is reloaded. Returns the
+    chosen (seat_id, seat_number) pairs, [] when the theatre has no seat
+    plan, or None when there are not enough free seats.
+    """
+    seat_map = cache.get(show_id) if seats_left is not None else None
+    indices = None
+    if seat_map is not None and seat_map.seats_left == seats_left:
+        indices = seat_map.best_available(count)
+        if indices is not None and _taken(cursor, show_id, [seat_map.layout.seat_ids[index] for index in indices]):
+            indices = None
+    if indices is None:
+        seat_map = cache.load(cursor, show_id, seats_left)
+        if seat_map is None:
+            return []
+        indices = seat_map.best_available(count)
+        if indices is None:
+            return None
+    seat_map.mark(indices)
+    if seats_left is not None:
+        seat_map.seats_left = seats_left - count
+    layout = seat_map.layout
+    return [(layout.seat_ids[index], layout.seat_numbers[index]) for index in indices]
+
+
+def save_booking_seats(cursor, booking_id, seats):
+    # executemany turns this into a single multi-row INSERT
+    cursor.executemany(
+        "INSERT INTO booking_seats (booking_id, seat_id) VALUES (%s, %s)",
+        [(booking_id, seat_id) for seat_id, _ in seats]
+    )
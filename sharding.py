@@ -0,0 +1,224 @@
+"""Cinemas in separate databases.
+
+Each cinema (shard) keeps its theatres, seats, showtimes, bookings, tickets
+and payments in a database of its own. Users and movies are global: they
+are written to the main database (DB_NAME / SQLITE_PATH) and copied to
+every other shard, so bookings and showtimes keep their foreign keys and
+joins. DB_SHARDS lists the cinemas in order as name=address pairs, the
+address being host[:port]/database for MySQL and a file for SQLite:
+
+    DB_SHARDS="central=,north=db2:3306/cinema_north,south=db3/cinema_south"
+
+An empty address is the main database. The ids of shard i's tables start
+at i * SHARD_ID_RANGE (see prepare), so a show or booking id tells which
+cinema it belongs to, and rows from several cinemas never share an id.
+Without DB_SHARDS the main database is the only cinema.
+
+Reads that span cinemas (a user's reservations, movie availability, the
+dashboard) run on every shard at once with scatter(); gather() merges
+the ordered per-shard results.
+
+    python sharding.py prepare   # reserve the id ranges, copy users and movies
+    python sharding.py sync      # copy users and movies again
+"""
+import heapq
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from storage import backend
+
+SHARD_ID_RANGE = 100_000_000
+
+# Per-cinema tables with their auto-increment ids
+SHARDED_TABLES = {
+    "theatre": "theatre_id",
+    "seats": "seat_id",
+    "showtime": "show_id",
+    "booking": "booking_id",
+    "booking_seats": "booking_seat_id",
+    "tickets": "ticket_id",
+    "payments": "payment_id",
+}
+
+# Tables kept in the main database and copied to the shards: (keys, columns)
+GLOBAL_TABLES = {
+    "users": (("user_id",), ("user_name", "email", "password", "created_at", "last_login")),
+    "movies": (("movie_id",), ("title", "genre", "duration", "release_date", "rating", "director", "actors")),
+}
+
+COPY_BATCH = 1000
+
+
+def parse_shards(spec):
+    """[(name, address)] from a DB_SHARDS value; [] when it is empty."""
+    shards = []
+    for part in spec.split(","):
+        if not part.strip():
+            continue
+        name, separator, address = part.partition("=")
+        if not separator or not name.strip():
+            raise ValueError(f"DB_SHARDS entry {part!r} is not name=address")
+        shards.append((name.strip(), address.strip()))
+    if len({name for name, _ in shards}) != len(shards):
+        raise ValueError("DB_SHARDS names must be unique")
+    return shards
+
+
+class Shard:
+    """One cinema: `pool` for writes, `reads` (a ReplicaRouter) for reads that may lag."""
+
+    __slots__ = ("index", "name", "address", "pool", "reads")
+
+    def __init__(self, index, name, address, pool, reads):
+        self.index = index
+        self.name = name
+        self.address = address
+        self.pool = pool
+        self.reads = reads
+
+    @property
+    def is_main(self):
+        return not self.address
+
+    def __repr__(self):
+        return f"Shard({self.index}, {self.name!r})"
+
+
+class ShardSet:
+    """The cinemas, in DB_SHARDS order."""
+
+    def __init__(self, shards):
+        self.shards = list(shards)
+        self._names = {shard.name: shard for shard in self.shards}
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def __iter__(self):
+        return iter(self.shards)
+
+    def __len__(self):
+        return len(self.shards)
+
+    def named(self, name):
+        return self._names[name]
+
+    def copies(self):
+        """The shards other than the main database, which hold copies of the global tables."""
+        return [shard for shard in self.shards if not shard.is_main]
+
+    def label(self, shard, theatre_name):
+        """A theatre's name as shown across cinemas: names are only unique within one."""
+        return theatre_name if len(self.shards) == 1 or theatre_name is None else f"{theatre_name} ({shard.name})"
+
+    def for_id(self, row_id):
+        """The shard a show, booking, ticket or payment id belongs to; KeyError if none does."""
+        if len(self.shards) == 1:
+            return self.shards[0]
+        index = int(row_id) // SHARD_ID_RANGE
+        if not 0 <= index < len(self.shards):
+            raise KeyError(row_id)
+        return self.shards[index]
+
+    def scatter(self, fn):
+        """[fn(shard) for every shard], run on all shards at once; the first error is raised."""
+        if len(self.shards) == 1:
+            return [fn(self.shards[0])]
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=len(self.shards) * 4, thread_name_prefix="shard")
+        futures = [self._executor.submit(fn, shard) for shard in self.shards]
+        return [future.result() for future in futures]
+
+    def gather(self, fn, key=None, reverse=False, limit=None):
+        """Merges the lists fn(shard) returns, each already ordered by key, into one ordered list."""
+        merged = heapq.merge(*self.scatter(fn), key=key, reverse=reverse)
+        return list(itertools.islice(merged, limit))
+
+    def close(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+        for shard in self.copies():
+            shard.pool.close()
+
+
+def copy_rows(shards, table, rows):
+    """Writes rows of a global table (keys + columns, in GLOBAL_TABLES order) to every shard copy."""
+    keys, columns = GLOBAL_TABLES[table]
+    query = backend.replace_sql(table, keys, columns)
+    rows = list(rows)
+    for shard in shards.copies():
+        with shard.pool.connection() as con:
+            cursor = con.cursor()
+            for start in range(0, len(rows), COPY_BATCH):
+                cursor.executemany(query, rows[start:start + COPY_BATCH])
+            con.commit()
+
+
+def delete_rows(shards, table, ids):
+    """Removes rows of a global table from every shard copy."""
+    key = GLOBAL_TABLES[table][0][0]
+    for shard in shards.copies():
+        with shard.pool.connection() as con:
+            cursor = con.cursor()
+            cursor.executemany(f"DELETE FROM {table} WHERE {key} = %s", [(row_id,) for row_id in ids])
+            con.commit()
+
+
+def sync(shards, pool):
+    """Copies every user and movie from the main database `pool` to the shards; returns rows per table."""
+    counts = {}
+    for table, (keys, columns) in GLOBAL_TABLES.items():
+        with pool.connection() as con:
+            cursor = con.cursor()
+            cursor.execute(f"SELECT {', '.join(keys + columns)} FROM {table}")
+            rows = cursor.fetchall()
+        copy_rows(shards, table, rows)
+        counts[table] = len(rows)
+    return counts
+
+
+def prepare(shards, pool):
+    """Moves the auto-increment ids of every shard into its range, then copies users and movies.
+
+    Refuses (ValueError) when a shard already holds rows outside its range,
+    e.g. after DB_SHARDS was reordered. Safe to run again.
+    """
+    if len(shards) > 1:
+        for shard in shards:
+            first, last = shard.index * SHARD_ID_RANGE, (shard.index + 1) * SHARD_ID_RANGE - 1
+            with shard.pool.connection() as con:
+                cursor = con.cursor()
+                for table, key in SHARDED_TABLES.items():
+                    cursor.execute(f"SELECT MIN({key}), MAX({key}) FROM {table}")
+                    low, high = cursor.fetchone()
+                    if low is not None and (low < first or high > last):
+                        raise ValueError(f"{table} of shard {shard.name!r} has ids outside {first}..{last}")
+                    if shard.index:
+                        backend.reserve_ids(cursor, table, max(first, (high or 0) + 1))
+                con.commit()
+    return sync(shards, pool)
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Prepare the cinema databases listed in DB_SHARDS")
+    parser.add_argument("command", choices=("prepare", "sync"))
+    args = parser.parse_args()
+
+    from booking_service import db_pool, shards
+    try:
+        counts = prepare(shards, db_pool) if args.command == "prepare" else sync(shards, db_pool)
+        print(f"{len(shards)} cinema(s): " + ", ".join(shard.name for shard in shards))
+        for table, count in counts.items():
+            print(f"{table}: {count} rows copied to {len(shards.copies())} shard(s)")
+    finally:
+        shards.close()
+        db_pool.close()
+
+
+if __name__ == "__main__":
+    main()
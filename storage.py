@@ -0,0 +1,599 @@
+"""Database backends, selected with DB_BACKEND.
+
+    mysql   (default) the MySQL server configured by DB_HOST, DB_NAME, DB_USER, DB_PASSWORD
+    sqlite  an embedded database file at SQLITE_PATH (default cinema.db); ":memory:"
+            gives a private in-memory database for tests and benchmarks
+
+The rest of the code writes MySQL-flavoured SQL with %s placeholders. The
+SQLite backend translates it (placeholders, FOR UPDATE, NOW(), TIMESTAMPDIFF)
+and runs the stored procedures from "database schema.sql" in Python, so no
+server or procedures are needed. A new SQLite database is created from the
+portable DDL below on first use.
+
+Read replicas (DB_REPLICAS) are reached with connect_replica(address):
+host[:port] for MySQL, a database file opened read-only for SQLite.
+Cinema databases (DB_SHARDS, see sharding.py) with connect_shard(address):
+host[:port]/database for MySQL, a database file for SQLite.
+
+Usage: python storage.py init               creates the schema in an empty database
+       python storage.py copy-from-mysql    fills the SQLite database from MySQL (kiosk provisioning)
+"""
+import argparse
+import os
+import re
+import sqlite3
+import sys
+import threading
+from datetime import date, datetime
+from decimal import Decimal
+from functools import lru_cache
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Portable DDL: {id} is an auto-increment primary key and {now} the current
+# local time, rendered per backend. Tables are listed parents first.
+TABLES = [
+    ("users", """
+        CREATE TABLE users (
+            user_id {id},
+            user_name VARCHAR(100) NOT NULL UNIQUE,
+            email VARCHAR(100) NOT NULL UNIQUE,
+            password VARCHAR(100) DEFAULT 'default_password',
+            created_at DATETIME DEFAULT {now},
+            last_login DATETIME DEFAULT NULL
+        )"""),
+    ("movies", """
+        CREATE TABLE movies (
+            movie_id {id},
+            title VARCHAR(100) UNIQUE,
+            genre VARCHAR(100),
+            duration INTEGER,
+            release_date DATE,
+            rating DECIMAL(3,1),
+            director VARCHAR(100),
+            actors TEXT
+        )"""),
+    ("theatre", """
+        CREATE TABLE theatre (
+            theatre_id {id},
+            theatre_name VARCHAR(100),
+            capacity INTEGER,
+            type VARCHAR(50),
+            extra_price DECIMAL(10,2)
+        )"""),
+    ("showtime", """
+        CREATE TABLE showtime (
+            show_id {id},
+            movie_id INTEGER,
+            theatre_id INTEGER,
+            show_datetime DATETIME,
+            base_price DECIMAL(10,2) DEFAULT 0.00,
+            available_seats INTEGER NOT NULL DEFAULT 80 CHECK (available_seats >= 0),
+            FOREIGN KEY (movie_id) REFERENCES movies (movie_id),
+            FOREIGN KEY (theatre_id) REFERENCES theatre (theatre_id)
+        )"""),
+    ("seats", """
+        CREATE TABLE seats (
+            seat_id {id},
+            seat_number VARCHAR(10),
+            theatre_id INTEGER,
+            show_id INTEGER,
+            s_status VARCHAR(20) DEFAULT 'available' CHECK (s_status IN ('available', 'reserved', 'unavailable')),
+            reserved_by INTEGER,
+            FOREIGN KEY (theatre_id) REFERENCES theatre (theatre_id),
+            FOREIGN KEY (show_id) REFERENCES showtime (show_id),
+            FOREIGN KEY (reserved_by) REFERENCES users (user_id)
+        )"""),
+    ("booking", """
+        CREATE TABLE booking (
+            booking_id {id},
+            user_id INTEGER,
+            seat_id INTEGER,
+            show_id INTEGER,
+            booking_date DATETIME NOT NULL DEFAULT {now},
+            total_price DECIMAL(10,2),
+            extra_price DECIMAL(10,2),
+            b_status VARCHAR(20) DEFAULT 'pending' CHECK (b_status IN ('confirmed', 'pending', 'cancelled')),
+            ticket_count INTEGER NOT NULL DEFAULT 1,
+            FOREIGN KEY (user_id) REFERENCES users (user_id),
+            FOREIGN KEY (seat_id) REFERENCES seats (seat_id),
+            FOREIGN KEY (show_id) REFERENCES showtime (show_id)
+        )"""),
+    ("booking_seats", """
+        CREATE TABLE booking_seats (
+            booking_seat_id {id},
+            booking_id INTEGER,
+            seat_id INTEGER,
+            FOREIGN KEY (booking_id) REFERENCES booking (booking_id),
+            FOREIGN KEY (seat_id) REFERENCES seats (seat_id)
+        )"""),
+    ("payments", """
+        CREATE TABLE payments (
+            payment_id {id},
+            payment_date DATETIME,
+            amount DECIMAL(10,2),
+            payment_method VARCHAR(20) DEFAULT 'credit_card' CHECK (payment_method IN ('credit_card', 'cash', 'paypal')),
+            transaction_id VARCHAR(50),
+            booking_id INTEGER,
+            p_status VARCHAR(20) DEFAULT 'pending' CHECK (p_status IN ('paid', 'failed', 'pending', 'refunded')),
+            FOREIGN KEY (booking_id) REFERENCES booking (booking_id)
+        )"""),
+    ("tickets", """
+        CREATE TABLE tickets (
+            ticket_id {id},
+            booking_id INTEGER,
+            seat_id INTEGER,
+            ticket_number VARCHAR(20),
+            theatre_name VARCHAR(100),
+            seat_number VARCHAR(10),
+            title VARCHAR(200),
+            show_id INTEGER,
+            show_datetime DATETIME,
+            FOREIGN KEY (booking_id) REFERENCES booking (booking_id),
+            FOREIGN KEY (seat_id) REFERENCES seats (seat_id),
+            FOREIGN KEY (show_id) REFERENCES showtime (show_id)
+        )"""),
+    ("seat_reservations", """
+        CREATE TABLE seat_reservations (
+            reservation_id {id},
+            movie_id INTEGER NOT NULL,
+            show_date DATE NOT NULL,
+            show_time TIME NOT NULL,
+            `row_number` INTEGER NOT NULL,
+            col_number INTEGER NOT NULL,
+            reserved_by VARCHAR(255) NOT NULL,
+            FOREIGN KEY (movie_id) REFERENCES movies (movie_id)
+        )"""),
+    # Version counters of tables cached in memory, bumped with every change (see catalog_cache.py)
+    ("cache_versions", """
+        CREATE TABLE cache_versions (
+            name VARCHAR(50) NOT NULL PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        )"""),
+    # Summaries of confirmed bookings maintained by analytics.py
+    ("show_stats", """
+        CREATE TABLE show_stats (
+            show_id INTEGER NOT NULL PRIMARY KEY,
+            movie_id INTEGER,
+            theatre_id INTEGER,
+            show_date DATE NOT NULL,
+            capacity INTEGER NOT NULL DEFAULT 0,
+            bookings INTEGER NOT NULL DEFAULT 0,
+            tickets_sold INTEGER NOT NULL DEFAULT 0,
+            revenue DECIMAL(12,2) NOT NULL DEFAULT 0
+        )"""),
+    ("movie_day_stats", """
+        CREATE TABLE movie_day_stats (
+            movie_id INTEGER NOT NULL,
+            show_date DATE NOT NULL,
+            bookings INTEGER NOT NULL DEFAULT 0,
+            tickets_sold INTEGER NOT NULL DEFAULT 0,
+            revenue DECIMAL(12,2) NOT NULL DEFAULT 0,
+            PRIMARY KEY (movie_id, show_date)
+        )"""),
+    ("theatre_day_stats", """
+        CREATE TABLE theatre_day_stats (
+            theatre_id INTEGER NOT NULL,
+            show_date DATE NOT NULL,
+            bookings INTEGER NOT NULL DEFAULT 0,
+            tickets_sold INTEGER NOT NULL DEFAULT 0,
+            revenue DECIMAL(12,2) NOT NULL DEFAULT 0,
+            PRIMARY KEY (theatre_id, show_date)
+        )"""),
+    # Bookings of past shows and their rows, moved out of the live tables by archive.py;
+    # same columns, no foreign keys. MySQL range-partitions booking_archive by booking_date
+    ("booking_archive", """
+        CREATE TABLE booking_archive (
+            booking_id INTEGER NOT NULL PRIMARY KEY,
+            user_id INTEGER,
+            seat_id INTEGER,
+            show_id INTEGER,
+            booking_date DATETIME NOT NULL,
+            total_price DECIMAL(10,2),
+            extra_price DECIMAL(10,2),
+            b_status VARCHAR(20),
+            ticket_count INTEGER NOT NULL DEFAULT 1
+        )"""),
+    ("booking_seats_archive", """
+        CREATE TABLE booking_seats_archive (
+            booking_seat_id INTEGER NOT NULL PRIMARY KEY,
+            booking_id INTEGER,
+            seat_id INTEGER
+        )"""),
+    ("payments_archive", """
+        CREATE TABLE payments_archive (
+            payment_id INTEGER NOT NULL PRIMARY KEY,
+            payment_date DATETIME,
+            amount DECIMAL(10,2),
+            payment_method VARCHAR(20),
+            transaction_id VARCHAR(50),
+            booking_id INTEGER,
+            p_status VARCHAR(20)
+        )"""),
+    ("tickets_archive", """
+        CREATE TABLE tickets_archive (
+            ticket_id INTEGER NOT NULL PRIMARY KEY,
+            booking_id INTEGER,
+            seat_id INTEGER,
+            ticket_number VARCHAR(20),
+            theatre_name VARCHAR(100),
+            seat_number VARCHAR(10),
+            title VARCHAR(200),
+            show_id INTEGER,
+            show_datetime DATETIME
+        )"""),
+]
+
+INDEXES = [
+    "CREATE INDEX idx_movie_show_datetime ON showtime (movie_id, show_datetime)",
+    "CREATE INDEX idx_show_datetime ON showtime (show_datetime)",
+    "CREATE INDEX idx_theatre_id ON showtime (theatre_id)",
+    "CREATE INDEX idx_seats_theatre ON seats (theatre_id)",
+    "CREATE INDEX idx_user_booking_date ON booking (user_id, booking_date)",
+    "CREATE INDEX idx_booking_show ON booking (show_id)",
+    "CREATE INDEX idx_booking_seats_booking ON booking_seats (booking_id)",
+    "CREATE INDEX idx_booking_seats_seat ON booking_seats (seat_id)",
+    "CREATE INDEX idx_payment_booking ON payments (booking_id)",
+    "CREATE INDEX idx_tickets_booking ON tickets (booking_id)",
+    "CREATE UNIQUE INDEX idx_tickets_number ON tickets (ticket_number)",
+    "CREATE INDEX idx_show_stats_date ON show_stats (show_date)",
+    "CREATE INDEX idx_movie_day_stats_date ON movie_day_stats (show_date)",
+    "CREATE INDEX idx_theatre_day_stats_date ON theatre_day_stats (show_date)",
+    "CREATE INDEX idx_booking_archive_user_date ON booking_archive (user_id, booking_date)",
+    "CREATE INDEX idx_booking_archive_show ON booking_archive (show_id)",
+    "CREATE INDEX idx_booking_seats_archive_booking ON booking_seats_archive (booking_id)",
+    "CREATE INDEX idx_payments_archive_booking ON payments_archive (booking_id)",
+    "CREATE INDEX idx_tickets_archive_booking ON tickets_archive (booking_id)",
+    "CREATE UNIQUE INDEX idx_tickets_archive_number ON tickets_archive (ticket_number)",
+]
+
+
+class MySQLBackend:
+    name = "mysql"
+    max_connections = 1000
+    ddl_tokens = {"id": "INTEGER NOT NULL AUTO_INCREMENT PRIMARY KEY", "now": "CURRENT_TIMESTAMP"}
+
+    def __init__(self):
+        import mysql.connector
+        from mysql.connector import errorcode
+
+        self._connector = mysql.connector
+        self.errors = (mysql.connector.Error,)
+        # Errors after which the whole transaction can simply be run again
+        self._retryable = (errorcode.ER_LOCK_DEADLOCK, errorcode.ER_LOCK_WAIT_TIMEOUT)
+
+    def connect(self, host=None, port=None, database=None):
+        return self._connector.connect(
+            host=host or os.getenv("DB_HOST", "localhost"),
+            port=port or int(os.getenv("DB_PORT", "3306")),
+            user=os.getenv("DB_USER"),
+            password=os.getenv("DB_PASSWORD"),
+            database=database or os.getenv("DB_NAME", "database_project"),
+            consume_results=True
+        )
+
+    def connect_shard(self, address):
+        """A connection to the cinema database at host[:port]/database, with the main database's credentials."""
+        location, _, database = address.partition("/")
+        host, _, port = location.partition(":")
+        return self.connect(host or None, int(port) if port else None, database or None)
+
+    def connect_replica(self, address):
+        """A connection to the replica at host[:port], with the primary's credentials and database."""
+        host, _, port = address.partition(":")
+        return self.connect(host, int(port) if port else None)
+
+    def is_retryable(self, err):
+        return getattr(err, "errno", None) in self._retryable
+
+    def has_schema(self, con):
+        cursor = con.cursor()
+        cursor.execute("SELECT COUNT(*) FROM information_schema.tables WHERE table_schema = DATABASE() AND table_name = 'movies'")
+        return cursor.fetchone()[0] > 0
+
+    def upsert_sql(self, table, keys, columns, counters):
+        """INSERT of keys + columns + counters that adds the counters to an existing row instead."""
+        names = keys + columns + counters
+        updates = ", ".join(f"{name} = {name} + VALUES({name})" for name in counters)
+        return (f"INSERT INTO {table} ({', '.join(names)}) VALUES ({', '.join(['%s'] * len(names))})"
+                f" ON DUPLICATE KEY UPDATE {updates}")
+
+    def replace_sql(self, table, keys, columns):
+        """INSERT of keys + columns that overwrites the columns of an existing row instead."""
+        names = keys + columns
+        updates = ", ".join(f"{name} = VALUES({name})" for name in columns)
+        return (f"INSERT INTO {table} ({', '.join(names)}) VALUES ({', '.join(['%s'] * len(names))})"
+                f" ON DUPLICATE KEY UPDATE {updates}")
+
+    def reserve_ids(self, cursor, table, first_id):
+        """Makes the table's next auto-increment id at least first_id."""
+        cursor.execute(f"ALTER TABLE {table} AUTO_INCREMENT = {int(first_id)}")
+
+
+# MySQL syntax rewritten for SQLite, applied once per distinct statement
+_SQLITE_REWRITES = [
+    (re.compile(r"%s"), "?"),
+    (re.compile(r"\s+FOR\s+UPDATE\b", re.IGNORECASE), ""),
+    (re.compile(r"\bTIMESTAMPDIFF\(\s*(\w+)\s*,", re.IGNORECASE), r"TIMESTAMPDIFF('\1',"),
+]
+_CALL = re.compile(r"^\s*CALL\s+(\w+)\s*\(.*\)\s*;?\s*$", re.IGNORECASE | re.DOTALL)
+_READ_ONLY = re.compile(r"^\s*(SELECT|WITH|PRAGMA|EXPLAIN)\b", re.IGNORECASE)
+_TIMESTAMP_UNITS = {"SECOND": 1, "MINUTE": 60, "HOUR": 3600, "DAY": 86400}
+
+
+@lru_cache(maxsize=512)
+def _translate(statement):
+    for pattern, replacement in _SQLITE_REWRITES:
+        statement = pattern.sub(replacement, statement)
+    return statement
+
+
+def _format_datetime(value):
+    return value.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _parse_datetime(value):
+    return datetime.fromisoformat(value) if isinstance(value, str) else value
+
+
+def _now():
+    return _format_datetime(datetime.now())
+
+
+def _timestampdiff(unit, start, end):
+    if start is None or end is None:
+        return None
+    seconds = (_parse_datetime(end) - _parse_datetime(start)).total_seconds()
+    return int(seconds // _TIMESTAMP_UNITS[unit.upper()])
+
+
+def _update_seats(cursor, ticket_count, show_id):
+    cursor.execute("SELECT available_seats FROM showtime WHERE show_id = ?", (show_id,))
+    row = cursor.fetchone()
+    if row is not None and row[0] < ticket_count:
+        raise sqlite3.IntegrityError("Not enough seats available.")
+    cursor.execute("UPDATE showtime SET available_seats = available_seats - ? WHERE show_id = ?", (ticket_count, show_id))
+
+
+def _update_seats_on_cancellation(cursor, cancelled_ticket_count, show_id):
+    cursor.execute("UPDATE showtime SET available_seats = available_seats + ? WHERE show_id = ?",
+                   (cancelled_ticket_count, show_id))
+
+
+class SQLiteCursor:
+    """Runs MySQL-flavoured statements on a sqlite3 cursor."""
+
+    def __init__(self, con, cursor):
+        self._con = con
+        self._cursor = cursor
+
+    def _begin(self, statement):
+        # Writers take the database lock up front, standing in for FOR UPDATE row locks
+        if not self._con.in_transaction and (not _READ_ONLY.match(statement) or "FOR UPDATE" in statement.upper()):
+            self._cursor.execute("BEGIN IMMEDIATE")
+
+    def execute(self, operation, params=()):
+        call = _CALL.match(operation)
+        if call:
+            return self.callproc(call.group(1), params)
+        self._begin(operation)
+        self._cursor.execute(_translate(operation), tuple(params or ()))
+        return None
+
+    def executemany(self, operation, seq_params):
+        self._begin(operation)
+        self._cursor.executemany(_translate(operation), seq_params)
+
+    def callproc(self, procname, args=()):
+        procedure = SQLiteBackend.procedures.get(procname)
+        if procedure is None:
+            raise sqlite3.OperationalError(f"no such procedure: {procname}")
+        self._begin("CALL")
+        procedure(self._cursor, *args)
+        return args
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class SQLiteConnection:
+    def __init__(self, con, shared=False):
+        self._con = con
+        self._shared = shared
+
+    def cursor(self, *args, **kwargs):
+        return SQLiteCursor(self._con, self._con.cursor())
+
+    def is_connected(self):
+        return True
+
+    def close(self):
+        # The single connection of an in-memory database holds the data; keep it open
+        if not self._shared:
+            self._con.close()
+
+    def __getattr__(self, name):
+        return getattr(self._con, name)
+
+
+class SQLiteBackend:
+    name = "sqlite"
+    ddl_tokens = {"id": "INTEGER PRIMARY KEY AUTOINCREMENT", "now": "(datetime('now', 'localtime'))"}
+    # Stored procedures of "database schema.sql", called as cursor.execute("CALL name(%s, %s)", args)
+    procedures = {"UpdateSeats": _update_seats, "UpdateSeatsOnCancellation": _update_seats_on_cancellation}
+
+    def __init__(self, path=None):
+        self.path = path or os.getenv("SQLITE_PATH", "cinema.db")
+        self.errors = (sqlite3.Error,)
+        self.timeout = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+        self._lock = threading.Lock()
+        self._ready = set()  # database files whose schema has been checked
+        self._memory = None
+        # An in-memory database lives and dies with its connection, so every
+        # pool checkout shares one
+        self.max_connections = 1 if self.path == ":memory:" else 1000
+
+        sqlite3.register_adapter(datetime, _format_datetime)
+        sqlite3.register_adapter(date, date.isoformat)
+        sqlite3.register_adapter(Decimal, str)
+        sqlite3.register_converter("DATETIME", lambda value: datetime.fromisoformat(value.decode()))
+        sqlite3.register_converter("DATE", lambda value: date.fromisoformat(value.decode()))
+        sqlite3.register_converter("DECIMAL", lambda value: Decimal(value.decode()))
+
+    def _open(self, path=None, read_only=False):
+        path = path or self.path
+        if read_only:
+            con = sqlite3.connect(Path(path).absolute().as_uri() + "?mode=ro", uri=True, timeout=self.timeout,
+                                  isolation_level=None, detect_types=sqlite3.PARSE_DECLTYPES, check_same_thread=False)
+        else:
+            con = sqlite3.connect(path, timeout=self.timeout, isolation_level=None,
+                                  detect_types=sqlite3.PARSE_DECLTYPES, check_same_thread=False)
+        con.create_function("NOW", 0, _now)
+        con.create_function("TIMESTAMPDIFF", 3, _timestampdiff)
+        if not read_only:
+            con.execute("PRAGMA foreign_keys = ON")
+            if path != ":memory:":
+                con.execute("PRAGMA journal_mode = WAL")
+        return con
+
+    def _prepare(self, con, path):
+        # Called under the lock; new databases get the whole schema, older ones the tables and indexes added since
+        if path not in self._ready:
+            cursor = con.cursor()
+            cursor.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'index')")
+            bootstrap(self, con, existing={name for (name,) in cursor.fetchall()})
+            self._ready.add(path)
+
+    def connect(self):
+        with self._lock:
+            if self.path == ":memory:":
+                if self._memory is None:
+                    self._memory = SQLiteConnection(self._open(), shared=True)
+                con = self._memory
+            else:
+                con = SQLiteConnection(self._open())
+            self._prepare(con, self.path)
+        return con
+
+    def connect_replica(self, address):
+        """A read-only connection to the database file at `address`.
+
+        Pointing it at SQLITE_PATH itself stands in for a replica in tests.
+        """
+        return SQLiteConnection(self._open(address, read_only=True))
+
+    def connect_shard(self, address):
+        """A connection to the cinema database file at `address`; the schema is created on first use."""
+        con = SQLiteConnection(self._open(address))
+        with self._lock:
+            self._prepare(con, address)
+        return con
+
+    def is_retryable(self, err):
+        return isinstance(err, sqlite3.OperationalError) and "locked" in str(err)
+
+    def has_schema(self, con):
+        cursor = con.cursor()
+        cursor.execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name = 'movies'")
+        return cursor.fetchone()[0] > 0
+
+    def upsert_sql(self, table, keys, columns, counters):
+        names = keys + columns + counters
+        updates = ", ".join(f"{name} = {name} + excluded.{name}" for name in counters)
+        return (f"INSERT INTO {table} ({', '.join(names)}) VALUES ({', '.join(['%s'] * len(names))})"
+                f" ON CONFLICT ({', '.join(keys)}) DO UPDATE SET {updates}")
+
+    def replace_sql(self, table, keys, columns):
+        names = keys + columns
+        updates = ", ".join(f"{name} = excluded.{name}" for name in columns)
+        return (f"INSERT INTO {table} ({', '.join(names)}) VALUES ({', '.join(['%s'] * len(names))})"
+                f" ON CONFLICT ({', '.join(keys)}) DO UPDATE SET {updates}")
+
+    def reserve_ids(self, cursor, table, first_id):
+        # AUTOINCREMENT continues after the larger of sqlite_sequence and the table's largest id
+        cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = %s", (table,))
+        row = cursor.fetchone()
+        if row is None:
+            cursor.execute("INSERT INTO sqlite_sequence (name, seq) VALUES (%s, %s)", (table, first_id - 1))
+        elif row[0] < first_id - 1:
+            cursor.execute("UPDATE sqlite_sequence SET seq = %s WHERE name = %s", (first_id - 1, table))
+
+
+def bootstrap(backend, con, existing=()):
+    """Creates the tables and indexes of the portable schema not named in `existing`."""
+    cursor = con.cursor()
+    for table, ddl in TABLES:
+        if table not in existing:
+            cursor.execute(ddl.format(**backend.ddl_tokens))
+    for ddl in INDEXES:
+        if ddl.split(" ON ")[0].split()[-1] not in existing:
+            cursor.execute(ddl)
+    con.commit()
+
+
+def create_backend(name):
+    if name == "mysql":
+        return MySQLBackend()
+    if name == "sqlite":
+        return SQLiteBackend()
+    raise ValueError(f"Unknown DB_BACKEND {name!r}; expected 'mysql' or 'sqlite'.")
+
+
+backend = create_backend(os.getenv("DB_BACKEND", "mysql").lower())
+
+# Catch this instead of a driver-specific exception class
+DatabaseError = backend.errors
+
+
+def copy_from_mysql(target):
+    """Replaces the contents of the SQLite database with the MySQL data."""
+    source = MySQLBackend().connect()
+    con = target.connect()
+    read, write = source.cursor(), con.cursor()
+    copied = {}
+    # Children are emptied first and parents filled first, so foreign keys hold throughout
+    for table, _ in reversed(TABLES):
+        write.execute(f"DELETE FROM {table}")
+    for table, _ in TABLES:
+        write.execute(f"PRAGMA table_info({table})")
+        columns = ", ".join(f"`{row[1]}`" for row in write.fetchall())
+        read.execute(f"SELECT {columns} FROM {table}")
+        rows = read.fetchall()
+        placeholders = ", ".join(["%s"] * len(columns.split(", ")))
+        write.executemany(f"INSERT INTO {table} ({columns}) VALUES ({placeholders})", rows)
+        copied[table] = len(rows)
+    con.commit()
+    source.close()
+    return copied
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Database backend tools")
+    parser.add_argument("command", choices=("init", "copy-from-mysql"))
+    args = parser.parse_args()
+
+    if args.command == "init":
+        con = backend.connect()
+        if backend.has_schema(con):
+            print(f"{backend.name}: schema already present")
+        else:
+            bootstrap(backend, con)
+            print(f"{backend.name}: schema created")
+        con.close()
+        return 0
+
+    if not isinstance(backend, SQLiteBackend):
+        parser.error("copy-from-mysql needs DB_BACKEND=sqlite")
+    for table, rows in copy_from_mysql(backend).items():
+        print(f"{table}: {rows} rows")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,72 @@
+"""Tickets of confirmed bookings.
+
+A confirmed booking of N seats gets N rows in the tickets table, written in
+the transaction that confirms it with one multi-row insert. Ticket numbers
+look like 1042-2-9F3A: booking id, position in the booking and a random
+part. The booking id makes them unique without asking the database, the
+random part keeps them from being guessed at the door. They are looked up
+through the unique index idx_tickets_number.
+"""
+import secrets
+
+_INSERT = """
+    INSERT INTO tickets (booking_id, seat_id, ticket_number, theatre_name, seat_number, title, show_id, show_datetime)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+"""
+
+# (ticket_number, title, theatre_name, show_datetime, seat_number, booking status)
+TICKET_QUERY = """
+    SELECT t.ticket_number, t.title, t.theatre_name, t.show_datetime, t.seat_number, b.b_status
+    FROM tickets t
+    JOIN booking b ON b.booking_id = t.booking_id
+"""
+
+# The same, for bookings moved to the archive tables by archive.py
+ARCHIVED_TICKET_QUERY = """
+    SELECT t.ticket_number, t.title, t.theatre_name, t.show_datetime, t.seat_number, b.b_status
+    FROM tickets_archive t
+    JOIN booking_archive b ON b.booking_id = t.booking_id
+"""
+
+
+def ticket_number(booking_id, position):
+    return f"{booking_id}-{position}-{secrets.token_hex(2).upper()}"
+
+
+def issue_tickets(cursor, booking_id, show_id, ticket_count, seats=None):
+    """Writes the tickets of a booking and returns their numbers.
+
+    `seats` are the booking's (seat_id, seat_number) pairs; None reads them
+    from booking_seats. A show without a seat plan gets unseated tickets.
+    Runs on the caller's cursor, i.e. in the booking transaction.
+    """
+    if seats is None:
+        cursor.execute("""
+            SELECT bs.seat_id, s.seat_number
+            FROM booking_seats bs
+            JOIN seats s ON s.seat_id = bs.seat_id
+            WHERE bs.booking_id = %s
+            ORDER BY bs.booking_seat_id
+        """, (booking_id,))
+        seats = cursor.fetchall()
+    cursor.execute("""
+        SELECT m.title, t.theatre_name, s.show_datetime
+        FROM showtime s
+        LEFT JOIN movies m ON m.movie_id = s.movie_id
+        LEFT JOIN theatre t ON t.theatre_id = s.theatre_id
+        WHERE s.show_id = %s
+    """, (show_id,))
+    title, theatre_name, show_datetime = cursor.fetchone() or (None, None, None)
+
+    seats = list(seats) or [(None, None)] * ticket_count
+    rows = [(booking_id, seat_id, ticket_number(booking_id, position), theatre_name, seat_number, title, show_id, show_datetime)
+            for position, (seat_id, seat_number) in enumerate(seats, 1)]
+    # executemany turns this into a single multi-row INSERT
+    cursor.executemany(_INSERT, rows)
+    return [row[2] for row in rows]
+
+
+def find_ticket(cursor, number):
+    """The ticket with this number, as a TICKET_QUERY row, or None."""
+    cursor.execute(TICKET_QUERY + " WHERE t.ticket_number = %s", (number,))
+    return cursor.fetchone()